@@ -4,16 +4,35 @@ ble_central.py
 Usage without socket:
 $ python central.py 0
 
+Options:
+-p  print samples
+-n  subscribe to notifications instead of polling read_gatt_char
+--shm NAME  write to the game's shared memory ring NAME instead of port 8080
+--record PATH  also append everything sent to the recording PATH (works
+               without the game too: python central.py 0 --record imu.brec)
+
 Runs in subprocess created in game
 
-Connects to esp32-c6 and receives imu data via ble
+Connects to esp32-c6 and receives imu data via ble. Sends a Ready frame
+to the game once samples are flowing.
 """
+import time
+
+# process start, for the startup time reported in the Ready frame
+START_TIME = time.monotonic()
+
 import asyncio
 from bleak import BleakScanner, BleakClient
 from bleak.exc import BleakError
 import struct
-import socket, time
-import sys
+import sys, os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sensor_io.framing import HEARTBEAT_INTERVAL, pack_heartbeat, pack_imu_sample, pack_ready
+from sensor_io.client import connect_with_retry
+from sensor_io.shm_ring import ShmRing
+from sensor_io.recording import RecordingWriter
+from notify_stream import ImuNotificationStream
 
 # UUIDs from the peripheral
 IMU_SERVICE_UUID = "1b9998a2-1234-5678-1234-56789abcdef0"
@@ -25,28 +44,45 @@ enable_print = False
 if len(sys.argv) > 1 and "-p" in sys.argv:
     enable_print = True 
 
+# Use BLE notifications instead of polling
+use_notify = False
+if len(sys.argv) > 1 and "-n" in sys.argv:
+    use_notify = True
+
 # Option to run this as a standalone script
 run_with_socket = True
 if len(sys.argv) > 1 and sys.argv[1] == "0":
     run_with_socket = False
 
-def connect_with_retry():
-    ''''
-    Attempt to connect to server
-    '''
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    while True:
-        try:
-            client_socket.connect(('localhost', 8080))
-            if enable_print: print("Connected to server")
-            return client_socket
-        except ConnectionRefusedError:
-            if enable_print: print("Server not available, retrying in 1 second...")
-            time.sleep(1)
+# Run as part of game? A ShmRing has the same sendall() as the socket
+client_socket = None
+if run_with_socket and "--shm" in sys.argv:
+    client_socket = ShmRing.attach(sys.argv[sys.argv.index("--shm") + 1])
+elif run_with_socket:
+    client_socket = connect_with_retry(8080, enable_print=enable_print)
+if "--record" in sys.argv:
+    client_socket = RecordingWriter(client_socket, sys.argv[sys.argv.index("--record") + 1])
+
 
-# Run as part of game?
-if run_with_socket:
-    client_socket = connect_with_retry()
+def send_ready(sock):
+    """
+    Tell the game the IMU can be used, with how long this process took to
+    get there
+    """
+    if sock is not None:
+        now = time.monotonic()
+        sock.sendall(pack_ready(now, now - START_TIME))
+        if enable_print: print(f"Ready after {now - START_TIME:.2f} s")
+
+
+async def send_heartbeats(sock):
+    """
+    Tell the game this process is alive, also while it scans for or waits
+    on the IMU; the game restarts it when heartbeats stop
+    """
+    while True:
+        sock.sendall(pack_heartbeat(time.monotonic()))
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
 
 
 async def find_imu_peripheral():
@@ -89,7 +125,9 @@ async def connect_and_read_imu(device):
         async with BleakClient(device) as client:
             if client.is_connected:
                 if enable_print: print("Connected to IMU_Sensor")
+                send_ready(client_socket)
 
+                seq = 0
                 while True:
                     # Read IMU data
                     try:
@@ -105,9 +143,11 @@ async def connect_and_read_imu(device):
                         if enable_print: print(f"  Gyroscope (DPS): X={gyro_data[0]:09.3f}, Y={gyro_data[1]:09.3f}, Z={gyro_data[2]:09.3f}")
 
                         # Send data through socket
-                        if run_with_socket:
-                            data = f"{gyro_data[0]},{gyro_data[1]},{gyro_data[2]}"
-                            client_socket.send(data.encode())
+                        if client_socket is not None:
+                            client_socket.sendall(
+                                pack_imu_sample(seq, time.monotonic(), *gyro_data)
+                            )
+                        seq += 1
 
                         # Wait for the next reading 
                         # Test different values -- try 0.09 
@@ -121,13 +161,63 @@ async def connect_and_read_imu(device):
         if enable_print: print(f"Connection error: {e}")
 
 
+async def connect_and_stream_imu(device):
+    """
+    Connect to the IMU_Sensor peripheral and forward notified samples in batches.
+    """
+    try:
+        if enable_print: print(f"Connecting to {device.name} ({device.address})...")
+        async with BleakClient(device) as client:
+            if client.is_connected:
+                if enable_print: print("Connected to IMU_Sensor, subscribing")
+                await forward_notifications(client)
+
+    except Exception as e:
+        if enable_print: print(f"Connection error: {e}")
+
+
+async def forward_notifications(client, sock=None):
+    """
+    Pair accel/gyro notifications and send each batch with a single sendall
+    """
+    if sock is None:
+        sock = client_socket
+
+    stream = ImuNotificationStream(client, ACCEL_CHAR_UUID, GYRO_CHAR_UUID)
+    await stream.start()
+    send_ready(sock)
+    try:
+        while client.is_connected:
+            batch = await stream.next_batch(timeout=1.0)
+            if not batch:
+                continue
+
+            if enable_print:
+                for pair in batch:
+                    print(f"  Gyroscope (DPS): X={pair.gyro[0]:09.3f}, Y={pair.gyro[1]:09.3f}, Z={pair.gyro[2]:09.3f}")
+
+            if sock is not None:
+                sock.sendall(b"".join(
+                    pack_imu_sample(pair.seq, pair.timestamp, *pair.gyro)
+                    for pair in batch
+                ))
+    finally:
+        if client.is_connected:
+            await stream.stop()
+
+
 async def main():
     """
     Main loop to scan and connect to the IMU_Sensor peripheral.
     """
+    if client_socket is not None:
+        # held so the task is not garbage collected
+        heartbeats = asyncio.create_task(send_heartbeats(client_socket))
     while True:
         device = await find_imu_peripheral()
-        if device:
+        if device and use_notify:
+            await connect_and_stream_imu(device)
+        elif device:
             await connect_and_read_imu(device)
         else:
             await asyncio.sleep(1)
@@ -0,0 +1,116 @@
+"""
+notify_stream.py
+
+Notification-driven IMU ingestion for central.py.
+
+Instead of polling both characteristics with read_gatt_char, subscribe to
+the accel and gyro notifications the peripheral already sends, pair them by
+arrival time and hand the pairs to the sender through an asyncio queue.
+
+Only needs an object with start_notify/stop_notify coroutines, so it can be
+driven by a fake client in tests.
+"""
+import asyncio
+import struct
+import time
+from collections import namedtuple
+
+ImuPair = namedtuple("ImuPair", ["seq", "timestamp", "accel", "gyro"])
+
+# Notifications further apart than this are not considered the same sample
+MAX_PAIR_SKEW = 0.02
+QUEUE_SIZE = 256
+MAX_BATCH = 32
+
+
+class ImuNotificationStream:
+    def __init__(
+        self,
+        client,
+        accel_uuid,
+        gyro_uuid,
+        max_skew=MAX_PAIR_SKEW,
+        queue_size=QUEUE_SIZE,
+        clock=time.monotonic,
+    ):
+        self.client = client
+        self.accel_uuid = accel_uuid
+        self.gyro_uuid = gyro_uuid
+        self.max_skew = max_skew
+        self.clock = clock
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+        # latest unpaired notification per characteristic: (timestamp, values)
+        self._pending_accel = None
+        self._pending_gyro = None
+        self._seq = 0
+        self.dropped = 0
+
+    async def start(self):
+        await self.client.start_notify(self.accel_uuid, self._on_accel)
+        await self.client.start_notify(self.gyro_uuid, self._on_gyro)
+
+    async def stop(self):
+        await self.client.stop_notify(self.accel_uuid)
+        await self.client.stop_notify(self.gyro_uuid)
+
+    def _on_accel(self, sender, data):
+        now = self.clock()
+        values = struct.unpack("<fff", data)
+        gyro = self._pending_gyro
+        if gyro is not None and now - gyro[0] <= self.max_skew:
+            self._pending_gyro = None
+            self._emit(gyro[0], values, gyro[1])
+            return
+        if gyro is not None:
+            # gyro waited too long for its partner, send it on its own
+            self._pending_gyro = None
+            self._emit(gyro[0], None, gyro[1])
+        self._pending_accel = (now, values)
+
+    def _on_gyro(self, sender, data):
+        now = self.clock()
+        values = struct.unpack("<fff", data)
+        if self._pending_gyro is not None:
+            # previous gyro never got an accel, don't lose it
+            stale = self._pending_gyro
+            self._pending_gyro = None
+            self._emit(stale[0], None, stale[1])
+        accel = self._pending_accel
+        if accel is not None and now - accel[0] <= self.max_skew:
+            self._pending_accel = None
+            self._emit(accel[0], accel[1], values)
+            return
+        self._pending_accel = None
+        self._pending_gyro = (now, values)
+
+    def _emit(self, timestamp, accel, gyro):
+        pair = ImuPair(self._seq, timestamp, accel, gyro)
+        self._seq += 1
+        if self.queue.full():
+            # the game only cares about recent motion, drop the oldest sample
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(pair)
+
+    def flush(self):
+        """Emit a gyro sample that is still waiting for its accel partner"""
+        if self._pending_gyro is not None:
+            stale = self._pending_gyro
+            self._pending_gyro = None
+            self._emit(stale[0], None, stale[1])
+
+    async def next_batch(self, max_batch=MAX_BATCH, timeout=None):
+        """
+        Wait for at least one pair, then return everything already queued
+        (up to max_batch). Returns an empty list on timeout.
+        """
+        try:
+            first = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            self.flush()
+            return []
+        batch = [first]
+        while len(batch) < max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+import hashlib
+import os
+import time
+
+from panda3d.core import Filename, ModelRoot, NodePath, VirtualFileSystem, getModelPath
+
+# used by nothing else: Panda's own model cache is off (conf.prc)
+CACHE_DIR = "../models/bam-cache"
+
+
+class AssetManager:
+    """
+    Loads each model file once and hands out instances of it.
+
+    The first time a .glb is loaded it is converted to a .bam in CACHE_DIR,
+    and later runs load the .bam directly, which skips the glTF importer.
+    Cache entries are named after the source's full path, so models with
+    the same file name in different folders do not collide, and a .stamp
+    file next to each .bam holds the source's size and mtime; the .bam is
+    rebuilt when either differs.
+
+    With allow_missing (used by the headless simulation, which needs the
+    scene graph but not the looks) a model that is not on disk is replaced
+    by an empty node instead of raising.
+    """
+
+    def __init__(self, loader, cache_dir=CACHE_DIR, enable_print=False, allow_missing=False):
+        self.loader = loader
+        self.cache_dir = cache_dir
+        self.enable_print = enable_print
+        self.allow_missing = allow_missing
+        self.missing = set()
+        self.models = {}
+        self.load_times = {}
+        self.cache_hits = set()
+
+    @staticmethod
+    def resolve(path):
+        """path as the loader would find it on the model path, or None"""
+        filename = Filename.fromOsSpecific(path)
+        if VirtualFileSystem.getGlobalPtr().resolveFilename(filename, getModelPath().getValue()):
+            return filename.toOsSpecific()
+        return None
+
+    def cache_path(self, path):
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+        name = f"{os.path.splitext(os.path.basename(path))[0]}-{digest}.bam"
+        return os.path.join(self.cache_dir, name)
+
+    @staticmethod
+    def source_stamp(path):
+        stat = os.stat(path)
+        return f"{stat.st_size} {stat.st_mtime_ns}"
+
+    def cache_is_current(self, source, bam_path):
+        if not os.path.exists(bam_path):
+            return False
+        if source is None:
+            # nothing to compare against, the cached copy is all there is
+            return True
+        try:
+            with open(bam_path + ".stamp") as f:
+                return f.read() == self.source_stamp(source)
+        except OSError:
+            return False
+
+    def load(self, path):
+        """Shared, unparented model for path (loaded on first use)"""
+        if path in self.models:
+            return self.models[path]
+
+        start = time.perf_counter()
+        source = self.resolve(path)
+        bam_path = self.cache_path(source or path)
+        if self.allow_missing and source is None and not os.path.exists(bam_path):
+            if self.enable_print:
+                print(f"warning: {path} not found, using an empty node")
+            model = NodePath(ModelRoot(os.path.basename(path)))
+            self.missing.add(path)
+            source = "placeholder"
+        elif self.cache_is_current(source, bam_path):
+            model = self.loader.loadModel(Filename.fromOsSpecific(bam_path))
+            self.cache_hits.add(path)
+            source = "cache"
+        else:
+            model = self.loader.loadModel(source or path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            model.writeBamFile(Filename.fromOsSpecific(bam_path))
+            with open(bam_path + ".stamp", "w") as f:
+                f.write(self.source_stamp(source))
+            source = "file"
+
+        self.load_times[path] = time.perf_counter() - start
+        if self.enable_print:
+            print(f"loaded {path} from {source} in {1000 * self.load_times[path]:.1f} ms")
+        self.models[path] = model
+        return model
+
+    def instance(self, path, parent, name=None):
+        """
+        New node under parent sharing path's geometry. Transforms, visibility
+        and children (e.g. colliders) of the returned node are per instance.
+        """
+        node = parent.attachNewNode(name or os.path.basename(path))
+        self.load(path).instanceTo(node)
+        return node
+
+    def total_load_time(self):
+        return sum(self.load_times.values())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# USAGE
+# python benchmark_collisions.py [--rolls 20] [--idle-frames 600] [--fps 60]
+#
+# Runs the headless Simulation and times BowlingMechanics.physicsStep (ball
+# and pin motion plus collision traversal) in every frame, split into idle
+# frames, with the ball waiting at the foul line, and active frames, from
+# release until the board is reset. Reports the mean and worst per-frame
+# cost of each.
+
+import argparse
+import os
+import random
+import time
+
+from simulate import FPS, Simulation, random_roll
+
+
+class FrameTimer:
+    """Wraps physicsStep and adds up its time per frame"""
+
+    def __init__(self, mechanics):
+        self.step = mechanics.physicsStep
+        self.frame = 0.0
+        mechanics.physicsStep = self
+
+    def __call__(self, dt):
+        start = time.perf_counter()
+        self.step(dt)
+        self.frame += time.perf_counter() - start
+
+    def take(self):
+        frame, self.frame = self.frame, 0.0
+        return frame
+
+
+def report(name, samples):
+    if not samples:
+        print(f"{name:>6} | no frames")
+        return
+    mean = 1e6 * sum(samples) / len(samples)
+    print(f"{name:>6} | {len(samples):>7} {mean:>9.1f} {1e6 * max(samples):>9.1f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-r", "--rolls", type=int, default=20)
+    ap.add_argument("--idle-frames", type=int, default=600)
+    ap.add_argument("--fps", type=int, default=FPS)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    # the game loads "../models/..." relative to main/
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    # enough frames that the game does not end during the run
+    sim = Simulation(frames=args.rolls, fps=args.fps)
+    mechanics = sim.mechanics
+    timer = FrameTimer(mechanics)
+
+    idle, active = [], []
+    for _ in range(args.idle_frames):
+        sim.step()
+        idle.append(timer.take())
+
+    rng = random.Random(args.seed)
+    rolled = 0
+    while rolled < args.rolls:
+        position, samples = random_roll(rng)
+        mechanics.moveBallHorizontal(position)
+        for gyro_y in samples:
+            mechanics.handle_imu_update(0, gyro_y, 0)
+        mechanics.swing_detector.reset()
+        if mechanics.can_bowl:
+            continue
+        rolled += 1
+        while not mechanics.can_bowl:
+            sim.step()
+            active.append(timer.take())
+
+    print(f"physicsStep time per frame at {args.fps} fps (us)")
+    print(f"{'frames':>6} | {'count':>7} {'mean':>9} {'max':>9}")
+    report("idle", idle)
+    report("active", active)
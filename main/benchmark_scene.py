@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# USAGE
+# python benchmark_scene.py [--frames 300] [--display p3tinydisplay]
+#
+# Renders the static environment (lanes, gutters, backdrops) offscreen, once
+# as separate nodes and once flattened by build_static_scene(), and reports
+# the geom count (draw calls) and mean frame time of each. Needs no window;
+# p3tinydisplay is Panda3D's software renderer, pass pandagl to measure the
+# real GPU path. Models missing from ../models are skipped with a warning.
+
+import argparse
+import os
+import tempfile
+import time
+
+from panda3d.core import loadPrcFileData
+
+
+def render_frames(base, frames):
+    # warm up so textures and vertex buffers are already prepared
+    for _ in range(10):
+        base.graphicsEngine.renderFrame()
+    start = time.perf_counter()
+    for _ in range(frames):
+        base.graphicsEngine.renderFrame()
+    return 1000 * (time.perf_counter() - start) / frames
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-f", "--frames", type=int, default=300)
+    ap.add_argument("-d", "--display", default="p3tinydisplay")
+    ap.add_argument("--size", default="800 600")
+    args = ap.parse_args()
+
+    loadPrcFileData(
+        "",
+        f"window-type offscreen\nload-display {args.display}\n"
+        f"win-size {args.size}\naudio-library-name null\nsync-video false",
+    )
+
+    from direct.showbase.ShowBase import ShowBase
+
+    from asset_manager import AssetManager
+    from static_scene import STATIC_SCENE, build_static_scene, count_geoms
+
+    base = ShowBase()
+    base.camera.setPos(-30, -10, 0)
+    base.camera.setHpr(-75, 0, 90)
+
+    layout = []
+    for entry in STATIC_SCENE:
+        if os.path.exists(entry[0]):
+            layout.append(entry)
+        else:
+            print(f"warning: {entry[0]} not found, skipping")
+
+    assets = AssetManager(base.loader, cache_dir=tempfile.mkdtemp())
+
+    print(f"{'scene':>9} | {'geom nodes':>10} {'geoms':>5} | {'ms/frame':>8}")
+    for flatten in (False, True):
+        scene = build_static_scene(assets, base.render, layout, flatten=flatten)
+        geom_nodes, geoms = count_geoms(scene)
+        ms = render_frames(base, args.frames)
+        name = "flattened" if flatten else "separate"
+        print(f"{name:>9} | {geom_nodes:>10} {geoms:>5} | {ms:>8.2f}")
+        scene.removeNode()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# USAGE
+# python benchmark_scoring.py [--games 1000000] [--frames 10]
+#
+# Plays random games through ScoreSheet and reports games and rolls per
+# second. As a baseline, the same games are also scored by rerunning
+# score_rolls() over the whole roll list after every ball, which is what
+# recomputing the totals on every read costs. Roll sequences are generated
+# up front (and reused cyclically) so only scoring is timed.
+
+import argparse
+import random
+import time
+
+from game_logic import FRAMES, ScoreSheet, score_rolls
+
+
+def make_games(count, frames, seed=0, strike_rate=0.3):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        sheet = ScoreSheet(frames)
+        rolls = []
+        while not sheet.complete:
+            pins = sheet.standing if rng.random() < strike_rate else rng.randint(0, sheet.standing)
+            sheet.roll(pins)
+            rolls.append(pins)
+        games.append(rolls)
+    return games
+
+
+def run_incremental(games, count, frames):
+    rolls = 0
+    start = time.perf_counter()
+    for i in range(count):
+        sheet = ScoreSheet(frames)
+        for pins in games[i % len(games)]:
+            sheet.roll(pins)
+            sheet.total
+        rolls += len(sheet.rolls)
+    return time.perf_counter() - start, rolls
+
+
+def run_recompute(games, count, frames):
+    rolls = 0
+    start = time.perf_counter()
+    for i in range(count):
+        game = games[i % len(games)]
+        for n in range(1, len(game) + 1):
+            score_rolls(game[:n], frames)
+        rolls += len(game)
+    return time.perf_counter() - start, rolls
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-g", "--games", type=int, default=1000000)
+    ap.add_argument("-f", "--frames", type=int, default=FRAMES)
+    ap.add_argument("--pool", type=int, default=10000, help="distinct games to generate")
+    ap.add_argument("--baseline-games", type=int, default=100000)
+    args = ap.parse_args()
+
+    games = make_games(min(args.pool, args.games), args.frames)
+
+    print(f"{'scorer':>11} | {'games':>8} {'games/s':>10} {'us/roll':>8}")
+    for name, run, count in (
+        ("incremental", run_incremental, args.games),
+        ("recompute", run_recompute, min(args.baseline_games, args.games)),
+    ):
+        elapsed, rolls = run(games, count, args.frames)
+        print(f"{name:>11} | {count:>8} {count / elapsed:>10.0f} {1e6 * elapsed / rolls:>8.2f}")
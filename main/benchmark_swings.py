@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# USAGE
+# python benchmark_swings.py ../data/swings [--min-samples 3] [--buffer-size 5] [--divisor 10] ...
+# python benchmark_swings.py ../data/swings --make-corpus [--traces 40] [--seed 0]
+#
+# Runs SwingDetector over a corpus of labeled IMU recordings (made with
+# central.py --record, see docs/sensor_io.md) and reports how well it finds
+# swings. A recording holds one attempt and is labeled by its file name,
+# <label>-<anything>.brec: "none" for movement that is not a swing (walking
+# up, adjusting the grip), any other label (e.g. hard, soft) for one swing.
+#
+# Reports, for the detector settings given on the command line:
+# - precision and recall: a swing trace with a detection is a true
+#   positive, one without a false negative, and every detection in a none
+#   trace or beyond the first in a swing trace a false positive
+# - the roll time of each label's first detections, as counts per roll time
+# - detection latency from the swing's onset (the first sample at or over
+#   --onset DPS) to the sample the detector fires on, in samples and ms
+# - SwingDetector.push() throughput in samples per second
+#
+# --make-corpus writes a synthetic corpus of hard, soft and none traces
+# instead, shaped like simulate.py's swings with sensor noise, at the rate
+# central.py polls the IMU; it gives the harness something to run on until
+# real recordings are collected. Recordings are appended to, so it refuses
+# a directory that already holds any.
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sensor_io.framing import pack_imu_sample, pack_ready
+from sensor_io.recording import RecordingWriter, load_imu
+from swing_detector import BUFFER_SIZE, MIN_SAMPLES_THRESHOLD, PowerCurve, SwingDetector, swing_samples
+
+# central.py reads the IMU every 0.06 s plus the time the two reads take
+SAMPLE_INTERVAL = 0.065
+# gyro y at which a swing is taken to have started, half the lowest power level
+ONSET_DPS = 20.0
+# label of traces that contain no swing
+NO_SWING = "none"
+
+
+def load_corpus(directory):
+    """[(label, name, samples)] for every recording in directory, samples as from load_imu"""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.brec"))):
+        name = os.path.basename(path)
+        corpus.append((name.split("-")[0], name, load_imu(path)))
+    return corpus
+
+
+def detect(samples, make_detector):
+    """[(sample index, Swing)] for every swing a fresh detector finds in samples"""
+    detector = make_detector()
+    return [
+        (n, swing)
+        for n, swing in enumerate(map(detector.push, samples["y"].tolist()))
+        if swing is not None
+    ]
+
+
+def evaluate(corpus, make_detector, onset_dps=ONSET_DPS):
+    tp = fp = fn = 0
+    found, missed = Counter(), Counter()
+    roll_times = defaultdict(Counter)
+    latencies = []
+    for label, name, samples in corpus:
+        detections = detect(samples, make_detector)
+        if label == NO_SWING:
+            fp += len(detections)
+            continue
+        if not detections:
+            fn += 1
+            missed[label] += 1
+            continue
+        tp += 1
+        found[label] += 1
+        fp += len(detections) - 1
+        n, swing = detections[0]
+        roll_times[label][swing.roll_time] += 1
+        over = (samples["y"] >= onset_dps).nonzero()[0]
+        if len(over) and over[0] <= n:
+            onset = over[0]
+            latencies.append((n - onset, samples["timestamp"][n] - samples["timestamp"][onset]))
+    return {
+        "tp": tp, "fp": fp, "fn": fn, "found": found, "missed": missed,
+        "roll_times": roll_times, "latencies": latencies,
+    }
+
+
+def throughput(corpus, make_detector, min_seconds=0.5):
+    """Samples per second through SwingDetector.push, the corpus repeated for at least min_seconds"""
+    traces = [samples["y"].tolist() for _, _, samples in corpus]
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for values in traces:
+            push = make_detector().push
+            for value in values:
+                push(value)
+            count += len(values)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or not count:
+            return count / elapsed if elapsed else 0.0
+
+
+def make_corpus(directory, traces, seed=0):
+    """Write traces hard, soft and none recordings each to directory, which must hold none yet"""
+    if glob.glob(os.path.join(directory, "*.brec")):
+        # RecordingWriter appends: every trace would get a second swing
+        raise ValueError(f"{directory} already holds recordings, use an empty directory")
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    def rest(count):
+        return [rng.gauss(0, 3) for _ in range(count)]
+
+    def swing(peak):
+        samples = swing_samples(peak, rise=rng.randint(2, 5), fall=rng.randint(1, 3))
+        return [value + rng.gauss(0, 4) for value in samples]
+
+    def not_a_swing():
+        kind = rng.choice(("still", "bump", "turn"))
+        if kind == "bump":
+            # a knock on the sensor: one or two samples well over threshold
+            return [rng.uniform(50, 120) for _ in range(rng.randint(1, 2))]
+        if kind == "turn":
+            # turning the wrist slowly, under the lowest power level
+            return [rng.uniform(15, 38) for _ in range(rng.randint(3, 10))]
+        return rest(rng.randint(5, 20))
+
+    makers = {
+        "hard": lambda: swing(rng.uniform(110, 170)),
+        "soft": lambda: swing(rng.uniform(45, 90)),
+        NO_SWING: not_a_swing,
+    }
+    for label, make in makers.items():
+        for i in range(traces):
+            values = rest(rng.randint(5, 20)) + make() + rest(rng.randint(5, 20))
+            writer = RecordingWriter(None, os.path.join(directory, f"{label}-{i:03d}.brec"))
+            t = 1000.0 + i
+            writer.sendall(pack_ready(t, 1.0))
+            for seq, value in enumerate(values):
+                t += SAMPLE_INTERVAL + rng.uniform(-0.005, 0.005)
+                writer.sendall(pack_imu_sample(seq, t, rng.gauss(0, 3), value, rng.gauss(0, 3)))
+            writer.close()
+
+
+def report(result, rate):
+    tp, fp, fn = result["tp"], result["fp"], result["fn"]
+    precision = tp / (tp + fp) if tp + fp else float("nan")
+    recall = tp / (tp + fn) if tp + fn else float("nan")
+    print(f"detection  | TP {tp}  FP {fp}  FN {fn}  precision {precision:.3f}  recall {recall:.3f}")
+    found, missed = result["found"], result["missed"]
+    for label in sorted(set(found) | set(missed)):
+        print(f"           | {label:<8} recall {found[label] / (found[label] + missed[label]):.3f} "
+            f"({found[label]} of {found[label] + missed[label]})")
+
+    roll_times = result["roll_times"]
+    if roll_times:
+        values = sorted({t for counts in roll_times.values() for t in counts})
+        print(f"roll time  | {'label':<8} " + " ".join(f"{t:>4}" for t in values) + "   mean")
+        for label, counts in sorted(roll_times.items()):
+            total = sum(counts.values())
+            mean = sum(t * c for t, c in counts.items()) / total
+            print(f"           | {label:<8} " + " ".join(f"{counts[t]:>4}" for t in values) + f" {mean:>6.2f}")
+
+    latencies = result["latencies"]
+    if latencies:
+        samples = sorted(n for n, _ in latencies)
+        ms = sorted(1000 * s for _, s in latencies)
+        print(f"latency    | samples mean {sum(samples) / len(samples):.2f} max {samples[-1]}  "
+            f"ms mean {sum(ms) / len(ms):.1f} p95 {ms[int(0.95 * (len(ms) - 1))]:.1f} max {ms[-1]:.1f}")
+    print(f"throughput | {rate:,.0f} samples/s")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("corpus", help="directory of <label>-*.brec recordings")
+    ap.add_argument("--make-corpus", action="store_true")
+    ap.add_argument("--traces", type=int, default=40, help="traces per label for --make-corpus")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--onset", type=float, default=ONSET_DPS)
+    ap.add_argument("--buffer-size", type=int, default=BUFFER_SIZE)
+    ap.add_argument("--min-samples", type=int, default=MIN_SAMPLES_THRESHOLD)
+    defaults = PowerCurve()
+    for field in ("divisor", "exponent", "scale"):
+        ap.add_argument(f"--{field}", type=float, default=getattr(defaults, field))
+    for field in ("min_level", "max_level", "min_roll_time", "max_roll_time"):
+        ap.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(defaults, field))
+    args = ap.parse_args()
+
+    if args.make_corpus:
+        try:
+            make_corpus(args.corpus, args.traces, args.seed)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"wrote {3 * args.traces} traces to {args.corpus}")
+        sys.exit()
+
+    curve = PowerCurve(
+        divisor=args.divisor, min_level=args.min_level, max_level=args.max_level,
+        exponent=args.exponent, scale=args.scale,
+        min_roll_time=args.min_roll_time, max_roll_time=args.max_roll_time,
+    )
+
+    def make_detector():
+        return SwingDetector(args.buffer_size, args.min_samples, curve)
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        sys.exit(f"no .brec recordings in {args.corpus}")
+    labels = Counter(label for label, _, _ in corpus)
+    print(f"corpus     | {len(corpus)} traces, {sum(len(s) for _, _, s in corpus)} samples: "
+        + ", ".join(f"{count} {label}" for label, count in sorted(labels.items())))
+    report(evaluate(corpus, make_detector, args.onset), throughput(corpus, make_detector))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# USAGE
+# python benchmark_transport.py [--rates 100 250 500 1000 0] [--seconds 3] [--poll 0.001]
+#
+# Streams IMU frames from a producer process to a SensorServer over the
+# loopback socket (port 8080's path) and over a shared memory ring, at each
+# rate in Hz (0 = as fast as the producer can send). The consumer drains
+# the server every --poll seconds, as the game's dispatch task does once a
+# frame; use --poll 0.0167 to see the latency at 60 fps. Reports samples
+# delivered per second, lost samples, send-to-drain latency (p50, p99,
+# max) and the consumer's CPU time per second.
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sensor_io.client import connect_with_retry
+from sensor_io.framing import pack_imu_sample
+from sensor_io.shm_ring import ShmRing
+from sensor_server import ImuChannel, SensorServer
+
+
+def produce(target, rate, seconds, times_path):
+    """Send numbered samples to target (a port or a ring name); their send times go to times_path"""
+    if target.isdigit():
+        out = connect_with_retry(int(target))
+    else:
+        out = ShmRing.attach(target)
+    times = array("d")
+    interval = 1 / rate if rate else 0
+    start = time.monotonic()
+    seq = 0
+    while True:
+        now = time.monotonic()
+        if now - start >= seconds:
+            break
+        # the sequence number doubles as the sample's x so the consumer can
+        # match it to its send time
+        out.sendall(pack_imu_sample(seq, now, seq, 0, 0))
+        times.append(now)
+        seq += 1
+        if interval:
+            delay = start + seq * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    with open(times_path, "wb") as f:
+        times.tofile(f)
+    if target.isdigit():
+        out.close()
+
+
+def run(transport, rate, seconds, poll):
+    server = SensorServer()
+    ring = None
+    if transport == "socket":
+        target = server.listen(0, ImuChannel)
+        server.start()
+    else:
+        ring = ShmRing.create(capacity=4096)
+        server.attach_ring(ring, ImuChannel)
+        target = ring.name
+
+    # a separate process like the sensors: the game starts them with Popen
+    times_file = tempfile.NamedTemporaryFile(suffix=".times", delete=False)
+    times_file.close()
+    producer = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), "--produce",
+        str(target), str(rate), str(seconds), times_file.name,
+    ])
+
+    received = {}
+
+    def collect():
+        for event, args in server.drain():
+            received[int(args[0])] = time.monotonic()
+
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    while producer.poll() is None:
+        collect()
+        time.sleep(poll)
+    times = array("d")
+    with open(times_file.name, "rb") as f:
+        times.frombytes(f.read())
+    os.unlink(times_file.name)
+    deadline = time.monotonic() + 0.5
+    while len(received) < len(times) and time.monotonic() < deadline:
+        collect()
+        time.sleep(poll)
+    cpu = time.process_time() - cpu_start
+    wall = time.monotonic() - wall_start
+
+    server.stop()
+    if ring is not None:
+        ring.close()
+
+    latencies = sorted(received[seq] - times[seq] for seq in received if seq < len(times))
+    return {
+        "sent": len(times),
+        "received": len(received),
+        "rate": len(received) / seconds,
+        "latencies": latencies,
+        "cpu": cpu / wall,
+    }
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else float("nan")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", type=int, nargs="+", default=[100, 250, 500, 1000, 0])
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--poll", type=float, default=0.001)
+    # used by run() to start the producer process
+    ap.add_argument("--produce", nargs=4, metavar=("TARGET", "RATE", "SECONDS", "TIMES"))
+    args = ap.parse_args()
+
+    if args.produce:
+        target, rate, seconds, times_path = args.produce
+        produce(target, int(rate), float(seconds), times_path)
+        sys.exit()
+
+    print(f"{'rate':>6} {'transport':>9} | {'samples/s':>9} {'lost':>6} "
+        f"{'p50 us':>8} {'p99 us':>8} {'max us':>8} {'cpu ms/s':>8}")
+    for rate in args.rates:
+        for transport in ("socket", "shm"):
+            result = run(transport, rate, args.seconds, args.poll)
+            latencies = result["latencies"]
+            print(f"{rate or 'max':>6} {transport:>9} | {result['rate']:>9.0f} "
+                f"{result['sent'] - result['received']:>6} "
+                f"{1e6 * percentile(latencies, 50):>8.0f} {1e6 * percentile(latencies, 99):>8.0f} "
+                f"{1e6 * (latencies[-1] if latencies else float('nan')):>8.0f} "
+                f"{1000 * result['cpu']:>8.1f}")
@@ -2,15 +2,19 @@
 
 from direct.task.TaskManagerGlobal import taskMgr
 
-from game_logic import GameLogic, PlayerTurn
+from game_logic import GameLogic
 from scoreboard import Scoreboard
-from direct.interval.LerpInterval import LerpQuatInterval
+from swing_detector import SwingDetector
+from asset_manager import AssetManager
+from static_scene import build_static_scene, count_geoms
+from profiler import profiler
 from direct.showbase.ShowBaseGlobal import globalClock
 from panda3d.core import (
     Point3,
     Vec3,
     NodePath,
     CollisionHandlerEvent,
+    CollisionHandlerQueue,
     CollisionNode,
     CollisionSphere,
     CollisionCapsule,
@@ -33,9 +37,25 @@ from direct.interval.IntervalGlobal import (
     LerpPosHprInterval,
 )
 from math import sqrt, exp
+import time
+
+# ball, pins and collisions advance in steps of this many seconds whatever
+# the render frame rate; the display is interpolated between steps
+PHYSICS_DT = 1 / 120
+# after a stall (e.g. loading) the simulation drops time instead of trying
+# to catch up with more than this many steps in one frame
+MAX_PHYSICS_STEPS = 12
+# seconds a knocked pin takes to fall over
+KNOCKDOWN_TIME = 0.7
+
+
+class PinFall:
+    """A pin falling over: game time since the hit and the axis it turns about"""
+
+    def __init__(self, axis):
+        self.elapsed = 0.0
+        self.axis = axis
 
-MIN_SAMPLES_THRESHOLD = 3
-BUFFER_SIZE = 5
 
 class BowlingMechanics:
     def __init__(self, game, options):
@@ -44,8 +64,8 @@ class BowlingMechanics:
         self.enable_print = options.enable_print
         self.enable_print_power_mag = options.enable_print_power_mag
 
-        # Initialize buffer
-        self.power_level_buffer = [0] * BUFFER_SIZE
+        # Initialize swing detection
+        self.swing_detector = SwingDetector()
 
         # Setup object positions
         self.ball_movement_delta = 0.5
@@ -76,18 +96,34 @@ class BowlingMechanics:
         # Set background color (darker, closer to black)
         self.game.setBackgroundColor(0.02, 0.02, 0.08)
         
+        # Models are loaded once (from the .bam cache when possible) and instanced
+        self.assets = AssetManager(
+            self.game.loader, enable_print=self.enable_print, allow_missing=options.headless
+        )
+
         # Create and position overhead lights
         self.setupLighting()
-        
-        self.setupLane()
+
+        self.setup_times = {}
         self.pins = []
-        self.setupPins()
-        self.setupBowlingBall()
-        self.setupCollisions()
-        self.setupControls()
+        for step in (
+            self.setupLane,
+            self.setupPins,
+            self.setupBowlingBall,
+            self.setupCollisions,
+            self.setupControls,
+        ):
+            start = time.perf_counter()
+            step()
+            self.setup_times[step.__name__] = time.perf_counter() - start
+        if self.enable_print:
+            for name, seconds in self.setup_times.items():
+                print(f"{name}: {1000 * seconds:.1f} ms")
 
         # game logic & scorebaord
-        self.game_logic = GameLogic(options)
+        self.game_logic = GameLogic(
+            options, self.game.messenger, options.num_frames, len(self.game.player_names)
+        )
         ### TESTING Scoreboard class
         self.scoreboard = Scoreboard(self.game, self.game_logic, options)
         ###
@@ -96,11 +132,11 @@ class BowlingMechanics:
         self.can_bowl = True
         self.reset_timer = 0
 
-        # update tasks
-        self.game.taskMgr.add(self.update, "updateTask")
+        # update tasks; the per-frame ones are timed by the profiler
+        self.game.taskMgr.add(profiler.wrap("updateTask", self.update), "updateTask")
         self.game.accept("mouse1", self.onMouseClick)
-        self.game.accept('accel_data', self.handle_imu_update)
-        self.game.accept('position_data', self.moveBallHorizontal)
+        self.game.accept('accel_data', profiler.wrap("accel_data", self.handle_imu_update))
+        self.game.accept('position_data', profiler.wrap("position_data", self.moveBallHorizontal))
 
     def moveBallHorizontal(self, distance):
         '''
@@ -123,137 +159,72 @@ class BowlingMechanics:
         Detect swing given imu data, and convert to value that represents the ball's time in motion 
         '''
 
-        # Implementation of circ buffer
-        def add_to_buffer(val):
-            self.power_level_buffer.pop(0)
-            self.power_level_buffer.append(val)
+        swing = self.swing_detector.push(gyro_y)
 
-        # Define power_level
-        power_level = gyro_y
-
-        # Increase the range of power levels by reducing the divisor
-        power_level = int(power_level / 10)  
-        
-        # Adjust the thresholds and scaling
-        if power_level < 4:  # Minimum threshold
-            power_level = 0
-        elif power_level > 16:  # Maximum threshold
-            power_level = 16
-
-        add_to_buffer(power_level)
-
-        # Find consecutive nonzeros
-        start = 0
-        count = 0
-        i = 0
-        while i < BUFFER_SIZE:
-            i_start = i
-            i_count = 0
-            for j in range(i_start, BUFFER_SIZE):
-                if self.power_level_buffer[j] > 0:
-                    i_count += 1
-                else:
-                    break
-            if i_count > count:
-                start = i_start
-                count = i_count
-                i = i_start + i_count
-            else:
-                i += 1
-
-        stroke = self.power_level_buffer[start:start+count-1]
-        
-        if count >= MIN_SAMPLES_THRESHOLD:
-            # Calculate average power
-            avg_power = sum(stroke) / len(stroke)
-            
-            # Exponential scaling creates bigger difference between soft and hard swings
-            scaled_power = (avg_power ** 1.8) / 10  # Adjust exponent for desired curve
-            
-            # Map to roll time (1 to 8)
-            roll_time = int(max(1, min(8, 8 - scaled_power)))
-            
+        if swing is not None:
             # Logging
-            if self.enable_print_power_mag: 
-                print(f"raw power: {avg_power}, scaled power: {scaled_power}, roll time: {roll_time}")
-            if self.enable_print: 
+            if self.enable_print_power_mag:
+                print(f"raw power: {swing.avg_power}, scaled power: {swing.scaled_power}, roll time: {swing.roll_time}")
+            if self.enable_print:
                 print("rolling ball")
-                
-            self.rollBall(roll_time)
-
-            
-    def setupLane(self):
-        self.lane = self.game.loader.loadModel("../models/bowling-lane.glb")
-        self.lane.reparentTo(self.game.render)
-        self.lane.setPos(2, 0, 0)
-
-        # Add background lanes
-        self.left_lane = self.game.loader.loadModel("../models/bowling-lane.glb")
-        self.left_lane.reparentTo(self.game.render)
-        self.left_lane.setPos(2, 0, -12.5)
-
-        self.right_lane = self.game.loader.loadModel("../models/bowling-lane.glb")
-        self.right_lane.reparentTo(self.game.render)
-        self.right_lane.setPos(2, 0, 12.5)
-
-        self.right_gutter = self.game.loader.loadModel("../models/gutter2.glb")
-        self.right_gutter.reparentTo(self.game.render)
-        self.right_gutter.setPos(2, 0, 6.25)
-
-        self.left_gutter = self.game.loader.loadModel("../models/gutter2.glb")
-        self.left_gutter.reparentTo(self.game.render)
-        self.left_gutter.setPos(2, 0, -6.25)
-
-        self.right_gutter2 = self.game.loader.loadModel("../models/gutter2.glb")
-        self.right_gutter2.reparentTo(self.game.render)
-        self.right_gutter2.setPos(2, 0, 19)
-
-        self.left_gutter2 = self.game.loader.loadModel("../models/gutter2.glb")
-        self.left_gutter2.reparentTo(self.game.render)
-        self.left_gutter2.setPos(2, 0, -19)
-
-
-        self.backdrop = self.game.loader.loadModel("../models/backdrop2.glb")
-        self.backdrop.reparentTo(self.game.render)
-        self.backdrop.setPos(18, -1.5, 0)
-        self.backdrop.setScale(1, 2, 1)
 
-        self.backdrop2 = self.game.loader.loadModel("../models/backdrop2.glb")
-        self.backdrop2.reparentTo(self.game.render)
-        self.backdrop2.setPos(18, -1.5, 12.5)
-        self.backdrop2.setScale(1, 2, 1)
+            self.rollBall(swing.roll_time)
 
-        self.backdrop3 = self.game.loader.loadModel("../models/backdrop2.glb")
-        self.backdrop3.reparentTo(self.game.render)
-        self.backdrop3.setPos(18, -1.5, -12.5)
-        self.backdrop3.setScale(1, 2, 1)
+    def setupLane(self):
+        # lanes, gutters and backdrops never move, so they are merged into
+        # a few Geoms under a single node
+        self.static_scene = build_static_scene(self.assets, self.game.render)
+        if self.enable_print:
+            geom_nodes, geoms = count_geoms(self.static_scene)
+            print(f"static scene: {geom_nodes} geom nodes, {geoms} geoms")
 
     def setupPins(self):
+        # Each pin sits under a pivot node at its base, built once here: a
+        # knockdown only rotates the pivot, and a reset only un-rotates it,
+        # so no nodes are created or reparented while playing
+        self.pivots = []
+        # pins are kept apart from the rest of the scene so that collision
+        # traversal only has to walk this subtree
+        self.pin_deck = self.game.render.attachNewNode("pin_deck")
+        # physics state of each pivot: rotation at the last two steps, and
+        # the fall in progress if any
+        self.pin_quats = []
+        self.pin_prev_quats = []
+        self.pin_falls = []
         for i, row in enumerate(self.row_positions):
             for j, (x, z) in enumerate(row):
-                pin = self.game.loader.loadModel("../models/bowling-pin.glb")
-                pin.reparentTo(self.game.render)
+                index = len(self.pins)
+                pin = self.assets.instance(
+                    "../models/bowling-pin.glb", self.game.render, f"pin{index}"
+                )
                 pin.setPos(
                     x + self.pin_x_offset, self.pin_y_offset, z + self.pin_z_offset
                 )
                 pin.setHpr(180, 0, 0)
                 pin.setScale(10)
+
+                pinBaseZ = pin.getTightBounds(self.game.render)[0].getZ()
+                pivot = self.pin_deck.attachNewNode(f"pivot{index}")
+                pivot.setPos(pin.getX(), pin.getY(), pinBaseZ)
+                pin.wrtReparentTo(pivot)
+
                 self.pins.append(pin)
+                self.pivots.append(pivot)
+                self.pin_quats.append(Quat.identQuat())
+                self.pin_prev_quats.append(Quat.identQuat())
+                self.pin_falls.append(None)
 
     def reset_board(self, full_reset=False):
         if full_reset:
             if self.enable_print: print("performing full reset")
-            pin_num = 0
-            for i, row in enumerate(self.row_positions):
-                for j, (x, z) in enumerate(row):
-                    pin = self.pins[pin_num]
-                    pin.show()
-                    pin.wrtReparentTo(self.game.render)
-                    pin.setPos(
-                        x + self.pin_x_offset, self.pin_y_offset, z + self.pin_z_offset
-                    )
-                    pin.setHpr(180, 0, 0)
-                    pin_num += 1
+            for i, (pin, pivot) in enumerate(zip(self.pins, self.pivots)):
+                self.pin_falls[i] = None
+                self.pin_quats[i] = Quat.identQuat()
+                self.pin_prev_quats[i] = Quat.identQuat()
+                pivot.setQuat(Quat.identQuat())
+                pin.show()
+                # standing pins go back to being only "into" solids
+                self.cTrav.removeCollider(self.pin_colliders[i])
 
         else:
             if self.enable_print: print("performing partial reset")
@@ -266,14 +237,27 @@ class BowlingMechanics:
             self.pins_knocked = 0
 
         self.ball.setPos(-10, -1.2, 0)
+        # a slow roll may still be going when the board resets: stop it, and
+        # move its physics state too, or the next step puts the ball back
+        # where the roll was
+        self.ball_time_left = 0
+        self.ball_pos = self.ball.getPos()
+        self.ball_prev_pos = self.ball.getPos()
         self.can_bowl = True
 
     def setupBowlingBall(self):
-        self.ball = self.game.loader.loadModel("../models/bowling-ball.glb")
-        self.ball.reparentTo(self.game.render)
+        self.ball = self.assets.instance("../models/bowling-ball.glb", self.game.render)
         self.ball.setPos(-10, -1.2, 0)
         self.ball.setScale(5)
 
+        # physics state while rolling: position at the last two steps,
+        # constant velocity and the roll time still to go
+        self.ball_pos = self.ball.getPos()
+        self.ball_prev_pos = self.ball.getPos()
+        self.ball_velocity = Vec3(0, 0, 0)
+        self.ball_time_left = 0
+        self.physics_time = 0.0
+
     def setupControls(self):
         self.game.accept("arrow_left", self.moveBallLeft)
         self.game.accept("arrow_right", self.moveBallRight)
@@ -298,8 +282,13 @@ class BowlingMechanics:
 
     def setupCollisions(self):
         self.cTrav = CollisionTraverser()
-        self.handler = CollisionHandlerEvent()
-        self.pinHandler = CollisionHandlerEvent()
+        # contacts are handled inside the physics step that found them, so
+        # queues are used rather than events thrown to the next frame
+        self.handler = CollisionHandlerQueue()
+        self.pinHandler = CollisionHandlerQueue()
+        # the ball is tested along its path since the last step, so even a
+        # fast ball cannot pass through a pin between two steps
+        self.cTrav.setRespectPrevTransform(True)
 
         BALL_MASK = BitMask32.bit(0)
         PIN_MASK = BitMask32.bit(1)
@@ -315,6 +304,10 @@ class BowlingMechanics:
         self.cTrav.addCollider(ballCollider, self.handler)
         # ballCollider.show()
 
+        # A standing pin cannot hit anything by itself, so pins are only
+        # added as "from" colliders once hitPin knocks them over; until
+        # then the ball and falling pins test against them as "into" solids
+        self.pin_colliders = []
         for i, pin in enumerate(self.pins):
             pinCollider = pin.attachNewNode(CollisionNode(f"pinCollider{i}"))
             pinCollider.node().addSolid(
@@ -322,19 +315,10 @@ class BowlingMechanics:
             )
             pinCollider.node().setFromCollideMask(PIN_MASK)
             pinCollider.node().setIntoCollideMask(BALL_MASK | PIN_MASK)
-            self.cTrav.addCollider(pinCollider, self.pinHandler)
+            self.pin_colliders.append(pinCollider)
 
             # pinCollider.show()
 
-        self.handler.addInPattern("collision-ball-into-pinCollider*")
-        self.pinHandler.addInPattern("collision-pinCollider*-into-pinCollider*")
-        self.game.accept(
-            "collision-ball-into-pinCollider*", self.handleBallPinCollision
-        )
-        self.game.accept(
-            "collision-pinCollider*-into-pinCollider*", self.handlePinPinCollision
-        )
-
     def onMouseClick(self):
         if self.enable_print: print("Mouse Clicked!")
         self.rollBall(3)
@@ -354,10 +338,12 @@ class BowlingMechanics:
         ratio = distance_to_travel / (7 - start_pos.getX())
         end_y = start_pos.getY() + (y_difference * ratio)
 
-        rollSequence = Sequence(
-            LerpPosInterval(self.ball, time_in_motion, Point3(end_x, end_y, 0)), name="rollSequence"
-        )
-        rollSequence.start()
+        # same straight path as before, covered at constant speed by the
+        # physics steps: a harder swing means a shorter time_in_motion
+        self.ball_pos = Point3(start_pos)
+        self.ball_prev_pos = Point3(start_pos)
+        self.ball_velocity = (Point3(end_x, end_y, 0) - start_pos) / time_in_motion
+        self.ball_time_left = time_in_motion
 
     def handleBallPinCollision(self, entry):
         if self.enable_print: print("Ball Pin Collision Detected")
@@ -366,12 +352,7 @@ class BowlingMechanics:
         normal = entry.getSurfaceNormal(self.game.render)
         pin_name = intoNode.getName()
         pin_index = int(pin_name.replace("pinCollider", ""))
-
-        if not self.knocked_pins[pin_index]:
-            self.knocked_pins[pin_index] = True
-            self.pins_knocked += 1
-
-        self.knockDownPin(self.pins[pin_index], normal)
+        self.hitPin(pin_index, normal)
 
     def handlePinPinCollision(self, entry):
         if self.enable_print: print("Pin-Pin Collision Detected!")
@@ -384,27 +365,20 @@ class BowlingMechanics:
         normal = entry.getSurfaceNormal(self.game.render)
         pin_name = intoNode.getName()
         pin_index = int(pin_name.replace("pinCollider", ""))
+        self.hitPin(pin_index, normal)
 
-        if not self.knocked_pins[pin_index]:
-            self.knocked_pins[pin_index] = True
-            self.pins_knocked += 1
-
-        self.knockDownPin(self.pins[pin_index], normal)
-
-    def knockDownPin(self, pin, normal):
-        rotationNode = self.game.render.attachNewNode("rotationNode")
-        pinPos = pin.getPos(self.game.render)
-
-        pinBounds = pin.getTightBounds(self.game.render)
-        pinMin = pinBounds[0]
-        pinBaseZ = pinMin.getZ()
-
-        rotationNode.setPos(pinPos.getX(), pinPos.getY(), pinBaseZ)
+    def hitPin(self, pin_index, normal):
+        # the traverser reports a contact every frame while it lasts, only
+        # the first one knocks the pin down
+        if self.knocked_pins[pin_index]:
+            return
 
-        offsetZ = pinPos.getZ() - pinBaseZ
-        pin.wrtReparentTo(rotationNode)
-        pin.setPos(0, 0, offsetZ)
+        self.knocked_pins[pin_index] = True
+        self.pins_knocked += 1
+        self.cTrav.addCollider(self.pin_colliders[pin_index], self.pinHandler)
+        self.knockDownPin(pin_index, normal)
 
+    def knockDownPin(self, pin_index, normal):
         projectedNormal = Vec3(normal.getX(), 0, normal.getZ())
         if projectedNormal.length() == 0:
             projectedNormal = Vec3(1, 0, 0)
@@ -415,28 +389,93 @@ class BowlingMechanics:
         rotationAxis = Vec3(-projectedNormal.getZ(), 0, projectedNormal.getX())
         rotationAxis.normalize()
 
-        # Create a quaternion representing rotation of 90 degrees about rotationAxis
-        quat = Quat()
-        quat.setFromAxisAngle(-90, rotationAxis)
-        # TODO: Implement linear & rotational collisions more realistically, update board use LerpPosQuat and
-        # other parallel combinations of intervals
-        knockDownSequence = Sequence(
-            LerpQuatInterval(rotationNode, 0.7, quat),
-        )
-        knockDownSequence.start()
+        # the pin turns 90 degrees about rotationAxis over KNOCKDOWN_TIME,
+        # advanced by physicsStep
+        # TODO: Implement linear & rotational collisions more realistically
+        self.pin_falls[pin_index] = PinFall(rotationAxis)
 
     def update(self, task):
         if not self.can_bowl and self.reset_timer == 0:
             self.reset_timer = globalClock.getFrameTime()
             taskMgr.doMethodLater(6.5, self.perform_reset, "resetTask")
 
-        self.cTrav.traverse(self.game.render)
+        # run as many fixed steps as the frame took, then show the state
+        # part way between the last two steps
+        self.physics_time += globalClock.getDt()
+        steps = 0
+        with profiler.section("physics"):
+            while self.physics_time >= PHYSICS_DT:
+                if steps == MAX_PHYSICS_STEPS:
+                    self.physics_time = 0.0
+                    break
+                self.physicsStep(PHYSICS_DT)
+                self.physics_time -= PHYSICS_DT
+                steps += 1
+        self.interpolate(self.physics_time / PHYSICS_DT)
         return task.cont
 
+    def physicsStep(self, dt):
+        """Advance the ball and falling pins by dt and handle their contacts"""
+        rolling = self.ball_time_left > 0
+        falling = False
+        if rolling:
+            move = min(dt, self.ball_time_left)
+            self.ball_prev_pos = Point3(self.ball_pos)
+            self.ball_pos = self.ball_pos + self.ball_velocity * move
+            self.ball_time_left -= move
+            # the collision test sweeps the ball from the previous step
+            self.ball.setPos(self.ball_prev_pos)
+            self.ball.setFluidPos(self.ball_pos)
+        elif self.ball_prev_pos != self.ball_pos:
+            # the ball has stopped: it no longer sweeps its last move, and
+            # interpolation leaves it where it is
+            self.ball_prev_pos = Point3(self.ball_pos)
+            self.ball.setPos(self.ball_pos)
+
+        for i, fall in enumerate(self.pin_falls):
+            self.pin_prev_quats[i] = self.pin_quats[i]
+            if fall is None:
+                continue
+            falling = True
+            fall.elapsed = min(fall.elapsed + dt, KNOCKDOWN_TIME)
+            quat = Quat()
+            quat.setFromAxisAngle(-90 * fall.elapsed / KNOCKDOWN_TIME, fall.axis)
+            self.pin_quats[i] = quat
+            self.pivots[i].setQuat(quat)
+            if fall.elapsed == KNOCKDOWN_TIME:
+                self.pin_falls[i] = None
+
+        # with nothing moving there is no new contact to find
+        if not (rolling or falling):
+            return
+
+        # the only "into" solids are the pins, so only the pin deck is walked
+        self.cTrav.traverse(self.pin_deck)
+        self.handler.sortEntries()
+        for entry in self.handler.entries:
+            self.handleBallPinCollision(entry)
+        self.pinHandler.sortEntries()
+        for entry in self.pinHandler.entries:
+            self.handlePinPinCollision(entry)
+        # a queue is only cleared by a traversal that has colliders for it,
+        # so empty both before the next roll can see stale contacts
+        self.handler.clearEntries()
+        self.pinHandler.clearEntries()
+
+    def interpolate(self, alpha):
+        """Place the ball and pins alpha of the way from the last step to the next"""
+        if not self.can_bowl:
+            self.ball.setPos(self.ball_prev_pos + (self.ball_pos - self.ball_prev_pos) * alpha)
+        for i, pivot in enumerate(self.pivots):
+            prev, quat = self.pin_prev_quats[i], self.pin_quats[i]
+            if prev != quat:
+                blended = prev * (1 - alpha) + quat * alpha
+                blended.normalize()
+                pivot.setQuat(blended)
+
     def perform_reset(self, task):
-        current_player = self.game_logic.current_player
-        self.game_logic.record_roll(self.pins_knocked)
-        full_reset = current_player != self.game_logic.current_player
+        # a new rack after a finished frame, or for a fill ball in the last one
+        full_reset = self.game_logic.record_roll(self.pins_knocked)
         self.reset_board(full_reset)
         self.reset_timer = 0
 
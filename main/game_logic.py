@@ -1,89 +1,214 @@
 #!/usr/bin/env python
-from dataclasses import dataclass
-from enum import Enum
-
-
-class PlayerTurn(Enum):
-    PLAYER_ONE = 1
-    PLAYER_TWO = 2
-
-
-@dataclass
-class Frame:
-    first_roll: int = 0
-    second_roll: int = 0
-    is_complete: bool = False
+from array import array
+from collections import deque
+
+# sent with (player index, frame_idx) whenever a roll changes a frame's score;
+# bonus rolls can also settle the two frames before frame_idx
+SCORE_CHANGED_EVENT = "score_changed"
+
+FRAMES = 10
+PINS = 10
+MAX_PLAYERS = 8
+
+
+class ScoreSheet:
+    """
+    One player's rolls and frame scores under standard ten-pin rules.
+
+    A strike scores 10 plus the next two balls and a spare 10 plus the next
+    one, so a frame's score is only known once those balls are in. Frames
+    waiting for bonus balls are kept in a short queue (at most two strikes
+    back) and settled in order as rolls arrive, which makes each roll O(1)
+    and keeps `cumulative` and `total` ready to read at any time. The last
+    frame gets fill balls after a strike or spare.
+    """
+
+    def __init__(self, frames=FRAMES):
+        self.frames = frames
+        # wide enough for any frame count: a game has up to 2 * frames + 1
+        # rolls and scores up to 30 * frames
+        self.rolls = array("B")
+        # index into rolls of the first ball of every started frame
+        self.frame_starts = array("I")
+        # running score through each frame, -1 until the frame is settled
+        self.cumulative = array("i", [-1]) * frames
+        # score through the last settled frame
+        self.total = 0
+
+        self.frame = 0
+        self.ball = 0
+        self.standing = PINS
+        # pins knocked down in the current frame, fill balls included
+        self.frame_pins = 0
+        # [frame index, score so far, bonus balls still needed], oldest first
+        self._unsettled = deque()
+
+    @property
+    def complete(self):
+        return self.frame >= self.frames
+
+    def roll(self, pins):
+        """
+        Record a ball that knocked down pins. Returns True when the next ball
+        is thrown at a full rack.
+        """
+        if self.complete:
+            raise ValueError("game is already complete")
+        if not 0 <= pins <= self.standing:
+            raise ValueError(f"{pins} pins knocked down with {self.standing} standing")
+
+        if self.ball == 0:
+            self.frame_starts.append(len(self.rolls))
+        self.rolls.append(pins)
+
+        # this ball is a bonus for earlier strikes and spares
+        if self._unsettled:
+            for unsettled in self._unsettled:
+                unsettled[1] += pins
+                unsettled[2] -= 1
+            self._settle()
+
+        self.standing -= pins
+        self.ball += 1
+        self.frame_pins += pins
+        frame_score = self.frame_pins
+
+        if self.frame < self.frames - 1:
+            if self.standing == 0:
+                # strike after one ball, spare after two
+                self._end_frame(frame_score, 2 if self.ball == 1 else 1)
+            elif self.ball == 2:
+                self._end_frame(frame_score, 0)
+        else:
+            # last frame: a strike or spare earns fill balls at a new rack
+            if self.ball == 3 or (self.ball == 2 and frame_score < PINS):
+                self._end_frame(frame_score, 0)
+            elif self.standing == 0:
+                self.standing = PINS
+
+        return self.standing == PINS
+
+    def _end_frame(self, score, bonus_balls):
+        self._unsettled.append([self.frame, score, bonus_balls])
+        self._settle()
+        self.frame += 1
+        self.ball = 0
+        self.standing = PINS
+        self.frame_pins = 0
+
+    def _settle(self):
+        # frames settle in order: a frame never waits longer than the next one
+        while self._unsettled and self._unsettled[0][2] == 0:
+            frame_idx, score, _ = self._unsettled.popleft()
+            self.total += score
+            self.cumulative[frame_idx] = self.total
+
+    def frame_rolls(self, frame_idx):
+        """Balls thrown in frame_idx so far"""
+        if frame_idx >= len(self.frame_starts):
+            return []
+        start = self.frame_starts[frame_idx]
+        if frame_idx + 1 < len(self.frame_starts):
+            return self.rolls[start:self.frame_starts[frame_idx + 1]].tolist()
+        return self.rolls[start:].tolist()
+
+
+def score_rolls(rolls, frames=FRAMES):
+    """
+    Running frame scores for a list of rolls, recomputed from scratch. Only
+    frames whose score is known are returned. ScoreSheet gives the same
+    result incrementally; this is the straightforward reference for it.
+    """
+    scores = []
+    total = 0
+    i = 0
+    for frame in range(frames):
+        if frame == frames - 1:
+            last = rolls[i:i + 3]
+            if len(last) < 2 or (last[0] + last[1] >= PINS and len(last) < 3):
+                break
+            total += sum(last) if last[0] + last[1] >= PINS else last[0] + last[1]
+        elif i < len(rolls) and rolls[i] == PINS:
+            if len(rolls) < i + 3:
+                break
+            total += PINS + rolls[i + 1] + rolls[i + 2]
+            i += 1
+        elif len(rolls) < i + 2:
+            break
+        elif rolls[i] + rolls[i + 1] == PINS:
+            if len(rolls) < i + 3:
+                break
+            total += PINS + rolls[i + 2]
+            i += 2
+        else:
+            total += rolls[i] + rolls[i + 1]
+            i += 2
+        scores.append(total)
+    return scores
 
 
 class GameLogic:
-    def __init__(self, options):
-        # Initialize player scores and game state
-        self.current_player = PlayerTurn.PLAYER_ONE
+    def __init__(self, options, messenger=None, frames=FRAMES, players=2):
+        if not 1 <= players <= MAX_PLAYERS:
+            raise ValueError(f"{players} players, expected 1 to {MAX_PLAYERS}")
+
+        # Initialize player scores and game state; players are numbered
+        # from 0 and bowl in that order every round
+        self.num_players = players
+        self.current_player = 0
         self.current_round = 1
-        self.max_rounds = 3
+        self.max_rounds = frames
 
         self.enable_print = options.enable_print
+        # when set, record_roll sends SCORE_CHANGED_EVENT through it
+        self.messenger = messenger
 
-        # Score tracking for both players
-        self.scores = {
-            PlayerTurn.PLAYER_ONE: [Frame() for _ in range(self.max_rounds)],
-            PlayerTurn.PLAYER_TWO: [Frame() for _ in range(self.max_rounds)],
-        }
+        # one score sheet per player
+        self.scores = [ScoreSheet(frames) for _ in range(players)]
 
-        self.current_roll = 1
         self.game_complete = False
 
-    def record_roll(self, pins_knocked: int) -> None:
-        """Records the number of pins knocked down for current player's roll"""
-        # should find a way to take the difference between the pins knocked in this round vs the pins
-        # knocked in the previous round
+    def record_roll(self, pins_knocked: int) -> bool:
+        """
+        Records the current player's roll. pins_knocked counts every pin down
+        on the rack, including ones from an earlier ball of the frame.
+        Returns True when the next ball needs a full rack.
+        """
         if self.enable_print: print(f"Recording Roll with {pins_knocked} pins knocked")
-
-        if self.enable_print: print(self.current_round)
-        current_frame = self.scores[self.current_player][self.current_round - 1]
-
-        if self.current_roll == 1:
-            current_frame.first_roll = pins_knocked
-            if pins_knocked == 10:
-                current_frame.is_complete = True
-                self.advance_turn()
-            else:
-                self.current_roll = 2
-        else:
-            current_frame.second_roll = pins_knocked - current_frame.first_roll
-            current_frame.is_complete = True
+        if self.game_complete:
+            if self.enable_print: print("game is complete, roll ignored")
+            return True
+
+        player = self.current_player
+        sheet = self.scores[player]
+        frame_idx = sheet.frame
+        new_rack = sheet.roll(pins_knocked - (PINS - sheet.standing))
+        if sheet.frame != frame_idx:
             self.advance_turn()
 
-        if self.enable_print: print("recorded roll: here are the stats for this player")
-        if self.enable_print: print(self.scores[self.current_player])
+        if self.enable_print: print(f"recorded roll: player {player + 1} rolls {sheet.rolls.tolist()}, total {sheet.total}")
+
+        if self.messenger is not None:
+            self.messenger.send(SCORE_CHANGED_EVENT, [player, frame_idx])
+        return new_rack
 
     def advance_turn(self) -> None:
         """Advances the game to the next player or round"""
-        self.current_roll = 1
-
-        if self.current_player == PlayerTurn.PLAYER_ONE:
-            self.current_player = PlayerTurn.PLAYER_TWO
-        else:
-            self.current_player = PlayerTurn.PLAYER_ONE
+        self.current_player = (self.current_player + 1) % self.num_players
+        if self.current_player == 0:
             self.current_round += 1
 
         if self.current_round > self.max_rounds:
             self.game_complete = True
 
-    def get_frame_score(self, player: PlayerTurn, frame_idx: int) -> int:
-        """Calculates score for a specific frame"""
-        # FUNCTION IS BUGGY REMOVE IT
-        frame = self.scores[player][frame_idx]
-        return frame.first_roll + frame.second_roll
-
-    def get_current_score(self, player: PlayerTurn) -> int:
-        """Calculates total score for a player"""
-        # ONLY TAKES INTO ACCOUNT FRAME SECOND SCORE LOOK MORE DEEPLY INTO THIS
-        total = 0
-        for frame in self.scores[player]:
-            if frame.is_complete:
-                total += frame.first_roll + frame.second_roll
-        return total
+    def get_frame_score(self, player: int, frame_idx: int):
+        """Running score through a frame, or None while it waits for bonus balls"""
+        score = self.scores[player].cumulative[frame_idx]
+        return None if score < 0 else score
+
+    def get_current_score(self, player: int) -> int:
+        """Score through the player's last settled frame"""
+        return self.scores[player].total
 
     def is_game_complete(self) -> bool:
         return self.game_complete
@@ -15,10 +15,9 @@ class IntroScreen:
         self.enable_print = options.enable_print
         self.disable_speech = options.disable_speech
 
-        # Initialize player names
-        self.p1_name = ""
-        self.p2_name = ""
-        self.current_player = 1
+        # Initialize player names, asked for in turn
+        self.num_players = options.num_players
+        self.player_names = []
 
         # Create black background
         self.setup_background()
@@ -27,8 +26,7 @@ class IntroScreen:
 
         # If speech is disabled, skip naming
         if self.disable_speech:
-            self.p1_name = "Player 1"
-            self.p2_name = "Player 2"
+            self.player_names = [f"Player {i + 1}" for i in range(self.num_players)]
             self.start_game()
 
     def setup_background(self):
@@ -165,12 +163,12 @@ class IntroScreen:
 
     def confirm_name(self):
         name = self.name_display.getText().replace("Heard: ", "")
-        if self.current_player == 1:
-            self.p1_name = name
-            self.current_player = 2
-            self.prompt.setText("Player 2: Press Record to Say Your Name")
+        self.player_names.append(name)
+        if len(self.player_names) < self.num_players:
+            self.prompt.setText(
+                f"Player {len(self.player_names) + 1}: Press Record to Say Your Name"
+            )
         else:
-            self.p2_name = name
             self.status.setText("Starting game...")
             self.game.taskMgr.doMethodLater(1.5, self.start_game, "startGame")
             return
@@ -211,8 +209,7 @@ class IntroScreen:
 
     def start_game(self, task=None):
         self.cleanup()
-        self.game.p1_name = self.p1_name
-        self.game.p2_name = self.p2_name
+        self.game.player_names = self.player_names
         self.game.start_game()
         if task:
             return task.done
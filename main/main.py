@@ -1,12 +1,24 @@
 #!/usr/bin/env python
+import time
+
+# measured from here to the first rendered game frame
+STARTUP_TIME = time.perf_counter()
+
 from direct.showbase.ShowBase import ShowBase
 from direct.gui.OnscreenImage import OnscreenImage
 from panda3d.core import loadPrcFile, TransparencyAttrib
 import simplepbr
 from bowling_mechanics import BowlingMechanics
-import socket, threading, subprocess, atexit, time
+from game_logic import MAX_PLAYERS
+from profiler import ProfilerOverlay, profiler
+from supervisor import CHECK_INTERVAL, Supervisor
+import subprocess, atexit
+
+import sys, os
 
-import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sensor_server import SensorServer, ImuChannel, PositionChannel
+from sensor_io.shm_ring import ShmRing
 
 loadPrcFile("../config/conf.prc")
 
@@ -18,6 +30,17 @@ class Options:
         self.disable_speech = False
         self.enable_print = False
         self.enable_print_power_mag = False
+        self.ble_notify = False
+        self.shared_memory = False
+        # record sensor data to ../recordings, or replay a recording
+        # instead of running the IMU / camera process
+        self.record = False
+        self.replay_imu = None
+        self.replay_camera = None
+        self.num_players = 2
+        self.num_frames = 3
+        # set by simulate.py, which runs without a window
+        self.headless = False
 
         # Handle command line arguments
         if len(sys.argv) > 1:
@@ -31,6 +54,24 @@ class Options:
             self.enable_print = True
         if "-m" in sys.argv:
             self.enable_print_power_mag = True
+        if "-n" in sys.argv:
+            self.ble_notify = True
+        if "-shm" in sys.argv:
+            self.shared_memory = True
+        if "-rec" in sys.argv:
+            self.record = True
+        if "-ri" in sys.argv:
+            self.replay_imu = sys.argv[sys.argv.index("-ri") + 1]
+        if "-rc" in sys.argv:
+            self.replay_camera = sys.argv[sys.argv.index("-rc") + 1]
+        if "-np" in sys.argv:
+            self.num_players = int(sys.argv[sys.argv.index("-np") + 1])
+            if not 1 <= self.num_players <= MAX_PLAYERS:
+                sys.exit(f"-np must be between 1 and {MAX_PLAYERS}")
+        if "-nf" in sys.argv:
+            self.num_frames = int(sys.argv[sys.argv.index("-nf") + 1])
+            if self.num_frames < 1:
+                sys.exit("-nf must be at least 1")
 
 
 class BowlingGame(ShowBase):
@@ -41,8 +82,15 @@ class BowlingGame(ShowBase):
         # Store options and initialize name variables
         self.options = options
         self.enable_print = options.enable_print
-        self.p1_name = ""
-        self.p2_name = ""
+        self.player_names = []
+
+        # sensors start while the intro screen runs, so they are usually
+        # ready by the time the names are in
+        self.start_sensors()
+
+        # cleaning up processes and sockets
+        self.accept("exit", self.cleanup)
+        atexit.register(self.cleanup)
 
         # Start with intro screen
         from intro_screen import IntroScreen
@@ -51,6 +99,8 @@ class BowlingGame(ShowBase):
 
     def start_game(self):
         """Called after intro screen completes"""
+        self.game_setup_time = time.perf_counter()
+
         # setup camera
         self.disable_mouse()
         self.camera.setPos(-30, -10, 0)
@@ -64,155 +114,156 @@ class BowlingGame(ShowBase):
         )
         crosshairs.setTransparency(TransparencyAttrib.MAlpha)
 
-        # SETTING UP SOCKET CONNECTION AND GAME
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind(("localhost", 8080))
-        self.server_socket.listen(1)
-        if self.enable_print:
-            print("setting up imu socket")
+        # initialize the game
+        self.bowling_mechanics = BowlingMechanics(self, self.options)
 
+        # samples that arrived during the intro are stale: a swing made
+        # while naming players must not roll the first ball
+        self.taskMgr.remove("sensorIntroDrainTask")
+        self.sensor_server.drain()
         if self.enable_print:
-            self.ble_process = subprocess.Popen(["python", "../ble/central.py", "-p"])
-        else:
-            self.ble_process = subprocess.Popen(["python", "../ble/central.py"])
+            waiting = [name for name in self.supervisor.workers if name not in self.sensor_server.ready]
+            if waiting:
+                print(f"game started before sensors were ready: {', '.join(waiting)}")
+
+        # hand samples received since the last frame to the game, before updateTask
+        self.taskMgr.add(
+            profiler.wrap("sensorDispatchTask", self.dispatch_sensor_events),
+            "sensorDispatchTask",
+            sort=-1,
+        )
 
-        self.socket_thread = threading.Thread(target=self.accept_connections)
-        self.socket_thread.daemon = True
-        self.socket_thread.start()
+        # F3 shows frame and subsystem times, F4 writes them to ../profiles
+        # as a Chrome trace and per-frame JSON, F5 connects to PStats
+        profiler.enable_print = self.enable_print
+        profiler.install(self)
+        self.profiler_overlay = ProfilerOverlay(self, profiler)
+        self.accept("f3", self.profiler_overlay.toggle)
+        self.accept("f4", profiler.dump)
+        self.accept("f5", profiler.toggle_pstats)
+
+        # report startup time once the first game frame is drawn
+        self.taskMgr.add(self.report_first_frame, "firstFrameTask")
+
+    def start_sensors(self):
+        # one I/O thread serves the IMU (8080) and position (8081) listeners;
+        # it listens before the processes start, so they connect first time.
+        # With -shm the processes write to shared memory rings instead,
+        # which the render thread reads in drain()
+        self.sensor_server = SensorServer(self.enable_print, profiler)
+        sensor_args = {ImuChannel.name: [], PositionChannel.name: []}
+        self.sensor_rings = []
+        if self.options.shared_memory:
+            for channel in (ImuChannel, PositionChannel):
+                ring = ShmRing.create(f"bowling-{channel.name}-{os.getpid()}")
+                self.sensor_server.attach_ring(ring, channel)
+                self.sensor_rings.append(ring)
+                sensor_args[channel.name] = ["--shm", ring.name]
+        else:
+            self.sensor_server.listen(8080, ImuChannel)
+            self.sensor_server.listen(8081, PositionChannel)
+        self.sensor_server.start()
         if self.enable_print:
-            print("thread started for imu")
+            print("sensor server listening for imu and camera")
+
+        # both processes start at once under a supervisor, which restarts
+        # them if they exit or stop sending; each sends Ready when it can
+        # deliver data, and report_sensor_ready logs how long that took
+        self.sensor_ready_times = {}
+        self.supervisor = Supervisor(self.sensor_server, self.enable_print)
 
-        # Set up position tracking
-        self.position_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.position_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.position_socket.bind(("localhost", 8081))
-        self.position_socket.listen(1)
+        ble_args = ["python", "../ble/central.py"]
         if self.enable_print:
-            print("setting up camera socket")
-
-        self.camera_process = subprocess.Popen(
-            [
-                "python",
-                "../position_tracker/position_tracker.py",
-                "--prototxt",
-                "../position_tracker/deploy.prototxt",
-                "--model",
-                "../position_tracker/res10_300x300_ssd_iter_140000.caffemodel",
-            ]
-        )
+            ble_args.append("-p")
+        if self.options.ble_notify:
+            ble_args.append("-n")
+        camera_args = [
+            "python",
+            "../position_tracker/position_tracker.py",
+            "--prototxt",
+            "../position_tracker/deploy.prototxt",
+            "--model",
+            "../position_tracker/res10_300x300_ssd_iter_140000.caffemodel",
+        ]
 
-        self.position_socket_thread = threading.Thread(
-            target=self.accept_position_connections
-        )
-        self.position_socket_thread.daemon = True
-        self.position_socket_thread.start()
+        # -ri / -rc replay a recording in place of a sensor process, and
+        # -rec has the real processes record what they send
+        replays = {ImuChannel.name: self.options.replay_imu, PositionChannel.name: self.options.replay_camera}
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        for name, args in ((ImuChannel.name, ble_args), (PositionChannel.name, camera_args)):
+            if replays[name]:
+                args = ["python", "../sensor_io/replay.py", replays[name], "--hold"]
+            elif self.options.record:
+                args = args + ["--record", f"../recordings/{name}-{stamp}.brec"]
+            self.supervisor.add(name, args + sensor_args[name])
+        self.supervisor.start()
 
-        # initialize the game
-        self.bowling_mechanics = BowlingMechanics(self, self.options)
+        # until the game starts, samples are read (so rings do not fill up
+        # and the supervisor hears from the sensors) and thrown away
+        self.taskMgr.add(self.discard_sensor_events, "sensorIntroDrainTask")
 
-        # cleaning up processes and sockets
-        self.accept("exit", self.cleanup)
-        atexit.register(self.cleanup)
+        self.taskMgr.add(self.report_sensor_ready, "sensorReadyTask")
+        self.taskMgr.doMethodLater(CHECK_INTERVAL, self.supervise_sensors, "sensorSuperviseTask")
+        # F6 prints each worker's state, restarts, throughput and losses
+        self.accept("f6", lambda: print(self.supervisor.report()))
+
+    def report_sensor_ready(self, task):
+        """Record each sensor's time from launch to Ready, until all have reported"""
+        for name, worker in self.supervisor.workers.items():
+            if name in self.sensor_ready_times or name not in self.sensor_server.ready:
+                continue
+            received, ready = self.sensor_server.ready[name]
+            launched = worker.started_at
+            self.sensor_ready_times[name] = received - launched
+            if self.enable_print:
+                print(f"{name} ready {received - launched:.2f} s after launch "
+                    f"(process startup {ready.startup:.2f} s)")
+        if len(self.sensor_ready_times) == len(self.supervisor.workers):
+            return task.done
+        return task.cont
+
+    def discard_sensor_events(self, task):
+        self.sensor_server.drain()
+        return task.cont
+
+    def supervise_sensors(self, task):
+        self.supervisor.check()
+        return task.again
 
     def cleanup(self):
         if self.enable_print:
             print("cleaning up")
-        if hasattr(self, "ble_process"):
-            self.ble_process.terminate()
-            if self.enable_print:
-                print("killed ble process")
-        if hasattr(self, "camera_process"):
-            self.camera_process.terminate()
-            if self.enable_print:
-                print("killed camera process")
-        if hasattr(self, "position_socket"):
-            try:
-                self.position_socket.shutdown(socket.SHUT_RDWR)
-                self.position_socket.close()
-            except:
-                pass
-            if self.enable_print:
-                print("killed position socket")
-        if hasattr(self, "server_socket"):
-            try:
-                self.server_socket.shutdown(socket.SHUT_RDWR)
-                self.server_socket.close()
-            except:
-                pass
+        if hasattr(self, "supervisor"):
+            self.taskMgr.remove("sensorSuperviseTask")
+            self.supervisor.stop()
+            del self.supervisor
             if self.enable_print:
-                print("killed server socket")
-        if hasattr(self, "client_socket"):
-            try:
-                self.client_socket.shutdown(socket.SHUT_RDWR)
-                self.client_socket.close()
-            except:
-                pass
+                print("stopped sensor processes")
+        if hasattr(self, "sensor_server"):
+            self.taskMgr.remove("sensorDispatchTask")
+            self.taskMgr.remove("sensorIntroDrainTask")
+            self.sensor_server.stop()
+            del self.sensor_server
             if self.enable_print:
-                print("killed client socket")
+                print("closed sensor sockets")
+        if hasattr(self, "sensor_rings"):
+            for ring in self.sensor_rings:
+                ring.close()
+            del self.sensor_rings
 
-    def accept_connections(self):
+    def report_first_frame(self, task):
+        # task.frame is 1 once the frame this task was added in has rendered
+        if task.frame < 1:
+            return task.cont
         if self.enable_print:
-            print("Waiting for BLE client connection...")
-        while True:
-            try:
-                self.client_socket, addr = self.server_socket.accept()
-                if self.enable_print:
-                    print(f"Connected to BLE client at {addr}")
-                while True:
-                    try:
-                        data = self.client_socket.recv(1024).decode()
-                        if not data:
-                            if self.enable_print:
-                                print("Client disconnected")
-                            break
-                        accel_x, accel_y, accel_z = map(float, data.split(","))
-                        # if self.enable_print: print("from main", accel_x, accel_y, accel_z)
-                        self.messenger.send("accel_data", [accel_x, accel_y, accel_z])
-                    except Exception as e:
-                        if self.enable_print:
-                            print(f"Error receiving data: {e}")
-                        break
-
-                self.client_socket.close()
-            except Exception as e:
-                if self.enable_print:
-                    print(f"Socket connection error: {e}")
-                time.sleep(1)
-                break
+            now = time.perf_counter()
+            print(f"first game frame {1000 * (now - self.game_setup_time):.0f} ms after intro, "
+                f"{now - STARTUP_TIME:.2f} s after launch")
+        return task.done
 
-        if self.enable_print:
-            print("Done accepting IMU Data")
-
-    def accept_position_connections(self):
-        if self.enable_print:
-            print("Waiting for position tracker connection...")
-        while True:
-            try:
-                self.position_client, addr = self.position_socket.accept()
-                if self.enable_print:
-                    print(f"Connected to position tracker at {addr}")
-                while True:
-                    try:
-                        data = self.position_client.recv(1024).decode()
-                        if not data:
-                            if self.enable_print:
-                                print("Position tracker disconnected")
-                            break
-                        distance = float(data)
-                        self.messenger.send("position_data", [distance])
-                    except:
-                        pass
-                        # print(f"Error receiving position data: {e}")
-                        # accept exception as e
-                self.position_client.close()
-            except Exception as e:
-                if self.enable_print:
-                    print(f"Position socket connection error: {e}")
-                time.sleep(1)
-                break
-        if self.enable_print:
-            print("Done accepting OpenCV Data")
+    def dispatch_sensor_events(self, task):
+        self.sensor_server.dispatch(self.messenger)
+        return task.cont
 
 
 options = Options()
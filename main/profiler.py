@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from panda3d.core import PStatClient, PStatCollector
+
+# frames kept for the overlay and the frames dump (10 s at 60 fps)
+FRAME_HISTORY = 600
+# timed calls kept for the Chrome trace
+TRACE_HISTORY = 20000
+# frame time the overlay compares against
+FRAME_BUDGET = 1 / 60
+# seconds between overlay redraws, and the window its averages cover
+OVERLAY_PERIOD = 0.25
+OVERLAY_WINDOW = 1.0
+
+
+class FrameSample:
+    """One rendered frame: when it ended, how long it took, and the time spent in each timed section"""
+
+    __slots__ = ("end", "duration", "sections")
+
+    def __init__(self, end, duration, sections):
+        self.end = end
+        self.duration = duration
+        self.sections = sections
+
+
+class Section:
+    """Times a with block into the profiler"""
+
+    __slots__ = ("profiler", "name", "collector", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.collector = profiler.collector(name)
+
+    def __enter__(self):
+        self.collector.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.collector.stop()
+        self.profiler.record(self.name, self.start, end - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Times tasks, event handlers and socket reads by name. Calls can be
+    recorded from any thread: they go to a deque (append/popleft are
+    atomic, so no lock is needed) which end_frame() drains once per frame
+    into a FrameSample with the time spent per name. The last
+    FRAME_HISTORY frames and TRACE_HISTORY calls are kept in ring buffers,
+    so memory stays bounded however long a session runs.
+
+    Every name also gets a PStats collector, so the same sections show up
+    in PStats while a client is connected. Nothing is recorded until the
+    profiler is enabled, which install() does.
+    """
+
+    def __init__(self, frames=FRAME_HISTORY, events=TRACE_HISTORY, enable_print=False):
+        self.enabled = False
+        self.enable_print = enable_print
+        self.frames = deque(maxlen=frames)
+        # (name, thread id, start, duration) of every recorded call
+        self.events = deque(maxlen=events)
+        self._pending = deque()
+        self._collectors = {}
+        self._frame_start = None
+        # thread id -> name, for the trace
+        self.thread_names = {}
+
+    def collector(self, name):
+        if name not in self._collectors:
+            self._collectors[name] = PStatCollector(f"App:Bowling:{name}")
+        return self._collectors[name]
+
+    def record(self, name, start, duration):
+        if self.enabled:
+            tid = threading.get_ident()
+            if tid not in self.thread_names:
+                self.thread_names[tid] = threading.current_thread().name
+            self._pending.append((name, tid, start, duration))
+
+    def section(self, name):
+        """with profiler.section(name): ... times the block"""
+        return Section(self, name)
+
+    def wrap(self, name, func):
+        """func, timed under name on every call; used for tasks and event handlers"""
+        collector = self.collector(name)
+
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            collector.start()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                collector.stop()
+                self.record(name, start, end - start)
+
+        timed.__name__ = getattr(func, "__name__", name)
+        return timed
+
+    def end_frame(self, now=None):
+        """Close the current frame: move its calls into a FrameSample"""
+        if now is None:
+            now = time.perf_counter()
+        sections = defaultdict(float)
+        while True:
+            try:
+                event = self._pending.popleft()
+            except IndexError:
+                break
+            sections[event[0]] += event[3]
+            self.events.append(event)
+        if self._frame_start is not None:
+            self.frames.append(FrameSample(now, now - self._frame_start, dict(sections)))
+        self._frame_start = now
+
+    def install(self, base, sort=55):
+        """
+        Enable recording and close a frame after each render; igLoop,
+        which renders, runs at sort 50.
+        """
+        self.enabled = True
+        self.thread_names[threading.get_ident()] = "render"
+        base.taskMgr.add(self._frame_task, "profilerFrameTask", sort=sort)
+
+    def _frame_task(self, task):
+        self.end_frame()
+        return task.cont
+
+    def summary(self, window=None):
+        """
+        (frame stats, {name: stats}) over the last window seconds of frames,
+        or all kept frames. Stats are (mean, max) in seconds per frame.
+        """
+        frames = list(self.frames)
+        if window is not None and frames:
+            cutoff = frames[-1].end - window
+            frames = [frame for frame in frames if frame.end >= cutoff]
+        if not frames:
+            return (0.0, 0.0), {}
+        durations = [frame.duration for frame in frames]
+        totals, peaks = defaultdict(float), defaultdict(float)
+        for frame in frames:
+            for name, seconds in frame.sections.items():
+                totals[name] += seconds
+                peaks[name] = max(peaks[name], seconds)
+        sections = {name: (totals[name] / len(frames), peaks[name]) for name in totals}
+        return (sum(durations) / len(durations), max(durations)), sections
+
+    def chrome_trace(self):
+        """
+        The kept calls and frames in the Chrome trace event format, for
+        chrome://tracing or https://ui.perfetto.dev
+        """
+        pid = os.getpid()
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            # copied first, the I/O thread may add a name meanwhile
+            for tid, name in list(self.thread_names.items())
+        ]
+        render_tid = next(
+            (tid for tid, name in self.thread_names.items() if name == "render"), 0
+        )
+        for frame in self.frames:
+            trace.append({
+                "name": "frame", "cat": "frame", "ph": "X", "pid": pid, "tid": render_tid,
+                "ts": 1e6 * (frame.end - frame.duration), "dur": 1e6 * frame.duration,
+            })
+        for name, tid, start, duration in self.events:
+            trace.append({
+                "name": name, "cat": "section", "ph": "X", "pid": pid, "tid": tid,
+                "ts": 1e6 * start, "dur": 1e6 * duration,
+            })
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def frames_json(self):
+        """Per-frame times in ms, oldest first"""
+        return [
+            {
+                "end": frame.end,
+                "frame_ms": 1000 * frame.duration,
+                "sections_ms": {name: 1000 * s for name, s in frame.sections.items()},
+            }
+            for frame in self.frames
+        ]
+
+    def dump(self, directory="../profiles"):
+        """Write trace-<time>.json and frames-<time>.json; returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        paths = []
+        for kind, data in (("trace", self.chrome_trace()), ("frames", self.frames_json())):
+            path = os.path.join(directory, f"{kind}-{stamp}.json")
+            with open(path, "w") as f:
+                json.dump(data, f)
+            paths.append(path)
+        if self.enable_print:
+            print(f"profile written to {', '.join(paths)}")
+        return paths
+
+    def toggle_pstats(self, host="localhost"):
+        """Connect to a running PStats server, or disconnect from it"""
+        if PStatClient.isConnected():
+            PStatClient.disconnect()
+            if self.enable_print: print("PStats disconnected")
+            return False
+        connected = PStatClient.connect(host)
+        if self.enable_print: print(f"PStats {'connected' if connected else 'connection failed'}")
+        return connected
+
+
+class ProfilerOverlay:
+    """
+    Text in the top-left corner with the frame time and the mean/max time
+    of each section over the last OVERLAY_WINDOW seconds, slowest first.
+    Hidden until toggled; it is only redrawn while shown.
+    """
+
+    def __init__(self, base, profiler):
+        from direct.gui.OnscreenText import OnscreenText
+        from panda3d.core import TextNode
+
+        self.base = base
+        self.profiler = profiler
+        self.text = OnscreenText(
+            parent=base.a2dTopLeft,
+            pos=(0.05, -0.1),
+            scale=0.04,
+            fg=(1, 1, 0.6, 1),
+            bg=(0, 0, 0, 0.6),
+            align=TextNode.ALeft,
+            mayChange=True,
+        )
+        self.text.hide()
+        self.visible = False
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible:
+            self.text.show()
+            self.base.taskMgr.add(self._update_task, "profilerOverlayTask")
+        else:
+            self.text.hide()
+            self.base.taskMgr.remove("profilerOverlayTask")
+
+    def _update_task(self, task):
+        self.text.setText(self.format())
+        task.delayTime = OVERLAY_PERIOD
+        return task.again
+
+    def format(self):
+        (mean, peak), sections = self.profiler.summary(OVERLAY_WINDOW)
+        lines = [
+            f"frame {1000 * mean:5.1f} ms  max {1000 * peak:5.1f}  "
+            f"budget {1000 * FRAME_BUDGET:.1f}"
+        ]
+        for name, (section_mean, section_peak) in sorted(
+            sections.items(), key=lambda item: -item[1][0]
+        ):
+            over = " !" if section_peak > FRAME_BUDGET else ""
+            lines.append(
+                f"{name:<20} {1000 * section_mean:6.2f} {1000 * section_peak:6.2f}{over}"
+            )
+        return "\n".join(lines)
+
+
+# shared by main.py and the modules it times, like globalClock and taskMgr
+profiler = Profiler()
@@ -1,19 +1,110 @@
 #!/usr/bin/env python
-from direct.gui.OnscreenText import OnscreenText
+from dataclasses import dataclass
+
 from direct.showbase.ShowBaseGlobal import aspect2d
 
-from game_logic import PlayerTurn
+from game_logic import PINS, SCORE_CHANGED_EVENT
+from profiler import profiler
 
-from direct.gui.OnscreenImage import OnscreenImage
 from panda3d.core import (
     TransparencyAttrib,
     CardMaker,
-    TransformState,
-    TextureStage,
     TextNode,
 )
-from panda3d.core import Point3, Vec3
-import speech_recognition as sr
+
+# board area in aspect2d units, sized to fit a 4:3 window
+BOARD_LEFT, BOARD_RIGHT, BOARD_TOP = -1.3, 1.3, 0.95
+NAME_WIDTH = 0.5
+TOTAL_WIDTH = 0.25
+HEADER_HEIGHT = 0.08
+# rows shrink once the players no longer fit in this height
+MAX_ROWS_HEIGHT = 0.82
+MAX_ROW_HEIGHT = 0.13
+MAX_TEXT_SCALE = 0.05
+# gap between neighbouring boxes
+BOX_MARGIN = 0.01
+
+
+def roll_marks(rolls):
+    """Scoresheet marks for a frame's balls: X strike, / spare, - miss"""
+    marks = []
+    standing = PINS
+    for pins in rolls:
+        if pins == standing:
+            marks.append("X" if standing == PINS else "/")
+        else:
+            marks.append(str(pins) if pins else "-")
+        standing -= pins
+        if standing == 0:
+            standing = PINS
+    return marks
+
+
+@dataclass
+class ScoreboardLayout:
+    """
+    Positions of every scoreboard element, worked out from the number of
+    players (rows) and frames (columns) so that up to MAX_PLAYERS rows and
+    ten frames fit on screen.
+    """
+
+    players: int
+    frames: int
+    frame_width: float
+    row_height: float
+    text_scale: float
+
+    @classmethod
+    def generate(cls, players, frames):
+        frame_width = (BOARD_RIGHT - BOARD_LEFT - NAME_WIDTH - TOTAL_WIDTH) / frames
+        row_height = min(MAX_ROW_HEIGHT, MAX_ROWS_HEIGHT / players)
+        text_scale = min(MAX_TEXT_SCALE, 0.4 * row_height, 0.3 * frame_width)
+        return cls(players, frames, frame_width, row_height, text_scale)
+
+    def frame_left(self, frame_idx):
+        return BOARD_LEFT + NAME_WIDTH + frame_idx * self.frame_width
+
+    def row_top(self, player):
+        return BOARD_TOP - HEADER_HEIGHT - player * self.row_height
+
+    @property
+    def bottom(self):
+        return self.row_top(self.players) - BOX_MARGIN
+
+    def header_pos(self):
+        """(label, x, z) of the column headings"""
+        z = BOARD_TOP - 0.7 * HEADER_HEIGHT
+        yield "PLAYER", BOARD_LEFT + NAME_WIDTH / 2, z
+        for i in range(self.frames):
+            yield str(i + 1), self.frame_left(i) + self.frame_width / 2, z
+        yield "Total", BOARD_RIGHT - TOTAL_WIDTH / 2, z
+
+    def name_pos(self, player):
+        return BOARD_LEFT + NAME_WIDTH / 2, self.row_top(player) - 0.6 * self.row_height
+
+    def cell_pos(self, player, frame_idx):
+        """(x, z) of a frame's first ball, second ball and running score"""
+        left, top = self.frame_left(frame_idx), self.row_top(player)
+        w, h = self.frame_width, self.row_height
+        return [
+            (left + 0.3 * w, top - 0.4 * h),
+            (left + 0.7 * w, top - 0.4 * h),
+            (left + 0.5 * w, top - 0.85 * h),
+        ]
+
+    def total_pos(self, player):
+        return BOARD_RIGHT - TOTAL_WIDTH / 2, self.row_top(player) - 0.6 * self.row_height
+
+    def boxes(self):
+        """(left, right, bottom, top) of every name, frame and total box"""
+        for player in range(self.players):
+            top = self.row_top(player) - BOX_MARGIN
+            bottom = self.row_top(player + 1)
+            yield BOARD_LEFT + BOX_MARGIN, BOARD_LEFT + NAME_WIDTH - BOX_MARGIN, bottom, top
+            for i in range(self.frames):
+                left = self.frame_left(i)
+                yield left + BOX_MARGIN, left + self.frame_width, bottom, top
+            yield BOARD_RIGHT - TOTAL_WIDTH + BOX_MARGIN, BOARD_RIGHT - BOX_MARGIN, bottom, top
 
 
 class Scoreboard:
@@ -22,192 +113,121 @@ class Scoreboard:
         self.game_logic = game_logic
         self.enable_print = options.enable_print
 
-        self.p1_frames = []
-        self.p2_frames = []
-        self.p1_total = None
-        self.p2_total = None
-
         # Get names from game instance
-        self.p1_name = self.game.p1_name
-        self.p2_name = self.game.p2_name
+        self.player_names = self.game.player_names
+
+        # one row per player, one column per frame
+        self.layout = ScoreboardLayout.generate(
+            len(self.game_logic.scores), self.game_logic.max_rounds
+        )
+        self.frames = []
+        self.totals = []
 
         self.setup_scoreboard()
-        self.game.taskMgr.add(self.update_scoreboard, "scoreboard_update")
-        self.displayPlayerNames()
-
-    ### test this function
-
-    def displayPlayerNames(self):
-        positions = {
-            "p1": (-0.7, 0.77),
-            "p2": (-0.7, 0.65),
-        }
-        for p, name in zip(["p1", "p2"], [self.p1_name, self.p2_name]):
-            text = TextNode(f"{p} name")
-            text.setText(name)
-            text.setAlign(TextNode.ACenter)
-            text.setTextColor(0, 0, 0, 1)
-            text_np = aspect2d.attachNewNode(text)
-            text_np.setPos(positions[p][0], 0, positions[p][1])
-            text_np.setScale(0.05)
-
-    ##### end of testing
+        # cells are redrawn when GameLogic reports a change, not every frame
+        self.refresh()
+        self.game.accept(SCORE_CHANGED_EVENT, profiler.wrap("score_changed", self.on_score_changed))
+
+    def make_text(self, parent, name, pos, text="", static=False):
+        """
+        Centered black text at pos. Static text is attached as generated
+        geometry, which can be flattened together with the board.
+        """
+        text_node = TextNode(name)
+        text_node.setText(text)
+        text_node.setAlign(TextNode.ACenter)
+        text_node.setTextColor(0, 0, 0, 1)
+        text_np = parent.attachNewNode(text_node.generate() if static else text_node)
+        text_np.setPos(pos[0], 0, pos[1])
+        text_np.setScale(self.layout.text_scale)
+        return text_node
 
     def setup_scoreboard(self):
-        # setup the png of the scoreboard, this code is a bit messy but worked for our purposes
         if self.enable_print:
-            print("setting up scoreboard")
+            print(f"setting up scoreboard for {self.layout.players} players, {self.layout.frames} frames")
+        layout = self.layout
+        self.board = aspect2d.attachNewNode("scoreboard")
+        self.board.setTransparency(TransparencyAttrib.MAlpha)
+
+        # background, boxes, headings and names never change: they are
+        # built once and flattened into a few Geoms
+        static = self.board.attachNewNode("static")
+        static.setBin("fixed", 0)
         cm = CardMaker("scoreboardCard")
-        cm.setFrame(5.5, 0, 15, -15)
-        scorecard = self.game.render.attachNewNode(cm.generate())
-        scorecard.setTexTransform(
-            TextureStage.getDefault(), TransformState.makeHpr((90, 180, 0))
-        )
-        scoreboard_tex = self.game.loader.loadTexture("../images/scoreboard.png")
-        scorecard.setTexture(scoreboard_tex)
-        scorecard.setPos(19, -9.5, 0)
-        scorecard.setHpr(90, 0, 0)
-        scorecard.setTwoSided(True)
-
-        # xz positions let y be set to 0
-        frame_positions = {
-            PlayerTurn.PLAYER_ONE: {
-                "R1": (-0.05, 0.75),
-                "R2": (0.295, 0.75),
-                "R3": (0.64, 0.75),
-                "Total": (0.985, 0.75),  #
-            },
-            PlayerTurn.PLAYER_TWO: {
-                "R1": (-0.05, 0.63),
-                "R2": (0.295, 0.63),
-                "R3": (0.64, 0.63),
-                "Total": (0.985, 0.63),
-            },
-        }
-
-        ## maintain global xz offset for each of the three different types of scores
-        frame_1_x_offset = 0
-        frame1_z_offset = 0.048
-        frame2_x_offset = 0.13
-        frame2_z_offset = 0.048
-        round_x_offset = 0.13
-        round_z_offset = 0
-        self.score_offsets = {
-            "first_roll": (frame_1_x_offset, frame1_z_offset),
-            "second_roll": (frame2_x_offset, frame2_z_offset),
-            "total": (round_x_offset, round_z_offset),
-        }
-
-        # we should instead insert a tuple of (first roll, second roll, total) per frame
-        self.p1_frames = []
-        for i in range(3):
-            frame_nodes = []
-            base_pos = frame_positions[PlayerTurn.PLAYER_ONE][f"R{i + 1}"]
-            # Create nodes for first roll, second roll, and total
-            for score_type, offset in self.score_offsets.items():
-                text = TextNode(f"p1_frame_{i}_{score_type}")
-                text.setText("")
-                text.setAlign(TextNode.ACenter)
-                text.setTextColor(0, 0, 0, 1)
-                text_np = aspect2d.attachNewNode(text)
-
-                # Position with offset
-                text_np.setPos(base_pos[0] + offset[0], 0, base_pos[1] + offset[1])
-                text_np.setScale(0.05)
-                frame_nodes.append(text_np)
-
-            self.p1_frames.append(frame_nodes)
-
-        # Similar setup for Player 2
-        self.p2_frames = []
-        for i in range(3):
-            frame_nodes = []
-            base_pos = frame_positions[PlayerTurn.PLAYER_TWO][f"R{i + 1}"]
-            for score_type, offset in self.score_offsets.items():
-                text = TextNode(f"p2_frame_{i}_{score_type}")
-                text.setText("")
-                text.setAlign(TextNode.ACenter)
-                text.setTextColor(0, 0, 0, 1)
-                text_np = aspect2d.attachNewNode(text)
-                text_np.setPos(base_pos[0] + offset[0], 0, base_pos[1] + offset[1])
-                text_np.setScale(0.05)
-                frame_nodes.append(text_np)
-
-            self.p2_frames.append(frame_nodes)
-
-        # p1 total
-        self.p1_total = TextNode("p1_total")
-        self.p1_total.setText("p1_total")
-        self.p1_total.setAlign(TextNode.ACenter)
-        self.p1_total.setTextColor(0, 0, 0, 1)
-        p1_total_np = aspect2d.attachNewNode(self.p1_total)
-        p1_total_np.setPos(
-            frame_positions[PlayerTurn.PLAYER_ONE]["Total"][0],
-            0,
-            frame_positions[PlayerTurn.PLAYER_ONE]["Total"][1],
-        )
-        p1_total_np.setScale(0.05)
-
-        # p2 total
-        self.p2_total = TextNode("p2_total")
-        self.p2_total.setText("p2_total")
-        self.p2_total.setAlign(TextNode.ACenter)
-        self.p2_total.setTextColor(0, 0, 0, 1)
-        p2_total_np = aspect2d.attachNewNode(self.p2_total)
-        p2_total_np.setPos(
-            frame_positions[PlayerTurn.PLAYER_TWO]["Total"][0],
-            0,
-            frame_positions[PlayerTurn.PLAYER_TWO]["Total"][1],
-        )
-        p2_total_np.setScale(0.05)
+        cm.setFrame(BOARD_LEFT, BOARD_RIGHT, layout.bottom - BOX_MARGIN, BOARD_TOP)
+        static.attachNewNode(cm.generate()).setColor(0.85, 0.85, 0.85, 0.9)
+        cm = CardMaker("scoreboardBox")
+        for left, right, bottom, top in layout.boxes():
+            cm.setFrame(left, right, bottom, top)
+            static.attachNewNode(cm.generate()).setColor(0.97, 0.97, 0.97, 1)
+
+        labels = self.board.attachNewNode("labels")
+        labels.setBin("fixed", 1)
+        headings = list(layout.header_pos())
+        names = [
+            (name, *layout.name_pos(player))
+            for player, name in enumerate(self.player_names[:layout.players])
+        ]
+        for label, x, z in headings + names:
+            self.make_text(labels, "label", (x, z), label, static=True)
+        static.flattenStrong()
+        labels.flattenStrong()
+
+        # score cells: one TextNode per ball mark and running score
+        cells = self.board.attachNewNode("cells")
+        cells.setBin("fixed", 1)
+        for player in range(layout.players):
+            frames = []
+            for i in range(layout.frames):
+                frames.append([
+                    self.make_text(cells, f"p{player + 1}_frame_{i}_{score_type}", pos)
+                    for score_type, pos in zip(
+                        ("first_roll", "second_roll", "total"), layout.cell_pos(player, i)
+                    )
+                ])
+            self.frames.append(frames)
+            self.totals.append(
+                self.make_text(cells, f"p{player + 1}_total", layout.total_pos(player))
+            )
 
     def format_frame_score(self, player, frame_idx):
-        frame = self.game_logic.scores[player][frame_idx]
-
-        first_roll = (
-            str(frame.first_roll)
-            if (frame.first_roll > 0 and frame.first_roll != 10)
-            else ""
-        )
-
-        second_roll = ""
-        if frame.is_complete:
-            if frame.first_roll == 10:
-                second_roll = "X"
-                total = "10"
-                return [first_roll, second_roll, total]
-            else:
-                second_roll = (
-                    "/"
-                    if (frame.first_roll + frame.second_roll == 10)
-                    else str(frame.second_roll)
-                )
-
-        total = ""
-        if frame.is_complete:
-            total = str(frame.second_roll + frame.first_roll)
-
-        # print(player, frame_idx, [first_roll, second_roll, total])
+        sheet = self.game_logic.scores[player]
+        marks = roll_marks(sheet.frame_rolls(frame_idx))
+
+        if marks == ["X"] and frame_idx < sheet.frames - 1:
+            # strikes go in the small box, like on a paper sheet
+            first_roll, second_roll = "", "X"
+        else:
+            first_roll = marks[0] if marks else ""
+            # the last frame's fill ball shares the small box
+            second_roll = "".join(marks[1:])
+
+        score = sheet.cumulative[frame_idx]
+        total = str(score) if score >= 0 else ""
         return [first_roll, second_roll, total]
 
-    def update_scoreboard(self, task):
-        # Update Player 1 frames
-        for i in range(3):
-            scores = self.format_frame_score(PlayerTurn.PLAYER_ONE, i)
-            for j, score in enumerate(scores):
-                self.p1_frames[i][j].node().setText(score)
-
-        # Update Player 2 frames
-        for i in range(3):
-            scores = self.format_frame_score(PlayerTurn.PLAYER_TWO, i)
-            for j, score in enumerate(scores):
-                self.p2_frames[i][j].node().setText(score)
-
-        # Update totals
-        p1_total = self.game_logic.get_current_score(PlayerTurn.PLAYER_ONE)
-        p2_total = self.game_logic.get_current_score(PlayerTurn.PLAYER_TWO)
+    def set_text(self, text_node, text):
+        # setText rebuilds the text geometry, so skip it if nothing changed
+        if text_node.getText() != text:
+            text_node.setText(text)
+
+    def update_frame(self, player, frame_idx):
+        """Redraw one frame's cells and the player's total"""
+        scores = self.format_frame_score(player, frame_idx)
+        for text_node, score in zip(self.frames[player][frame_idx], scores):
+            self.set_text(text_node, score)
+        self.set_text(
+            self.totals[player], str(self.game_logic.get_current_score(player))
+        )
 
-        self.p1_total.setText(str(p1_total))
-        self.p2_total.setText(str(p2_total))
+    def refresh(self):
+        for player, frames in enumerate(self.frames):
+            for i in range(len(frames)):
+                self.update_frame(player, i)
 
-        return task.cont
+    def on_score_changed(self, player, frame_idx):
+        if self.enable_print:
+            print(f"score changed: player {player + 1} frame {frame_idx + 1}")
+        # a roll also settles up to two earlier strikes or a spare
+        for i in range(max(0, frame_idx - 2), frame_idx + 1):
+            self.update_frame(player, i)
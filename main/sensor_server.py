@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+from sensor_io.framing import FrameDecoder, ImuSample, Position, ProtocolError, Ready
+
+# events waiting for the render thread; oldest are dropped if a frame stalls
+MAX_PENDING_EVENTS = 4096
+
+
+class Channel:
+    """
+    Decodes one sensor's frames. feed() returns the event args of every
+    record_type record; a Ready record is kept in `ready` for the server to
+    pick up instead.
+    """
+
+    name = None
+    event = None
+    latest_only = False
+    record_type = None
+
+    def __init__(self):
+        self.decoder = FrameDecoder()
+        self.ready = None
+
+    def feed(self, data):
+        results = []
+        for record in self.decoder.feed(data):
+            if isinstance(record, self.record_type):
+                results.append(self.args(record))
+            elif isinstance(record, Ready):
+                self.ready = record
+        return results
+
+
+class ImuChannel(Channel):
+    """Decodes binary IMU frames into accel_data events"""
+
+    name = "imu"
+    event = "accel_data"
+    record_type = ImuSample
+
+    def args(self, sample):
+        return [sample.x, sample.y, sample.z]
+
+
+class PositionChannel(Channel):
+    """
+    Decodes position records from position_tracker.py. Only the newest
+    position matters, so the server keeps one per frame instead of queueing
+    every record.
+    """
+
+    name = "camera"
+    event = "position_data"
+    latest_only = True
+    record_type = Position
+
+    def args(self, record):
+        return [record.distance]
+
+
+class ChannelStats:
+    """
+    Counters for one channel across all of its connections, written by the
+    I/O thread. They only grow, so a reader gets rates from the difference
+    between two reads.
+    """
+
+    def __init__(self):
+        # clients connected now
+        self.connections = 0
+        # frames decoded, heartbeats and Ready included
+        self.records = 0
+        # records passed on as events
+        self.samples = 0
+        # samples the sender numbered but that never arrived
+        self.dropped = 0
+        # time.monotonic() of the last decoded frame, None before the first
+        self.last_seen = None
+
+
+class SensorServer:
+    """
+    One I/O thread that multiplexes all sensor listeners and clients with a
+    selector. Decoded samples are appended to a deque (append/popleft are
+    atomic, so no lock is needed) and handed to the render thread by
+    dispatch(), which main.py runs once per frame as a task. Channels
+    marked latest_only just overwrite their slot in `latest`, so at most
+    one of their events is sent per frame.
+
+    When a sensor process reports Ready, `ready[channel.name]` is set to
+    (time.monotonic() on receipt, the Ready record), so the game can tell
+    how long each sensor took to start. `stats[channel.name]` counts what
+    each channel delivered and when it was last heard from, and `overflow`
+    the queued events dropped because dispatch fell behind.
+
+    A channel can instead be read from a shared memory ring (attach_ring);
+    drain() polls rings on the render thread, without the I/O thread or a
+    syscall per sample.
+    """
+
+    def __init__(self, enable_print=False, profiler=None):
+        self.enable_print = enable_print
+        # when set, client reads are timed through it on the I/O thread
+        self.profiler = profiler
+        self.selector = selectors.DefaultSelector()
+        self.events = deque(maxlen=MAX_PENDING_EVENTS)
+        self.latest = {}
+        self.ready = {}
+        self.stats = {}
+        self.overflow = 0
+        self.listeners = {}
+        # (ring, channel) pairs polled by drain()
+        self.rings = []
+        self.running = False
+        self.thread = None
+
+        # lets stop() wake the selector up
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self.selector.register(self._wakeup_recv, selectors.EVENT_READ, None)
+
+    def listen(self, port, channel_class, host="localhost"):
+        """Accept any number of clients on port, decoding with channel_class"""
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server_socket.bind((host, port))
+        server_socket.listen()
+        server_socket.setblocking(False)
+        self.selector.register(
+            server_socket, selectors.EVENT_READ, (self._accept, channel_class)
+        )
+        bound_port = server_socket.getsockname()[1]
+        self.listeners[bound_port] = server_socket
+        self.stats.setdefault(channel_class.name, ChannelStats())
+        return bound_port
+
+    def attach_ring(self, ring, channel_class):
+        """Read frames for channel_class from a ShmRing (sensor_io/shm_ring.py)"""
+        self.stats.setdefault(channel_class.name, ChannelStats())
+        read = ring.read
+        if self.profiler is not None:
+            read = self.profiler.wrap(f"ring:{channel_class.event}", read)
+        self.rings.append((read, channel_class()))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        try:
+            self._wakeup_send.send(b"\0")
+        except OSError:
+            pass
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        for key in list(self.selector.get_map().values()):
+            self.selector.unregister(key.fileobj)
+            key.fileobj.close()
+        self.selector.close()
+        self._wakeup_send.close()
+
+    def _run(self):
+        while self.running:
+            # blocks until a socket is readable, never spins
+            for key, _ in self.selector.select():
+                if key.data is None:
+                    return
+                callback, arg = key.data
+                callback(key.fileobj, arg)
+
+    def _accept(self, server_socket, channel_class):
+        try:
+            client, addr = server_socket.accept()
+        except BlockingIOError:
+            return
+        if self.enable_print:
+            print(f"Sensor client connected at {addr}")
+        self.stats[channel_class.name].connections += 1
+        client.setblocking(False)
+        read = self._read
+        if self.profiler is not None:
+            read = self.profiler.wrap(f"socket:{channel_class.event}", read)
+        self.selector.register(client, selectors.EVENT_READ, (read, channel_class()))
+
+    def _read(self, client, channel):
+        try:
+            data = client.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if self.enable_print:
+                print(f"Sensor client error: {e}")
+            data = b""
+
+        if data:
+            try:
+                results = self._decode(channel, data)
+                if channel.latest_only:
+                    if results:
+                        self.latest[channel.event] = results[-1]
+                else:
+                    for args in results:
+                        # a full deque drops its oldest event to make room
+                        if len(self.events) == self.events.maxlen:
+                            self.overflow += 1
+                        self.events.append((channel.event, args))
+                return
+            except ProtocolError as e:
+                if self.enable_print:
+                    print(f"Bad sensor frame: {e}")
+
+        if self.enable_print:
+            print(f"Sensor client disconnected ({channel.event})")
+        self.stats[channel.name].connections -= 1
+        self.selector.unregister(client)
+        client.close()
+
+    def _decode(self, channel, data):
+        """Feed data to channel, counting it and noting Ready; returns the event args"""
+        stats = self.stats[channel.name]
+        decoder = channel.decoder
+        received, dropped = decoder.received, decoder.dropped
+        results = channel.feed(data)
+        if decoder.received != received:
+            stats.last_seen = time.monotonic()
+            stats.records += decoder.received - received
+            stats.dropped += decoder.dropped - dropped
+            stats.samples += len(results)
+        if channel.ready is not None:
+            self.ready[channel.name] = (time.monotonic(), channel.ready)
+            if self.enable_print:
+                print(f"Sensor ready: {channel.name} (started in {channel.ready.startup:.2f} s)")
+            channel.ready = None
+        return results
+
+    def drain(self):
+        """Pop every pending (event, args) pair, then the newest latest_only values"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.popleft())
+            except IndexError:
+                break
+        for read, channel in self.rings:
+            data = read()
+            if not data:
+                continue
+            # ShmRing.read() has already skipped bad slots, so the frames
+            # always decode
+            results = self._decode(channel, data)
+            if channel.latest_only:
+                if results:
+                    self.latest[channel.event] = results[-1]
+            else:
+                events.extend((channel.event, args) for args in results)
+        for event in list(self.latest):
+            args = self.latest.pop(event, None)
+            if args is not None:
+                events.append((event, args))
+        return events
+
+    def dispatch(self, messenger):
+        for event, args in self.drain():
+            messenger.send(event, args)
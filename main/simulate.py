@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# USAGE
+# python simulate.py [--rolls 1000] [--seed 0] [--players 1] [--frames 10]
+# python simulate.py --script rolls.txt
+#
+# Runs BowlingMechanics without a window and bowls scripted or random swings
+# through it as fast as the CPU allows. The clock is switched to
+# non-real-time, so every task manager step advances the game by exactly
+# 1/fps seconds however long the step really took: rendering and the reset
+# delay behave as they would at that frame rate. Ball motion and collisions
+# run in fixed physics steps, so the pins knocked down do not depend on fps.
+#
+# A script has one roll per line: the tracker position (-100 to 100, the
+# value position_tracker.py sends) followed by the gyro y samples of the
+# swing in DPS, e.g. "12.5 0 60 110 140 90 0". Lines starting with # are
+# skipped.
+
+import argparse
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from panda3d.core import ClockObject, loadPrcFileData
+
+from swing_detector import swing_samples
+
+FPS = 60
+# a roll that has not finished after this much game time is abandoned
+ROLL_TIMEOUT = 30
+
+
+def random_roll(rng):
+    """(position, samples) for a swing of random strength and aim"""
+    return rng.uniform(-100, 100), swing_samples(rng.uniform(40, 170))
+
+
+def read_script(path):
+    rolls = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            values = [float(value) for value in line.split()]
+            rolls.append((values[0], values[1:]))
+    return rolls
+
+
+class Simulation:
+    """
+    A windowless ShowBase with a BowlingMechanics on it. roll() feeds one
+    swing in through the same handlers the sensor events reach and steps
+    the task manager until the board has been reset.
+    """
+
+    def __init__(self, players=1, frames=10, fps=FPS, enable_print=False):
+        loadPrcFileData("", "window-type none\naudio-library-name null")
+
+        from direct.showbase.ShowBase import ShowBase
+        from bowling_mechanics import BowlingMechanics
+
+        self.base = ShowBase()
+        self.clock = ClockObject.getGlobalClock()
+        self.clock.setMode(ClockObject.MNonRealTime)
+        self.clock.setFrameRate(fps)
+        self.fps = fps
+
+        self.base.player_names = [f"Player {i + 1}" for i in range(players)]
+        options = SimpleNamespace(
+            enable_print=enable_print,
+            enable_print_power_mag=False,
+            num_frames=frames,
+            headless=True,
+        )
+        self.mechanics = BowlingMechanics(self.base, options)
+        self.steps = 0
+
+    def step(self):
+        self.base.taskMgr.step()
+        self.steps += 1
+
+    def roll(self, position, samples, timeout=ROLL_TIMEOUT):
+        """
+        Aim, swing, and wait for the reset. Returns the pins this ball
+        knocked down, or None if the samples did not make a swing.
+        """
+        mechanics = self.mechanics
+        mechanics.moveBallHorizontal(position)
+        # all samples in one frame, as SensorServer.dispatch delivers a batch
+        for gyro_y in samples:
+            mechanics.handle_imu_update(0, gyro_y, 0)
+        mechanics.swing_detector.reset()
+        if mechanics.can_bowl:
+            return None
+
+        knocked_before = mechanics.pins_knocked
+        knocked = knocked_before
+        for _ in range(int(timeout * self.fps)):
+            knocked = mechanics.pins_knocked
+            self.step()
+            if mechanics.can_bowl:
+                return knocked - knocked_before
+        raise RuntimeError(f"roll did not finish within {timeout} s of game time")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-r", "--rolls", type=int, default=1000)
+    ap.add_argument("-s", "--script", help="file with one 'position gyro_y...' roll per line")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--players", type=int, default=1)
+    ap.add_argument("--frames", type=int, default=10)
+    ap.add_argument("--fps", type=int, default=FPS)
+    ap.add_argument("-v", "--verbose", action="store_true", help="print every roll")
+    args = ap.parse_args()
+
+    if args.script:
+        rolls = read_script(args.script)
+    else:
+        rng = random.Random(args.seed)
+        rolls = [random_roll(rng) for _ in range(args.rolls)]
+
+    sim = Simulation(args.players, args.frames, args.fps)
+    if sim.mechanics.assets.missing:
+        print(f"models not found (empty nodes used): {sorted(sim.mechanics.assets.missing)}")
+
+    results = []
+    start = time.perf_counter()
+    for i, (position, samples) in enumerate(rolls):
+        pins = sim.roll(position, samples)
+        results.append(pins)
+        if args.verbose:
+            print(f"roll {i + 1}: position {position:6.1f}, peak {max(samples):5.1f} dps -> {pins} pins")
+    elapsed = time.perf_counter() - start
+
+    bowled = [pins for pins in results if pins is not None]
+    print(f"{len(rolls)} rolls ({len(rolls) - len(bowled)} not detected as swings)")
+    print(f"{elapsed:.1f} s wall, {sim.steps / args.fps:.0f} s game time, {60 * len(rolls) / elapsed:.0f} rolls/min")
+    if bowled:
+        print(f"mean pins per roll {sum(bowled) / len(bowled):.2f}")
+        counts = Counter(bowled)
+        print("pins:  " + " ".join(f"{pins:>4}" for pins in range(11)))
+        print("rolls: " + " ".join(f"{counts[pins]:>4}" for pins in range(11)))
+    for player, sheet in enumerate(sim.mechanics.game_logic.scores):
+        print(f"player {player + 1}: {sheet.rolls.tolist()} -> {sheet.total}")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+# (model, position, scale) of every piece of the environment that never moves
+STATIC_SCENE = [
+    # player lane and the background lanes either side of it
+    ("../models/bowling-lane.glb", (2, 0, 0), (1, 1, 1)),
+    ("../models/bowling-lane.glb", (2, 0, -12.5), (1, 1, 1)),
+    ("../models/bowling-lane.glb", (2, 0, 12.5), (1, 1, 1)),
+    ("../models/gutter2.glb", (2, 0, 6.25), (1, 1, 1)),
+    ("../models/gutter2.glb", (2, 0, -6.25), (1, 1, 1)),
+    ("../models/gutter2.glb", (2, 0, 19), (1, 1, 1)),
+    ("../models/gutter2.glb", (2, 0, -19), (1, 1, 1)),
+    ("../models/backdrop2.glb", (18, -1.5, 0), (1, 2, 1)),
+    ("../models/backdrop2.glb", (18, -1.5, 12.5), (1, 2, 1)),
+    ("../models/backdrop2.glb", (18, -1.5, -12.5), (1, 2, 1)),
+]
+
+
+def build_static_scene(assets, parent, layout=STATIC_SCENE, flatten=True):
+    """
+    Put every piece of layout under one "static_scene" node. With flatten,
+    the transforms are baked into the vertices and the pieces are merged
+    into as few Geoms as their render states allow, so the whole backdrop
+    costs a handful of draw calls instead of one per piece.
+
+    Pieces are copies rather than instances: a node with several parents
+    cannot be merged, and the merged geometry is not shared anyway.
+    """
+    root = parent.attachNewNode("static_scene")
+    for path, pos, scale in layout:
+        piece = assets.load(path).copyTo(root)
+        piece.setPos(*pos)
+        piece.setScale(*scale)
+
+    if flatten:
+        # ModelRoot nodes are kept by the flattener, so drop them first
+        root.clearModelNodes()
+        root.flattenStrong()
+    return root
+
+
+def count_geoms(node):
+    """(GeomNodes, Geoms) under node; each visible Geom is one draw call"""
+    geom_nodes = node.findAllMatches("**/+GeomNode")
+    return geom_nodes.getNumPaths(), sum(
+        geom_node.node().getNumGeoms() for geom_node in geom_nodes
+    )
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+import subprocess
+import time
+
+# a running worker that has sent nothing for this long is restarted
+HEARTBEAT_TIMEOUT = 3.0
+# ... but a fresh one gets longer, for model loading and the BLE scan
+STARTUP_TIMEOUT = 30.0
+# wait before the first restart, doubled after each further failure
+RESTART_DELAY = 0.5
+MAX_RESTART_DELAY = 30.0
+# a worker that stays up this long starts over at RESTART_DELAY
+STABLE_TIME = 60.0
+# time a worker gets to exit after terminate() before it is killed
+STOP_TIMEOUT = 2.0
+# seconds between health checks
+CHECK_INTERVAL = 0.5
+
+
+class Worker:
+    """One supervised sensor process and its restart bookkeeping"""
+
+    def __init__(self, name, args):
+        # name of the SensorServer channel the process sends on
+        self.name = name
+        self.args = args
+        self.process = None
+        # running, stopping (terminated, not exited yet), waiting (to be
+        # restarted at restart_at) or stopped
+        self.state = "stopped"
+        self.started_at = None
+        self.restart_at = None
+        self.stop_deadline = None
+        self.restarts = 0
+        # failures since the worker was last up for STABLE_TIME
+        self.failures = 0
+        self.last_failure = None
+        # samples per second between the last two checks
+        self.rate = 0.0
+        self._samples = 0
+        self._checked_at = None
+
+
+class Supervisor:
+    """
+    Starts the sensor processes and keeps them running. check(), called
+    every CHECK_INTERVAL from a task, restarts a worker that has exited,
+    and terminates and restarts one whose channel has been silent for
+    HEARTBEAT_TIMEOUT (STARTUP_TIMEOUT before its first frame); workers
+    send heartbeats while they have no data, so silence means hung.
+    Restarts back off exponentially so a worker that cannot start does
+    not spin. The SensorServer keeps accepting, so a restarted worker just
+    connects again.
+    """
+
+    def __init__(
+        self,
+        server,
+        enable_print=False,
+        heartbeat_timeout=HEARTBEAT_TIMEOUT,
+        startup_timeout=STARTUP_TIMEOUT,
+        restart_delay=RESTART_DELAY,
+        max_restart_delay=MAX_RESTART_DELAY,
+        stop_timeout=STOP_TIMEOUT,
+    ):
+        self.server = server
+        self.enable_print = enable_print
+        self.heartbeat_timeout = heartbeat_timeout
+        self.startup_timeout = startup_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stop_timeout = stop_timeout
+        self.workers = {}
+
+    def add(self, name, args):
+        if name not in self.server.stats:
+            raise ValueError(f"no sensor channel named {name!r}")
+        self.workers[name] = Worker(name, args)
+
+    def start(self):
+        for worker in self.workers.values():
+            self._launch(worker, time.monotonic())
+
+    def _launch(self, worker, now):
+        worker.process = subprocess.Popen(worker.args)
+        worker.started_at = now
+        worker.state = "running"
+        if self.enable_print:
+            print(f"started {worker.name} worker (pid {worker.process.pid})")
+
+    def _silent_for(self, worker, now):
+        """Seconds since the worker was last heard from, and the limit that applies"""
+        last_seen = self.server.stats[worker.name].last_seen
+        if last_seen is None or last_seen < worker.started_at:
+            return now - worker.started_at, self.startup_timeout
+        return now - last_seen, self.heartbeat_timeout
+
+    def _failed(self, worker, now, reason):
+        worker.failures += 1
+        worker.last_failure = reason
+        delay = min(self.restart_delay * 2 ** (worker.failures - 1), self.max_restart_delay)
+        worker.restart_at = now + delay
+        worker.state = "waiting"
+        if self.enable_print:
+            print(f"{worker.name} worker {reason}, restarting in {delay:.1f} s")
+
+    def check(self):
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if worker.state == "running":
+                code = worker.process.poll()
+                silent, limit = self._silent_for(worker, now)
+                if code is not None:
+                    self._failed(worker, now, f"exited with code {code}")
+                elif silent > limit:
+                    worker.last_failure = f"silent for {silent:.1f} s"
+                    if self.enable_print:
+                        print(f"{worker.name} worker {worker.last_failure}, stopping it")
+                    worker.process.terminate()
+                    worker.stop_deadline = now + self.stop_timeout
+                    worker.state = "stopping"
+                elif worker.failures and now - worker.started_at > STABLE_TIME:
+                    worker.failures = 0
+            elif worker.state == "stopping":
+                if worker.process.poll() is not None:
+                    self._failed(worker, now, worker.last_failure)
+                elif now > worker.stop_deadline:
+                    worker.process.kill()
+            elif worker.state == "waiting" and now >= worker.restart_at:
+                worker.restarts += 1
+                self._launch(worker, now)
+            self._update_rate(worker, now)
+
+    def _update_rate(self, worker, now):
+        samples = self.server.stats[worker.name].samples
+        if worker._checked_at is not None and now > worker._checked_at:
+            worker.rate = (samples - worker._samples) / (now - worker._checked_at)
+        worker._samples = samples
+        worker._checked_at = now
+
+    def stop(self):
+        """Terminate every worker, killing any that do not exit in time"""
+        for worker in self.workers.values():
+            if worker.process is not None and worker.process.poll() is None:
+                worker.process.terminate()
+        for worker in self.workers.values():
+            if worker.process is None:
+                continue
+            try:
+                worker.process.wait(timeout=self.stop_timeout)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+            worker.state = "stopped"
+
+    def report(self):
+        """One line per worker: state, restarts, throughput and loss"""
+        now = time.monotonic()
+        lines = [
+            f"{'worker':<8} {'state':<8} {'pid':>7} {'restarts':>8} {'samples/s':>9} "
+            f"{'samples':>8} {'dropped':>7} {'silent':>7}  last failure"
+        ]
+        for worker in self.workers.values():
+            stats = self.server.stats[worker.name]
+            pid = worker.process.pid if worker.process is not None else "-"
+            silent = f"{now - stats.last_seen:.1f}s" if stats.last_seen is not None else "-"
+            lines.append(
+                f"{worker.name:<8} {worker.state:<8} {pid:>7} {worker.restarts:>8} "
+                f"{worker.rate:>9.1f} {stats.samples:>8} {stats.dropped:>7} {silent:>7}  "
+                f"{worker.last_failure or ''}"
+            )
+        lines.append(f"events dropped by a full queue: {self.server.overflow}")
+        return "\n".join(lines)
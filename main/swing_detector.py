@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+MIN_SAMPLES_THRESHOLD = 3
+BUFFER_SIZE = 5
+
+
+@dataclass
+class PowerCurve:
+    """Maps raw gyro y readings to power levels and power levels to roll time"""
+
+    divisor: float = 10
+    min_level: int = 4
+    max_level: int = 16
+    exponent: float = 1.8
+    scale: float = 10
+    min_roll_time: int = 1
+    max_roll_time: int = 8
+
+    def power_level(self, gyro_y: float) -> int:
+        level = int(gyro_y / self.divisor)
+        if level < self.min_level:
+            return 0
+        return min(level, self.max_level)
+
+    def scaled_power(self, avg_power: float) -> float:
+        # Exponential scaling creates bigger difference between soft and hard swings
+        return (avg_power**self.exponent) / self.scale
+
+    def roll_time(self, scaled_power: float) -> int:
+        return int(
+            max(
+                self.min_roll_time,
+                min(self.max_roll_time, self.max_roll_time - scaled_power),
+            )
+        )
+
+
+def swing_samples(peak: float, rise: int = 3, fall: int = 2) -> list:
+    """Gyro y samples of a swing that ramps up to peak DPS and back to rest"""
+    up = [peak * (i + 1) / rise for i in range(rise)]
+    down = [peak * (fall - i) / (fall + 1) for i in range(fall)]
+    return [0.0] + up + down + [0.0]
+
+
+@dataclass
+class Swing:
+    avg_power: float
+    scaled_power: float
+    roll_time: int
+
+
+class SwingDetector:
+    """
+    Detects a swing as a run of consecutive non-zero power levels.
+
+    Samples go into a fixed-size ring buffer, and the length and sum of the
+    run ending at the newest sample are kept up to date as samples arrive,
+    so each push() is O(1). A swing is reported once, when its run reaches
+    min_samples.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = BUFFER_SIZE,
+        min_samples: int = MIN_SAMPLES_THRESHOLD,
+        curve: Optional[PowerCurve] = None,
+    ):
+        if not 1 <= min_samples <= buffer_size:
+            raise ValueError("min_samples must be between 1 and buffer_size")
+        self.buffer_size = buffer_size
+        self.min_samples = min_samples
+        self.curve = curve if curve is not None else PowerCurve()
+
+        self.buffer = array("i", [0] * buffer_size)
+        self.index = 0
+        self.run_length = 0
+        self.run_sum = 0
+
+    def reset(self):
+        for i in range(self.buffer_size):
+            self.buffer[i] = 0
+        self.index = 0
+        self.run_length = 0
+        self.run_sum = 0
+
+    def push(self, gyro_y: float) -> Optional[Swing]:
+        """Add one gyro y sample, returns a Swing when one is detected"""
+        level = self.curve.power_level(gyro_y)
+
+        # overwrite the oldest sample in the ring
+        oldest = self.buffer[self.index]
+        self.buffer[self.index] = level
+        self.index += 1
+        if self.index == self.buffer_size:
+            self.index = 0
+
+        if level == 0:
+            self.run_length = 0
+            self.run_sum = 0
+            return None
+
+        if self.run_length == self.buffer_size:
+            # run is longer than the window, forget the sample that fell out
+            self.run_sum -= oldest
+        else:
+            self.run_length += 1
+        self.run_sum += level
+
+        if self.run_length != self.min_samples:
+            return None
+
+        # the stroke leaves out the newest sample of the run
+        stroke_length = max(self.run_length - 1, 1)
+        stroke_sum = self.run_sum - level if self.run_length > 1 else self.run_sum
+        avg_power = stroke_sum / stroke_length
+        scaled_power = self.curve.scaled_power(avg_power)
+        return Swing(avg_power, scaled_power, self.curve.roll_time(scaled_power))
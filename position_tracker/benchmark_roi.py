@@ -0,0 +1,68 @@
+# USAGE
+# python benchmark_roi.py --prototxt deploy.prototxt --model res10_300x300_ssd_iter_140000.caffemodel --video clip.mp4
+#
+# Runs the SSD over every frame of a recorded clip twice, once on the full
+# frame and once through RoiDetector, and reports inference time per frame
+# for both plus how closely the ROI detections follow the full-frame ones
+# (which are used as the reference).
+
+import argparse
+import time
+
+import numpy as np
+import imutils
+
+from detectors import SSDDetector, RoiDetector
+from pipeline import FRAME_WIDTH, VideoFileSource, SyntheticSource
+
+
+def primary_centroid(boxes):
+    # the largest face is the player closest to the camera
+    if len(boxes) == 0:
+        return None
+    boxes = np.array(boxes)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    box = boxes[areas.argmax()]
+    return ((box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0)
+
+
+def run(detector, frames):
+    centroids = []
+    start = time.perf_counter()
+    for frame in frames:
+        centroids.append(primary_centroid(detector.detect(frame)))
+    return 1000 * (time.perf_counter() - start) / len(frames), centroids
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-p", "--prototxt", required=True)
+    ap.add_argument("-m", "--model", required=True)
+    ap.add_argument("-c", "--confidence", type=float, default=0.5)
+    ap.add_argument("-v", "--video", help="recorded clip (default: synthetic frames)")
+    ap.add_argument("--margin", type=float, default=1.0)
+    args = ap.parse_args()
+
+    source = VideoFileSource(args.video) if args.video else SyntheticSource(frames=300)
+    frames = []
+    while True:
+        frame = source.read()
+        if frame is None:
+            break
+        frames.append(imutils.resize(frame, width=FRAME_WIDTH))
+    source.stop()
+
+    full_ms, reference = run(SSDDetector(args.prototxt, args.model, args.confidence), frames)
+    roi = RoiDetector(SSDDetector(args.prototxt, args.model, args.confidence), margin=args.margin)
+    roi_ms, centroids = run(roi, frames)
+
+    found = [r is not None for r in reference]
+    agree = [r is not None and c is not None for r, c in zip(reference, centroids)]
+    errors = [np.hypot(r[0] - c[0], r[1] - c[1]) for r, c in zip(reference, centroids) if r and c]
+
+    print(f"[INFO] {len(frames)} frames, player found in {sum(found)} on the full frame")
+    print(f"[INFO] full frame: {full_ms:.2f} ms/frame")
+    print(f"[INFO] ROI:        {roi_ms:.2f} ms/frame ({full_ms / max(roi_ms, 1e-9):.2f}x), "
+        f"{roi.roi_frames} ROI / {roi.full_frames} full-frame detections")
+    print(f"[INFO] ROI found the player in {sum(agree)}/{sum(found)} frames, "
+        f"mean centroid error {np.mean(errors) if errors else 0:.1f} px")
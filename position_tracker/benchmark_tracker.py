@@ -0,0 +1,56 @@
+# USAGE
+# python benchmark_tracker.py [--frames 2000] [--counts 1 5 10 20 50]
+#
+# Compares the array-backed CentroidTracker (optimal assignment) with the
+# greedy OrderedDict tracker in pyimagesearch/centroidtracker_mine.py, on
+# random-walk scenes with 1-50 objects. That file predates the rewrite: it
+# is not the code the rewrite replaced but a copy of it with the comments
+# stripped, and its matching is the same greedy nearest-centroid pass.
+# Reports the mean time per update() and how many object IDs each tracker
+# handed out (more IDs than objects means tracks were lost or swapped).
+
+import argparse
+import time
+
+import numpy as np
+
+from pyimagesearch.centroidtracker import CentroidTracker
+from pyimagesearch.centroidtracker_mine import CentroidTracker as GreedyCentroidTracker
+
+
+def make_scene(num_objects, frames, width=400, height=300, miss_rate=0.05, seed=0):
+    """Per-frame lists of boxes for objects doing a random walk"""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform((20, 20), (width - 20, height - 20), (num_objects, 2))
+    scene = []
+    for _ in range(frames):
+        positions += rng.normal(0, 3, positions.shape)
+        positions = np.clip(positions, (20, 20), (width - 20, height - 20))
+        # detector misses some objects, and reports the rest in any order
+        seen = positions[rng.random(num_objects) > miss_rate]
+        seen = seen[rng.permutation(len(seen))]
+        boxes = np.hstack([seen - 20, seen + 20]).astype("int")
+        scene.append(list(boxes))
+    return scene
+
+
+def run(tracker, scene):
+    start = time.perf_counter()
+    for rects in scene:
+        tracker.update(rects)
+    elapsed = time.perf_counter() - start
+    return 1e6 * elapsed / len(scene), tracker.nextObjectID
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-f", "--frames", type=int, default=2000)
+    ap.add_argument("-c", "--counts", type=int, nargs="+", default=[1, 2, 5, 10, 20, 50])
+    args = ap.parse_args()
+
+    print(f"{'objects':>7} | {'greedy us/frame':>15} {'ids':>5} | {'array us/frame':>14} {'ids':>5}")
+    for count in args.counts:
+        scene = make_scene(count, args.frames)
+        greedy_us, greedy_ids = run(GreedyCentroidTracker(), scene)
+        array_us, array_ids = run(CentroidTracker(), scene)
+        print(f"{count:>7} | {greedy_us:>15.1f} {greedy_ids:>5} | {array_us:>14.1f} {array_ids:>5}")
@@ -0,0 +1,416 @@
+"""
+detectors.py
+
+Face detectors used by the position tracker. A detector has a single
+method, detect(frame), returning a list of (startX, startY, endX, endY)
+integer boxes in frame coordinates.
+
+Backends (selected with --backend in position_tracker.py) subclass
+Detector and record their latency per frame; SkippingDetector and
+RoiDetector wrap any backend.
+"""
+import time
+
+import numpy as np
+import cv2
+
+# mean values the res10 SSD was trained with
+SSD_MEAN = (104.0, 177.0, 123.0)
+
+
+class Detector:
+    """
+    Base class for detection backends. Subclasses implement _detect(frame);
+    detect() wraps it to record the latency of every frame.
+    """
+
+    name = "detector"
+
+    def __init__(self):
+        self.frames = 0
+        self.total_time = 0.0
+        self.last_latency = 0.0
+
+    def detect(self, frame):
+        t0 = time.perf_counter()
+        boxes = self._detect(frame)
+        self.last_latency = time.perf_counter() - t0
+        self.total_time += self.last_latency
+        self.frames += 1
+        return boxes
+
+    def _detect(self, frame):
+        raise NotImplementedError
+
+    def mean_latency_ms(self):
+        return 1000 * self.total_time / self.frames if self.frames else 0.0
+
+
+def ssd_boxes(detections, confidence, W, H):
+    """
+    Boxes from SSD-style output ([1, 1, N, 7] rows of
+    image_id, label, confidence, x1, y1, x2, y2 in 0-1 coordinates)
+    """
+    # keep detections above the confidence threshold and scale them
+    # back to frame coordinates
+    detections = detections.reshape(-1, 7)
+    boxes = detections[detections[:, 2] > confidence, 3:7]
+    boxes = boxes * np.array([W, H, W, H])
+    return list(boxes.astype("int"))
+
+
+class SSDDetector(Detector):
+    """res10 300x300 SSD face detector loaded from Caffe files"""
+
+    name = "ssd"
+
+    def __init__(self, prototxt, model, confidence=0.5):
+        super().__init__()
+        self.net = cv2.dnn.readNetFromCaffe(prototxt, model)
+        self.confidence = confidence
+
+    def _detect(self, frame):
+        (H, W) = frame.shape[:2]
+
+        # construct a blob from the frame, pass it through the network
+        blob = cv2.dnn.blobFromImage(frame, 1.0, (W, H), SSD_MEAN)
+        self.net.setInput(blob)
+        return ssd_boxes(self.net.forward(), self.confidence, W, H)
+
+
+DNN_BACKENDS = {
+    "default": cv2.dnn.DNN_BACKEND_DEFAULT,
+    "opencv": cv2.dnn.DNN_BACKEND_OPENCV,
+}
+DNN_TARGETS = {
+    "cpu": cv2.dnn.DNN_TARGET_CPU,
+    "opencl": cv2.dnn.DNN_TARGET_OPENCL,
+    "opencl_fp16": cv2.dnn.DNN_TARGET_OPENCL_FP16,
+}
+
+
+class DnnDetector(SSDDetector):
+    """
+    Any SSD-style model OpenCV's dnn module can read (Caffe, ONNX,
+    TensorFlow), with a configurable backend, target and thread count.
+    A fixed input size (e.g. 300x300) is usually much cheaper than feeding
+    the whole frame.
+    """
+
+    name = "dnn"
+
+    def __init__(
+        self,
+        model,
+        config="",
+        confidence=0.5,
+        backend="default",
+        target="cpu",
+        threads=None,
+        input_size=None,
+    ):
+        Detector.__init__(self)
+        if threads:
+            cv2.setNumThreads(threads)
+        self.net = cv2.dnn.readNet(model, config)
+        self.net.setPreferableBackend(DNN_BACKENDS[backend])
+        self.net.setPreferableTarget(DNN_TARGETS[target])
+        self.confidence = confidence
+        self.input_size = input_size
+
+    def _detect(self, frame):
+        (H, W) = frame.shape[:2]
+        size = self.input_size or (W, H)
+        blob = cv2.dnn.blobFromImage(frame, 1.0, size, SSD_MEAN)
+        self.net.setInput(blob)
+        return ssd_boxes(self.net.forward(), self.confidence, W, H)
+
+
+class HaarDetector(Detector):
+    """OpenCV's frontal face Haar cascade, much cheaper and less accurate"""
+
+    name = "haar"
+
+    def __init__(self, cascade=None, scale_factor=1.2, min_neighbors=5, min_size=30):
+        super().__init__()
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise ImportError("Haar cascades need the opencv-python 4.x build")
+        if cascade is None:
+            cascade = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        self.classifier = cv2.CascadeClassifier(cascade)
+        if self.classifier.empty():
+            raise IOError(f"could not load Haar cascade {cascade}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = (min_size, min_size)
+
+    def _detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.classifier.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=self.min_size,
+        )
+        return [np.array([x, y, x + w, y + h]) for (x, y, w, h) in faces]
+
+
+class MotionDetector(Detector):
+    """
+    MOG2 background subtraction: anything that moves and is big enough is
+    reported. Works for a single player in front of a static background,
+    for almost no CPU.
+    """
+
+    name = "mog2"
+
+    def __init__(self, min_area=1500, history=300, max_boxes=1):
+        super().__init__()
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=history, detectShadows=False
+        )
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self.min_area = min_area
+        self.max_boxes = max_boxes
+
+    def _detect(self, frame):
+        mask = self.subtractor.apply(frame)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+        contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+        contours = [c for c in contours if cv2.contourArea(c) >= self.min_area]
+        contours.sort(key=cv2.contourArea, reverse=True)
+
+        boxes = []
+        for contour in contours[: self.max_boxes]:
+            (x, y, w, h) = cv2.boundingRect(contour)
+            boxes.append(np.array([x, y, x + w, y + h]))
+        return boxes
+
+
+class OnnxDetector(Detector):
+    """
+    SSD-style face detector exported to ONNX, run with ONNX Runtime on the
+    CPU. onnxruntime is optional and only imported when this backend is used.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model, confidence=0.5, threads=None, input_size=(300, 300)):
+        super().__init__()
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("the onnx backend needs: pip install onnxruntime")
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            model, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.confidence = confidence
+        self.input_size = input_size
+
+    def _detect(self, frame):
+        (H, W) = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(frame, 1.0, self.input_size, SSD_MEAN)
+        detections = self.session.run(None, {self.input_name: blob})[0]
+        return ssd_boxes(detections, self.confidence, W, H)
+
+
+BACKENDS = {
+    cls.name: cls
+    for cls in (SSDDetector, DnnDetector, HaarDetector, MotionDetector, OnnxDetector)
+}
+
+
+def innermost(detector):
+    """The backend under any SkippingDetector/RoiDetector wrappers"""
+    while hasattr(detector, "detector"):
+        detector = detector.detector
+    return detector
+
+
+class SkippingDetector:
+    """
+    Runs the wrapped detector only every `interval` frames and moves the
+    last boxes with Lucas-Kanade optical flow in between. Tracking falls
+    back to a full detection when too few feature points survive or the
+    player moves more than `motion_threshold` pixels in one frame.
+
+    With interval=None the interval adapts to measured timings: it is the
+    smallest N for which one detection plus N-1 tracked frames fits in
+    `frame_budget` seconds per frame on average.
+
+    Keeps state between frames, so use it with a single inference worker.
+    """
+
+    def __init__(
+        self,
+        detector,
+        interval=None,
+        frame_budget=1 / 30,
+        max_interval=10,
+        min_points=4,
+        motion_threshold=20,
+    ):
+        self.detector = detector
+        self.adaptive = interval is None
+        self.interval = 1 if interval is None else interval
+        self.frame_budget = frame_budget
+        self.max_interval = max_interval
+        self.min_points = min_points
+        self.motion_threshold = motion_threshold
+
+        self.prev_gray = None
+        self.boxes = []
+        self.since_detect = 0
+        self.detect_time = None
+        self.track_time = None
+        self.detections = 0
+        self.tracked = 0
+
+    def detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.boxes and self.since_detect < self.interval:
+            t0 = time.monotonic()
+            boxes = self._track(gray)
+            if boxes is not None:
+                self.track_time = _ema(self.track_time, time.monotonic() - t0)
+                self.boxes = boxes
+                self.prev_gray = gray
+                self.since_detect += 1
+                self.tracked += 1
+                return boxes
+
+        t0 = time.monotonic()
+        boxes = self.detector.detect(frame)
+        self.detect_time = _ema(self.detect_time, time.monotonic() - t0)
+        self.boxes = boxes
+        self.prev_gray = gray
+        self.since_detect = 1
+        self.detections += 1
+        if self.adaptive:
+            self._adapt()
+        return boxes
+
+    def _track(self, gray):
+        """Shift each box by the median optical flow of the features inside it"""
+        (H, W) = gray.shape[:2]
+        tracked = []
+        for box in self.boxes:
+            (startX, startY, endX, endY) = [int(v) for v in box]
+            mask = np.zeros_like(self.prev_gray)
+            mask[max(startY, 0) : max(endY, 0), max(startX, 0) : max(endX, 0)] = 255
+            points = cv2.goodFeaturesToTrack(
+                self.prev_gray, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask
+            )
+            if points is None or len(points) < self.min_points:
+                return None
+
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None)
+            good = status.ravel() == 1
+            if good.sum() < self.min_points:
+                return None
+
+            (dx, dy) = np.median((moved - points)[good].reshape(-1, 2), axis=0)
+            if np.hypot(dx, dy) > self.motion_threshold:
+                # big jump, let the detector find the player again
+                return None
+
+            shifted = np.array([startX + dx, startY + dy, endX + dx, endY + dy])
+            shifted = np.clip(shifted, 0, [W, H, W, H])
+            tracked.append(shifted.round().astype("int"))
+        return tracked
+
+    def _adapt(self):
+        if self.track_time is None:
+            # haven't tracked yet, try skipping one frame to measure it
+            self.interval = 2
+            return
+        if self.detect_time <= self.frame_budget:
+            self.interval = 1
+        elif self.track_time >= self.frame_budget:
+            self.interval = self.max_interval
+        else:
+            needed = (self.detect_time - self.track_time) / (self.frame_budget - self.track_time)
+            self.interval = min(max(int(np.ceil(needed)), 1), self.max_interval)
+
+
+def _ema(previous, sample, alpha=0.2):
+    if previous is None:
+        return sample
+    return previous + alpha * (sample - previous)
+
+
+class RoiDetector:
+    """
+    Runs the wrapped detector on a crop around the player's last box instead
+    of the whole frame. The crop is the last boxes (the same ones the
+    CentroidTracker gets) grown by `margin` box sizes on every side and at
+    least `min_size` pixels across. After `max_misses` crops in a row with
+    nothing found it goes back to the full frame.
+
+    Keeps state between frames, so use it with a single inference worker.
+    """
+
+    def __init__(self, detector, margin=1.0, min_size=120, max_misses=2):
+        self.detector = detector
+        self.margin = margin
+        self.min_size = min_size
+        self.max_misses = max_misses
+
+        self.boxes = []
+        self.misses = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.pixels = 0
+
+    def region(self, frame_shape):
+        """Crop (startX, startY, endX, endY) for the next frame, or None"""
+        if not self.boxes:
+            return None
+        (H, W) = frame_shape[:2]
+        boxes = np.array(self.boxes)
+        (startX, startY) = boxes[:, 0:2].min(axis=0)
+        (endX, endY) = boxes[:, 2:4].max(axis=0)
+
+        padX = max(self.margin * (endX - startX), (self.min_size - (endX - startX)) / 2)
+        padY = max(self.margin * (endY - startY), (self.min_size - (endY - startY)) / 2)
+        region = (
+            int(max(startX - padX, 0)),
+            int(max(startY - padY, 0)),
+            int(min(endX + padX, W)),
+            int(min(endY + padY, H)),
+        )
+        if region[2] - region[0] <= 0 or region[3] - region[1] <= 0:
+            return None
+        return region
+
+    def detect(self, frame):
+        region = self.region(frame.shape)
+        if region is not None:
+            (startX, startY, endX, endY) = region
+            crop = frame[startY:endY, startX:endX]
+            self.pixels += crop.shape[0] * crop.shape[1]
+            self.roi_frames += 1
+            boxes = self.detector.detect(crop)
+            if boxes:
+                self.misses = 0
+                offset = np.array([startX, startY, startX, startY])
+                self.boxes = [box + offset for box in boxes]
+                return self.boxes
+
+            self.misses += 1
+            if self.misses < self.max_misses:
+                # keep looking in the same place for a frame or two
+                return []
+
+        # nothing to crop around (yet): search the whole frame
+        self.pixels += frame.shape[0] * frame.shape[1]
+        self.full_frames += 1
+        self.misses = 0
+        self.boxes = list(self.detector.detect(frame))
+        return self.boxes
@@ -0,0 +1,336 @@
+"""
+pipeline.py
+
+Staged detection pipeline for the position tracker:
+
+    capture thread -> inference worker(s) -> tracker/publisher
+
+Stages are connected by small bounded queues that drop the oldest frame
+when full, so a slow detector always works on the newest frame instead of
+falling further and further behind the camera. Each stage records its
+latency so the pipeline can report frames per second and where the time
+goes.
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import imutils
+
+FRAME_WIDTH = 400
+
+
+class StageStats:
+    """Latency samples for one pipeline stage (most recent `window` only)"""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def mean_ms(self):
+        if not self.samples:
+            return 0.0
+        return 1000 * sum(self.samples) / len(self.samples)
+
+    def percentile_ms(self, pct):
+        if not self.samples:
+            return 0.0
+        return 1000 * float(np.percentile(self.samples, pct))
+
+
+def put_latest(q, item):
+    """Put item on a bounded queue, discarding the oldest entries if full"""
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+
+class CameraSource:
+    """Webcam through imutils, as used by the game"""
+
+    def __init__(self, src=0, warmup=2.0):
+        from imutils.video import VideoStream
+
+        self.stream = VideoStream(src=src).start()
+        # allow the camera sensor to warmup
+        time.sleep(warmup)
+
+    def read(self):
+        return self.stream.read()
+
+    def stop(self):
+        self.stream.stop()
+
+
+class VideoFileSource:
+    """
+    Frames from a recorded clip. With realtime=True frames are paced at the
+    clip's frame rate, like a camera; otherwise they are read as fast as
+    the pipeline takes them.
+    """
+
+    def __init__(self, path, realtime=False, loop=False):
+        import cv2
+
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f"could not open video {path}")
+        fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.interval = 1.0 / fps if realtime and fps > 0 else 0
+        self.loop = loop
+        self.next_time = time.monotonic()
+
+    def read(self):
+        import cv2
+
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        if not ok:
+            return None
+        if self.interval:
+            self.next_time += self.interval
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return frame
+
+    def stop(self):
+        self.capture.release()
+
+
+class SyntheticSource:
+    """
+    Generated frames with a bright, textured face-sized blob sweeping left
+    and right, for benchmarking without a camera or video file.
+    """
+
+    def __init__(self, frames=300, width=640, height=480, fps=None, seed=0):
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.interval = 1.0 / fps if fps else 0
+        self.index = 0
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+        # textured so optical flow has features to follow, like a real face
+        self.size = height // 6
+        self.face = rng.integers(
+            160, 255, (2 * self.size, 2 * self.size, 3), dtype=np.uint8
+        )
+        self.next_time = time.monotonic()
+
+    def position(self, index):
+        """Centroid of the blob in frame `index`"""
+        phase = np.sin(2 * np.pi * index / 120)
+        x = int(self.width / 2 + phase * self.width / 3)
+        return (x, self.height // 2)
+
+    def read(self):
+        if self.frames is not None and self.index >= self.frames:
+            return None
+        frame = self.background.copy()
+        (x, y) = self.position(self.index)
+        size = self.size
+        left = max(x - size, 0)
+        right = min(x + size, self.width)
+        frame[y - size : y + size, left:right] = self.face[
+            :, left - (x - size) : right - (x - size)
+        ]
+        self.index += 1
+        if self.interval:
+            self.next_time += self.interval
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return frame
+
+    def stop(self):
+        pass
+
+
+class DetectionPipeline:
+    """
+    source:        object with read() (None at end of stream) and stop()
+    make_detector: called once per inference worker, returns an object with
+                   detect(frame) -> list of boxes
+    tracker:       CentroidTracker (only touched by the publisher stage)
+    publish:       called with (objects, frame_width) for every tracked frame
+    """
+
+    def __init__(
+        self,
+        source,
+        make_detector,
+        tracker,
+        publish,
+        workers=1,
+        queue_size=2,
+        frame_width=FRAME_WIDTH,
+    ):
+        self.source = source
+        self.make_detector = make_detector
+        self.tracker = tracker
+        self.publish = publish
+        self.num_workers = workers
+        self.frame_width = frame_width
+
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+
+        self.stats = {
+            name: StageStats()
+            for name in ("capture", "queue", "inference", "tracking", "publish", "total")
+        }
+        self.captured = 0
+        self.published = 0
+        self.dropped_frames = 0
+        self.dropped_results = 0
+        self.stale_results = 0
+
+        self.stopping = threading.Event()
+        self.capture_done = threading.Event()
+        self.workers_running = 0
+        self._lock = threading.Lock()
+        self.threads = []
+        self.start_time = None
+        self.end_time = None
+
+    def start(self):
+        self.threads = [threading.Thread(target=self._capture, daemon=True)]
+        self.workers_running = self.num_workers
+        # build detectors up front so model loading isn't counted as latency
+        for _ in range(self.num_workers):
+            detector = self.make_detector()
+            self.threads.append(
+                threading.Thread(target=self._infer, args=(detector,), daemon=True)
+            )
+        self.start_time = time.monotonic()
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.source.stop()
+        if self.end_time is None:
+            self.end_time = time.monotonic()
+
+    def run(self, duration=None):
+        """
+        Start the pipeline and run the tracker/publisher stage in the calling
+        thread until the source runs out, stop() is called or `duration`
+        seconds have passed.
+        """
+        self.start()
+        deadline = None if duration is None else time.monotonic() + duration
+        last_frame_id = -1
+        try:
+            while not self.stopping.is_set():
+                if deadline is not None and time.monotonic() > deadline:
+                    break
+                try:
+                    frame_id, captured_at, rects = self.result_queue.get(timeout=0.1)
+                except queue.Empty:
+                    with self._lock:
+                        finished = self.workers_running == 0
+                    if finished and self.result_queue.empty():
+                        break
+                    continue
+
+                # with several workers results can arrive out of order
+                if frame_id < last_frame_id:
+                    self.stale_results += 1
+                    continue
+                last_frame_id = frame_id
+
+                t0 = time.monotonic()
+                objects = self.tracker.update(rects)
+                t1 = time.monotonic()
+                self.publish(objects, self.frame_width)
+                t2 = time.monotonic()
+
+                self.stats["tracking"].add(t1 - t0)
+                self.stats["publish"].add(t2 - t1)
+                self.stats["total"].add(t2 - captured_at)
+                self.published += 1
+        finally:
+            self.end_time = time.monotonic()
+            self.stop()
+
+    def _capture(self):
+        frame_id = 0
+        while not self.stopping.is_set():
+            t0 = time.monotonic()
+            frame = self.source.read()
+            if frame is None:
+                break
+            frame = imutils.resize(frame, width=self.frame_width)
+            t1 = time.monotonic()
+            self.stats["capture"].add(t1 - t0)
+
+            self.dropped_frames += put_latest(self.frame_queue, (frame_id, t0, t1, frame))
+            self.captured += 1
+            frame_id += 1
+        self.capture_done.set()
+
+    def _infer(self, detector):
+        try:
+            while not self.stopping.is_set():
+                try:
+                    frame_id, captured_at, queued_at, frame = self.frame_queue.get(
+                        timeout=0.1
+                    )
+                except queue.Empty:
+                    if self.capture_done.is_set() and self.frame_queue.empty():
+                        break
+                    continue
+
+                t0 = time.monotonic()
+                rects = detector.detect(frame)
+                t1 = time.monotonic()
+                self.stats["queue"].add(t0 - queued_at)
+                self.stats["inference"].add(t1 - t0)
+
+                dropped = put_latest(self.result_queue, (frame_id, captured_at, rects))
+                with self._lock:
+                    self.dropped_results += dropped
+        finally:
+            with self._lock:
+                self.workers_running -= 1
+
+    def fps(self):
+        end = self.end_time or time.monotonic()
+        elapsed = end - self.start_time if self.start_time else 0
+        return self.published / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        """Human readable summary of throughput and per-stage latency"""
+        lines = [
+            f"[INFO] captured {self.captured} frames, published {self.published} "
+            f"({self.fps():.1f} FPS)",
+            f"[INFO] dropped {self.dropped_frames} stale frames, "
+            f"{self.dropped_results + self.stale_results} stale results",
+        ]
+        for name, stats in self.stats.items():
+            lines.append(
+                f"[INFO] {name:>9}: mean {stats.mean_ms():7.2f} ms  "
+                f"p95 {stats.percentile_ms(95):7.2f} ms  (n={stats.count})"
+            )
+        return "\n".join(lines)
@@ -1,53 +1,105 @@
-
 # Credit to https://github.com/Practical-CV/Simple-object-tracking-with-OpenCV
 # USAGE
 # python position_tracker.py --prototxt deploy.prototxt --model res10_300x300_ssd_iter_140000.caffemodel
+#
+# Benchmark without the game or a camera:
+# python position_tracker.py --prototxt deploy.prototxt --model res10_300x300_ssd_iter_140000.caffemodel --benchmark --video clip.mp4
+# python position_tracker.py --prototxt deploy.prototxt --model res10_300x300_ssd_iter_140000.caffemodel --benchmark --synthetic 500
+#
+# Other detection backends:
+# python position_tracker.py --backend dnn --model face.onnx --input-size 300 --threads 2
+# python position_tracker.py --backend haar
+# python position_tracker.py --backend mog2
+# python position_tracker.py --backend onnx --model face.onnx
+
+import time
+
+# process start, for the startup time reported in the Ready frame
+START_TIME = time.monotonic()
 
 # import the necessary packages
 from pyimagesearch.centroidtracker import CentroidTracker
-from imutils.video import VideoStream
-import numpy as np
+from detectors import (BACKENDS, DNN_BACKENDS, DNN_TARGETS, SSDDetector, DnnDetector,
+    HaarDetector, MotionDetector, OnnxDetector, SkippingDetector, RoiDetector, innermost)
+from pipeline import DetectionPipeline, CameraSource, VideoFileSource, SyntheticSource
 import argparse
-import imutils
-import cv2
-import socket, time
-def connect_with_retry():
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    while True:
-        try:
-            client_socket.connect(('localhost', 8081))
-            print("camera connected to server")
-            return client_socket
-        except ConnectionRefusedError:
-            print("Server not available, retrying in 1 second...")
-            time.sleep(1)
-
-client_socket = connect_with_retry()
-print("Camera socket has been connected")
+import socket
+import sys, os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sensor_io.framing import HEARTBEAT_INTERVAL, pack_heartbeat, pack_position, pack_ready
+from sensor_io.client import connect_with_retry
+from sensor_io.shm_ring import ShmRing
+from sensor_io.recording import RecordingWriter
 
 # construct the argument parse and parse the arguments
 ap = argparse.ArgumentParser()
-ap.add_argument("-p", "--prototxt", required=True,
+ap.add_argument("-p", "--prototxt",
 	help="path to Caffe 'deploy' prototxt file")
-ap.add_argument("-m", "--model", required=True,
-	help="path to Caffe pre-trained model")
+ap.add_argument("-m", "--model",
+	help="path to Caffe pre-trained model (or .onnx for the dnn/onnx backends)")
+ap.add_argument("-e", "--backend", choices=sorted(BACKENDS), default="ssd",
+	help="detection backend")
+ap.add_argument("--dnn-backend", choices=sorted(DNN_BACKENDS), default="default",
+	help="OpenCV dnn backend for the dnn backend")
+ap.add_argument("--dnn-target", choices=sorted(DNN_TARGETS), default="cpu",
+	help="OpenCV dnn target for the dnn backend")
+ap.add_argument("-t", "--threads", type=int, default=None,
+	help="inference threads for the dnn/onnx backends")
+ap.add_argument("--input-size", type=int, default=300,
+	help="square network input size for the dnn/onnx backends")
 ap.add_argument("-c", "--confidence", type=float, default=0.5,
 	help="minimum probability to filter weak detections")
+ap.add_argument("-v", "--video",
+	help="read frames from a video file instead of the camera")
+ap.add_argument("-s", "--synthetic", type=int, default=0,
+	help="use this many generated frames instead of the camera")
+ap.add_argument("--realtime", action="store_true",
+	help="pace video/synthetic frames at camera rate instead of max speed")
+ap.add_argument("-w", "--workers", type=int, default=1,
+	help="number of inference workers")
+ap.add_argument("-k", "--skip", type=int, default=1,
+	help="run the detector every N frames and track in between "
+	"(1 = every frame, 0 = pick N from measured inference time)")
+ap.add_argument("-r", "--roi", action="store_true",
+	help="run the detector on a crop around the player's last position")
+ap.add_argument("-d", "--max-distance", type=float, default=None,
+	help="largest centroid jump in pixels still matched to the same player")
+ap.add_argument("-b", "--benchmark", action="store_true",
+	help="don't connect to the game, print a latency report at the end")
+ap.add_argument("--shm",
+	help="write positions to the game's shared memory ring with this name "
+	"instead of port 8081")
+ap.add_argument("--record",
+	help="also append every record sent to this recording file "
+	"(with --benchmark, only record)")
 args = vars(ap.parse_args())
 
-# initialize our centroid tracker and frame dimensions
-ct = CentroidTracker()
-
-(H, W) = (None, None)
-
-# load our serialized model from disk
-print("[INFO] loading model...")
-net = cv2.dnn.readNetFromCaffe(args["prototxt"], args["model"])
-
-# initialize the video stream and allow the camera sensor to warmup
-print("[INFO] starting video stream...")
-vs = VideoStream(src=0).start()
-time.sleep(2.0)
+if args["backend"] == "ssd" and not (args["prototxt"] and args["model"]):
+    ap.error("the ssd backend needs --prototxt and --model")
+if args["backend"] in ("dnn", "onnx") and not args["model"]:
+    ap.error(f"the {args['backend']} backend needs --model")
+# each worker has its own detector, so ROI and track state would follow
+# whichever frames that worker happened to get
+if (args["roi"] or args["skip"] != 1) and args["workers"] > 1:
+    ap.error("--roi and --skip need a single inference worker (--workers 1)")
+# the background model has to see every frame at the same size
+if args["roi"] and args["backend"] == "mog2":
+    ap.error("--roi does not work with the mog2 backend")
+
+# a ShmRing has the same sendall() as the socket
+client_socket = None
+if args["shm"]:
+    client_socket = ShmRing.attach(args["shm"])
+    print(f"Camera attached to shared memory ring {args['shm']}")
+elif not args["benchmark"]:
+    client_socket = connect_with_retry(8081)
+    print("Camera socket has been connected")
+if args["record"]:
+    client_socket = RecordingWriter(client_socket, args["record"])
+
+# initialize our centroid tracker
+ct = CentroidTracker(maxDistance=args["max_distance"])
 
 # calculate distance from center along x-axis
 def calculate_x_axis_distance_from_center(centroid, frame_width):
@@ -55,78 +107,110 @@ def calculate_x_axis_distance_from_center(centroid, frame_width):
     distance_from_center = centroid[0] - center_x
     return distance_from_center
 
-def is_valid_float(value):
-    try:
-        float(str(value))
-        return True
-    except:
-        return False
-
-# loop over the frames from the video stream
-while True:
-	# read the next frame from the video stream and resize it
-	frame = vs.read()
-	frame = imutils.resize(frame, width=400)
-
-	# if the frame dimensions are None, grab them
-	if W is None or H is None:
-		(H, W) = frame.shape[:2]
-
-	# construct a blob from the frame, pass it through the network,
-	# obtain our output predictions, and initialize the list of
-	# bounding box rectangles
-	blob = cv2.dnn.blobFromImage(frame, 1.0, (W, H),
-		(104.0, 177.0, 123.0))
-	net.setInput(blob)
-	detections = net.forward()
-	rects = []
-
-	# loop over the detections
-	for i in range(0, detections.shape[2]):
-		# filter out weak detections by ensuring the predicted
-		# probability is greater than a minimum threshold
-		if detections[0, 0, i, 2] > args["confidence"]:
-			# compute the (x, y)-coordinates of the bounding box for
-			# the object, then update the bounding box rectangles list
-			box = detections[0, 0, i, 3:7] * np.array([W, H, W, H])
-			rects.append(box.astype("int"))
-
-			# draw a bounding box surrounding the object so we can
-			# visualize it
-			# (startX, startY, endX, endY) = box.astype("int")
-			# cv2.rectangle(frame, (startX, startY), (endX, endY),
-			# 	(0, 255, 0), 2)
-
-	# update our centroid tracker using the computed set of bounding
-	# box rectangles
-	objects = ct.update(rects)
-
-	# loop over the tracked objects
-	for (objectID, centroid) in objects.items():
-
-		distance = calculate_x_axis_distance_from_center(centroid, W)
-		if is_valid_float(distance):
-			try:
-				client_socket.send(str(distance).encode())
-			except socket.error:
-				pass
-		# print(f"distance: {distance}")
-
-		# # draw both the ID of the object and the centroid of the
-		# # object on the output frame
-		# text = "ID {}".format(objectID)
-		# cv2.putText(frame, text, (centroid[0] - 10, centroid[1] - 10),
-		# 	cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-		# cv2.circle(frame, (centroid[0], centroid[1]), 4, (0, 255, 0), -1)
-		
-	# # show the output frame
-	# cv2.imshow("Frame", frame)
-	# key = cv2.waitKey(1) & 0xFF
-
-	# # if the `q` key was pressed, break from the loop
-	# if key == ord("q"):
-	# 	break
-
-# do a bit of cleanup
-cv2.destroyAllWindows()
-vs.stop()
\ No newline at end of file
+class PositionPublisher:
+    """
+    Sends one timestamped position record per frame, for the primary player
+    only: the tracker ID we have been following, or the oldest tracked
+    object once that ID is gone. Before the first frame's result it sends a
+    Ready record: by then the model is loaded and the camera is delivering.
+    A heartbeat goes out every HEARTBEAT_INTERVAL while frames are being
+    processed, so a stalled pipeline stops them even though the process
+    is still running.
+    """
+
+    def __init__(self, client_socket):
+        self.client_socket = client_socket
+        self.primary_id = None
+        self.seq = 0
+        self.ready_sent = False
+        self.last_heartbeat = 0.0
+
+    def send(self, data):
+        if self.client_socket is not None:
+            try:
+                self.client_socket.sendall(data)
+            except socket.error:
+                pass
+
+    def __call__(self, objects, W):
+        if not self.ready_sent:
+            now = time.monotonic()
+            self.send(pack_ready(now, now - START_TIME))
+            print(f"[INFO] ready after {now - START_TIME:.2f} s")
+            self.ready_sent = True
+
+        now = time.monotonic()
+        if now - self.last_heartbeat >= HEARTBEAT_INTERVAL:
+            self.send(pack_heartbeat(now))
+            self.last_heartbeat = now
+
+        if len(objects) == 0:
+            return
+        if self.primary_id not in objects:
+            self.primary_id = min(objects)
+
+        distance = calculate_x_axis_distance_from_center(objects[self.primary_id], W)
+        self.send(pack_position(self.seq, time.monotonic(), self.primary_id, distance))
+        self.seq += 1
+
+publish = PositionPublisher(client_socket)
+
+detectors = []
+
+def make_detector():
+    # load our serialized model from disk (once per inference worker)
+    print(f"[INFO] loading {args['backend']} detector...")
+    size = (args["input_size"], args["input_size"])
+    if args["backend"] == "ssd":
+        detector = SSDDetector(args["prototxt"], args["model"], args["confidence"])
+    elif args["backend"] == "dnn":
+        detector = DnnDetector(args["model"], args["prototxt"] or "", args["confidence"],
+            backend=args["dnn_backend"], target=args["dnn_target"],
+            threads=args["threads"], input_size=size)
+    elif args["backend"] == "onnx":
+        detector = OnnxDetector(args["model"], args["confidence"],
+            threads=args["threads"], input_size=size)
+    elif args["backend"] == "haar":
+        detector = HaarDetector()
+    else:
+        detector = MotionDetector()
+    if args["roi"]:
+        detector = RoiDetector(detector)
+    if args["skip"] != 1:
+        detector = SkippingDetector(detector, interval=args["skip"] or None)
+    detectors.append(detector)
+    return detector
+
+# pick the frame source
+if args["video"]:
+    print(f"[INFO] reading frames from {args['video']}...")
+    source = VideoFileSource(args["video"], realtime=args["realtime"])
+elif args["synthetic"]:
+    print("[INFO] generating synthetic frames...")
+    source = SyntheticSource(frames=args["synthetic"], fps=30 if args["realtime"] else None)
+else:
+    # initialize the video stream and allow the camera sensor to warmup
+    print("[INFO] starting video stream...")
+    source = CameraSource(src=0)
+
+# capture, inference and tracking/publishing run as separate stages
+pipeline = DetectionPipeline(source, make_detector, ct, publish, workers=args["workers"])
+try:
+    pipeline.run()
+except KeyboardInterrupt:
+    pass
+
+if args["benchmark"]:
+    print(pipeline.report())
+    for detector in detectors:
+        backend = innermost(detector)
+        print(f"[INFO] {backend.name} backend: {backend.mean_latency_ms():.2f} ms/frame "
+            f"over {backend.frames} frames")
+        if isinstance(detector, SkippingDetector):
+            print(f"[INFO] ran detector on {detector.detections} frames, "
+                f"tracked {detector.tracked} (interval {detector.interval})")
+            detector = detector.detector
+        if isinstance(detector, RoiDetector):
+            frames = max(detector.roi_frames + detector.full_frames, 1)
+            print(f"[INFO] {detector.roi_frames} ROI / {detector.full_frames} full-frame detections, "
+                f"{detector.pixels / frames:.0f} pixels per detection")
@@ -1,153 +1,136 @@
 # import the necessary packages
 from scipy.spatial import distance as dist
+from scipy.optimize import linear_sum_assignment
 from collections import OrderedDict
 import numpy as np
 
 class CentroidTracker():
-	def __init__(self, maxDisappeared=50):
-		# initialize the next unique object ID along with two ordered
-		# dictionaries used to keep track of mapping a given object
-		# ID to its centroid and number of consecutive frames it has
-		# been marked as "disappeared", respectively
+	def __init__(self, maxDisappeared=50, maxDistance=None, capacity=16):
+		# initialize the next unique object ID
 		self.nextObjectID = 0
-		self.objects = OrderedDict()
-		self.disappeared = OrderedDict()
+
+		# tracked objects live in preallocated arrays: slots [0, count)
+		# are in use, in registration order, holding each object's ID,
+		# centroid and number of consecutive frames it has been marked
+		# as "disappeared"
+		self.count = 0
+		self.ids = np.zeros(capacity, dtype="int")
+		self.centroids = np.zeros((capacity, 2), dtype="int")
+		self.disappearedFrames = np.zeros(capacity, dtype="int")
 
 		# store the number of maximum consecutive frames a given
 		# object is allowed to be marked as "disappeared" until we
 		# need to deregister the object from tracking
 		self.maxDisappeared = maxDisappeared
 
+		# matches further apart than this (in pixels) are not allowed;
+		# None matches every object regardless of distance
+		self.maxDistance = maxDistance
+
+	@property
+	def objects(self):
+		# object ID -> centroid, in registration order
+		n = self.count
+		return OrderedDict(zip(self.ids[:n].tolist(), self.centroids[:n].copy()))
+
+	@property
+	def disappeared(self):
+		n = self.count
+		return OrderedDict(zip(self.ids[:n].tolist(), self.disappearedFrames[:n].tolist()))
+
 	def register(self, centroid):
+		# grow the arrays when they are full
+		if self.count == len(self.ids):
+			capacity = 2 * len(self.ids)
+			self.ids = np.resize(self.ids, capacity)
+			self.centroids = np.resize(self.centroids, (capacity, 2))
+			self.disappearedFrames = np.resize(self.disappearedFrames, capacity)
+
 		# when registering an object we use the next available object
 		# ID to store the centroid
-		self.objects[self.nextObjectID] = centroid
-		self.disappeared[self.nextObjectID] = 0
+		self.ids[self.count] = self.nextObjectID
+		self.centroids[self.count] = centroid
+		self.disappearedFrames[self.count] = 0
+		self.count += 1
 		self.nextObjectID += 1
 
 	def deregister(self, objectID):
-		# to deregister an object ID we delete the object ID from
-		# both of our respective dictionaries
-		del self.objects[objectID]
-		del self.disappeared[objectID]
+		slots = np.flatnonzero(self.ids[:self.count] == objectID)
+		if len(slots):
+			keep = np.ones(self.count, dtype=bool)
+			keep[slots] = False
+			self._compact(keep)
+
+	def _compact(self, keep):
+		# move the objects we keep to the front, preserving their order
+		n = int(keep.sum())
+		self.ids[:n] = self.ids[:self.count][keep]
+		self.centroids[:n] = self.centroids[:self.count][keep]
+		self.disappearedFrames[:n] = self.disappearedFrames[:self.count][keep]
+		self.count = n
+
+	def _deregisterMissing(self):
+		# deregister every object that has been missing for too long
+		expired = self.disappearedFrames[:self.count] > self.maxDisappeared
+		if expired.any():
+			self._compact(~expired)
 
 	def update(self, rects):
+		n = self.count
+
 		# check to see if the list of input bounding box rectangles
 		# is empty
 		if len(rects) == 0:
-			# loop over any existing tracked objects and mark them
-			# as disappeared
-			for objectID in self.disappeared.keys():
-				self.disappeared[objectID] += 1
-
-				# if we have reached a maximum number of consecutive
-				# frames where a given object has been marked as
-				# missing, deregister it
-				if self.disappeared[objectID] > self.maxDisappeared:
-					self.deregister(objectID)
-
-			# return early as there are no centroids or tracking info
-			# to update
+			# mark all existing tracked objects as disappeared and drop
+			# the ones that have been missing too long
+			self.disappearedFrames[:n] += 1
+			self._deregisterMissing()
 			return self.objects
 
-		# initialize an array of input centroids for the current frame
-		inputCentroids = np.zeros((len(rects), 2), dtype="int")
-
-		# loop over the bounding box rectangles
-		for (i, (startX, startY, endX, endY)) in enumerate(rects):
-			# use the bounding box coordinates to derive the centroid
-			cX = int((startX + endX) / 2.0)
-			cY = int((startY + endY) / 2.0)
-			inputCentroids[i] = (cX, cY)
+		# use the bounding box coordinates to derive the centroids
+		rects = np.asarray(rects).reshape(-1, 4)
+		inputCentroids = ((rects[:, 0:2] + rects[:, 2:4]) / 2.0).astype("int")
 
 		# if we are currently not tracking any objects take the input
 		# centroids and register each of them
-		if len(self.objects) == 0:
-			for i in range(0, len(inputCentroids)):
-				self.register(inputCentroids[i])
+		if n == 0:
+			for centroid in inputCentroids:
+				self.register(centroid)
+			return self.objects
 
-		# otherwise, are are currently tracking objects so we need to
-		# try to match the input centroids to existing object
-		# centroids
+		# compute the distance between each pair of object centroids
+		# and input centroids, then find the assignment with the
+		# smallest total distance
+		D = dist.cdist(self.centroids[:n], inputCentroids)
+		if n == 1:
+			# single player in front of the camera: the nearest input wins
+			rows, cols = np.zeros(1, dtype="int"), D[0].argmin(keepdims=True)
+		elif len(inputCentroids) == 1:
+			rows, cols = D[:, 0].argmin(keepdims=True), np.zeros(1, dtype="int")
 		else:
-			# grab the set of object IDs and corresponding centroids
-			objectIDs = list(self.objects.keys())
-			objectCentroids = list(self.objects.values())
-
-			# compute the distance between each pair of object
-			# centroids and input centroids, respectively -- our
-			# goal will be to match an input centroid to an existing
-			# object centroid
-			D = dist.cdist(np.array(objectCentroids), inputCentroids)
-
-			# in order to perform this matching we must (1) find the
-			# smallest value in each row and then (2) sort the row
-			# indexes based on their minimum values so that the row
-			# with the smallest value as at the *front* of the index
-			# list
-			rows = D.min(axis=1).argsort()
-
-			# next, we perform a similar process on the columns by
-			# finding the smallest value in each column and then
-			# sorting using the previously computed row index list
-			cols = D.argmin(axis=1)[rows]
-
-			# in order to determine if we need to update, register,
-			# or deregister an object we need to keep track of which
-			# of the rows and column indexes we have already examined
-			usedRows = set()
-			usedCols = set()
-
-			# loop over the combination of the (row, column) index
-			# tuples
-			for (row, col) in zip(rows, cols):
-				# if we have already examined either the row or
-				# column value before, ignore it
-				# val
-				if row in usedRows or col in usedCols:
-					continue
-
-				# otherwise, grab the object ID for the current row,
-				# set its new centroid, and reset the disappeared
-				# counter
-				objectID = objectIDs[row]
-				self.objects[objectID] = inputCentroids[col]
-				self.disappeared[objectID] = 0
-
-				# indicate that we have examined each of the row and
-				# column indexes, respectively
-				usedRows.add(row)
-				usedCols.add(col)
-
-			# compute both the row and column index we have NOT yet
-			# examined
-			unusedRows = set(range(0, D.shape[0])).difference(usedRows)
-			unusedCols = set(range(0, D.shape[1])).difference(usedCols)
-
-			# in the event that the number of object centroids is
-			# equal or greater than the number of input centroids
-			# we need to check and see if some of these objects have
-			# potentially disappeared
-			if D.shape[0] >= D.shape[1]:
-				# loop over the unused row indexes
-				for row in unusedRows:
-					# grab the object ID for the corresponding row
-					# index and increment the disappeared counter
-					objectID = objectIDs[row]
-					self.disappeared[objectID] += 1
-
-					# check to see if the number of consecutive
-					# frames the object has been marked "disappeared"
-					# for warrants deregistering the object
-					if self.disappeared[objectID] > self.maxDisappeared:
-						self.deregister(objectID)
-
-			# otherwise, if the number of input centroids is greater
-			# than the number of existing object centroids we need to
-			# register each new input centroid as a trackable object
-			else:
-				for col in unusedCols:
-					self.register(inputCentroids[col])
+			rows, cols = linear_sum_assignment(D)
+
+		# reject matches that moved further than the gate allows
+		if self.maxDistance is not None:
+			close = D[rows, cols] <= self.maxDistance
+			rows, cols = rows[close], cols[close]
+
+		# matched objects take the new centroid and are seen again
+		self.centroids[rows] = inputCentroids[cols]
+		self.disappearedFrames[rows] = 0
+
+		# objects without a match may have disappeared
+		unmatchedRows = np.ones(n, dtype=bool)
+		unmatchedRows[rows] = False
+		self.disappearedFrames[:n][unmatchedRows] += 1
+
+		# input centroids without a match are new objects
+		unmatchedCols = np.ones(len(inputCentroids), dtype=bool)
+		unmatchedCols[cols] = False
+
+		self._deregisterMissing()
+		for centroid in inputCentroids[unmatchedCols]:
+			self.register(centroid)
 
 		# return the set of trackable objects
-		return self.objects
\ No newline at end of file
+		return self.objects
@@ -0,0 +1,29 @@
+"""
+client.py
+
+Socket setup for the sensor processes. The game listens before it launches
+them, so the first connect normally succeeds; if it does not (the game is
+still starting, or a sensor script is run by hand first) the connect is
+retried with a short, growing delay instead of a fixed second.
+"""
+import socket
+import time
+
+# delay before the second attempt, doubled up to MAX_RETRY_DELAY
+FIRST_RETRY_DELAY = 0.05
+MAX_RETRY_DELAY = 1.0
+
+
+def connect_with_retry(port, host="localhost", enable_print=False,
+                       first_delay=FIRST_RETRY_DELAY, max_delay=MAX_RETRY_DELAY):
+    """Connect to the game's sensor server, waiting for it as long as it takes"""
+    delay = first_delay
+    while True:
+        try:
+            client_socket = socket.create_connection((host, port))
+            if enable_print: print(f"Connected to server on port {port}")
+            return client_socket
+        except ConnectionRefusedError:
+            if enable_print: print(f"Server not available, retrying in {delay:.2f} s...")
+            time.sleep(delay)
+            delay = min(2 * delay, max_delay)
@@ -0,0 +1,146 @@
+"""
+framing.py
+
+Binary wire format shared by the sensor processes and the game.
+
+Every message on the socket is a frame:
+
+    | length (u16) | type (u8) | payload (length bytes) |
+
+Payloads are fixed-size little-endian structs, so the length prefix is
+only needed to find frame boundaries and to skip message types an older
+reader does not know about. FrameDecoder is fed whatever recv() returns
+and yields complete records, which means partial and coalesced reads are
+both handled.
+"""
+import struct
+from collections import namedtuple
+
+HEADER = struct.Struct("<HB")
+
+# Message types
+MSG_IMU_SAMPLE = 1
+MSG_POSITION = 2
+MSG_READY = 3
+MSG_HEARTBEAT = 4
+
+# seq (u32), monotonic timestamp in seconds (f64), gyro x/y/z in DPS (f32)
+ImuSample = namedtuple("ImuSample", ["seq", "timestamp", "x", "y", "z"])
+IMU_SAMPLE_STRUCT = struct.Struct("<Idfff")
+
+# seq (u32), monotonic timestamp (f64), tracker object ID (i32),
+# lateral distance from the frame center in pixels (f32)
+Position = namedtuple("Position", ["seq", "timestamp", "object_id", "distance"])
+POSITION_STRUCT = struct.Struct("<Idif")
+
+# sent once a sensor process can deliver data (and again after it
+# reconnects to its device): monotonic timestamp (f64), seconds the process
+# took to get there from its start (f64)
+Ready = namedtuple("Ready", ["timestamp", "startup"])
+READY_STRUCT = struct.Struct("<dd")
+
+# sent every HEARTBEAT_INTERVAL by a sensor process that is alive, so the
+# game can tell a quiet sensor from a hung one: monotonic timestamp (f64)
+Heartbeat = namedtuple("Heartbeat", ["timestamp"])
+HEARTBEAT_STRUCT = struct.Struct("<d")
+HEARTBEAT_INTERVAL = 0.5
+
+# msg type -> (payload struct, record class)
+RECORD_TYPES = {
+    MSG_IMU_SAMPLE: (IMU_SAMPLE_STRUCT, ImuSample),
+    MSG_POSITION: (POSITION_STRUCT, Position),
+    MSG_READY: (READY_STRUCT, Ready),
+    MSG_HEARTBEAT: (HEARTBEAT_STRUCT, Heartbeat),
+}
+MSG_TYPES = {cls: msg_type for msg_type, (_, cls) in RECORD_TYPES.items()}
+
+
+class ProtocolError(ValueError):
+    """Raised when the byte stream cannot be decoded into frames."""
+
+
+def pack_record(record):
+    """
+    Serialize a record (one of the namedtuples above) into a single frame
+    """
+    msg_type = MSG_TYPES[type(record)]
+    payload_struct = RECORD_TYPES[msg_type][0]
+    return HEADER.pack(payload_struct.size, msg_type) + payload_struct.pack(*record)
+
+
+def pack_imu_sample(seq, timestamp, x, y, z):
+    return pack_record(ImuSample(seq & 0xFFFFFFFF, timestamp, x, y, z))
+
+
+def pack_position(seq, timestamp, object_id, distance):
+    return pack_record(Position(seq & 0xFFFFFFFF, timestamp, object_id, distance))
+
+
+def pack_ready(timestamp, startup):
+    return pack_record(Ready(timestamp, startup))
+
+
+def pack_heartbeat(timestamp):
+    return pack_record(Heartbeat(timestamp))
+
+
+class FrameDecoder:
+    """
+    Streaming decoder: feed() raw socket bytes, get back complete records.
+
+    Bytes belonging to an incomplete frame are kept until the rest arrives.
+    Sequence numbers are checked per message type so that lost samples show
+    up in `dropped` instead of going unnoticed.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._last_seq = {}
+        self.received = 0
+        self.dropped = 0
+
+    def feed(self, data):
+        self._buffer += data
+        buffer = self._buffer
+        records = []
+        offset = 0
+
+        while len(buffer) - offset >= HEADER.size:
+            length, msg_type = HEADER.unpack_from(buffer, offset)
+            start = offset + HEADER.size
+            end = start + length
+            if end > len(buffer):
+                break
+
+            if msg_type in RECORD_TYPES:
+                payload_struct, cls = RECORD_TYPES[msg_type]
+                if length != payload_struct.size:
+                    raise ProtocolError(
+                        f"bad length {length} for message type {msg_type}"
+                    )
+                record = cls._make(payload_struct.unpack_from(buffer, start))
+                self._track_sequence(msg_type, record)
+                records.append(record)
+            # unknown message types are skipped using the length prefix
+
+            offset = end
+
+        del buffer[:offset]
+        return records
+
+    def _track_sequence(self, msg_type, record):
+        self.received += 1
+        seq = getattr(record, "seq", None)
+        if seq is None:
+            return
+        last = self._last_seq.get(msg_type)
+        if last is not None:
+            gap = (seq - last - 1) & 0xFFFFFFFF
+            # a huge "gap" means the sender restarted its counter
+            if gap < 0x80000000:
+                self.dropped += gap
+        self._last_seq[msg_type] = seq
+
+    def pending(self):
+        """Number of buffered bytes that do not yet form a full frame"""
+        return len(self._buffer)
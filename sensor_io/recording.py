@@ -0,0 +1,80 @@
+"""
+recording.py
+
+Recordings of what a sensor process sent to the game. A recording is a
+short file header followed by the frames exactly as they went out (see
+framing.py), so every sample keeps its sequence number and monotonic
+timestamp, and Ready and heartbeat frames are kept too. At 27 bytes per
+IMU sample a minute at 60 Hz is under 100 kB.
+
+    | magic "BREC" | version (u16) | frame | frame | ...
+"""
+import os
+import struct
+
+from sensor_io.framing import FrameDecoder, ImuSample
+
+MAGIC = b"BREC"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+
+
+class RecordingWriter:
+    """
+    Passes sendall() on to out (a socket, a ShmRing or None) and appends
+    the same bytes to path. A sensor process restarted with the same path
+    adds to the existing recording.
+    """
+
+    def __init__(self, out, path):
+        self.out = out
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # unbuffered: the supervisor stops sensor processes with
+        # terminate(), which would lose whatever sat in a buffer
+        self.file = open(path, "ab", buffering=0)
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def sendall(self, data):
+        self.file.write(data)
+        if self.out is not None:
+            self.out.sendall(data)
+
+    def close(self):
+        self.file.close()
+        if self.out is not None:
+            self.out.close()
+
+
+def read_recording(path):
+    """Every record in the recording at path, in the order it was sent"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f"{path} is not a sensor recording")
+    magic, version = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a sensor recording")
+    if version != VERSION:
+        raise ValueError(f"{path} is recording version {version}, expected {VERSION}")
+    decoder = FrameDecoder()
+    # a process killed mid-write can leave a partial last frame, which
+    # the decoder just keeps
+    return decoder.feed(data[FILE_HEADER.size:])
+
+
+def load_imu(path):
+    """
+    The IMU samples of a recording as a NumPy structured array with
+    seq, timestamp, x, y and z fields
+    """
+    import numpy as np
+
+    dtype = np.dtype([
+        ("seq", np.uint32), ("timestamp", np.float64),
+        ("x", np.float32), ("y", np.float32), ("z", np.float32),
+    ])
+    samples = [record for record in read_recording(path) if isinstance(record, ImuSample)]
+    return np.array(samples, dtype=dtype)
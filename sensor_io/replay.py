@@ -0,0 +1,98 @@
+"""
+replay.py
+
+Usage:
+$ python replay.py ../recordings/imu-20260101-120000.brec [--speed 1]
+
+Options:
+--speed N   N times the recorded pace; 0 sends everything as fast as possible
+--port P    game port to send to (default: 8080 for IMU, 8081 for camera recordings)
+--shm NAME  write to the game's shared memory ring instead of a port
+--loop      start over at the end
+--hold      after the end, stay connected and send heartbeats until stopped
+
+Streams a recording made with central.py or position_tracker.py --record
+into the game the way the sensor process did, so the game can be run and
+measured without the IMU or camera. Frames keep their recorded sequence
+numbers and timestamps; only their pacing is scaled.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sensor_io.client import connect_with_retry
+from sensor_io.framing import HEARTBEAT_INTERVAL, ImuSample, Position, pack_heartbeat, pack_record
+from sensor_io.recording import read_recording
+from sensor_io.shm_ring import ShmRing
+
+# game port for the first sample type in a recording
+DEFAULT_PORTS = {ImuSample: 8080, Position: 8081}
+# frames per sendall at full speed, well below a ring's capacity
+MAX_BATCH = 256
+
+
+def replay(records, out, speed=1.0, clock=time.monotonic, sleep=time.sleep):
+    """
+    Send records to out at speed times their recorded pace (0 = at once).
+    Records due at the same time go out in one sendall. Returns the
+    seconds the replay took.
+    """
+    if not records:
+        return 0.0
+    start = clock()
+    first = records[0].timestamp
+    batch = []
+    for record in records:
+        if speed:
+            delay = start + (record.timestamp - first) / speed - clock()
+            if delay > 0:
+                if batch:
+                    out.sendall(b"".join(batch))
+                    batch = []
+                sleep(delay)
+        batch.append(pack_record(record))
+        if len(batch) == MAX_BATCH:
+            out.sendall(b"".join(batch))
+            batch = []
+    if batch:
+        out.sendall(b"".join(batch))
+    return clock() - start
+
+
+def default_port(records):
+    for record in records:
+        if type(record) in DEFAULT_PORTS:
+            return DEFAULT_PORTS[type(record)]
+    raise ValueError("recording has no IMU or position samples")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("recording")
+    ap.add_argument("--speed", type=float, default=1.0)
+    ap.add_argument("--port", type=int, default=None)
+    ap.add_argument("--shm", default=None)
+    ap.add_argument("--loop", action="store_true")
+    ap.add_argument("--hold", action="store_true")
+    args = ap.parse_args()
+
+    records = read_recording(args.recording)
+    if args.shm:
+        out = ShmRing.attach(args.shm)
+    else:
+        out = connect_with_retry(args.port or default_port(records))
+
+    try:
+        while True:
+            seconds = replay(records, out, args.speed)
+            recorded = records[-1].timestamp - records[0].timestamp if records else 0.0
+            print(f"replayed {len(records)} records ({recorded:.1f} s recorded) in {seconds:.2f} s")
+            if not args.loop:
+                break
+        while args.hold:
+            out.sendall(pack_heartbeat(time.monotonic()))
+            time.sleep(HEARTBEAT_INTERVAL)
+    except (KeyboardInterrupt, OSError):
+        pass
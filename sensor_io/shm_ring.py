@@ -0,0 +1,171 @@
+"""
+shm_ring.py
+
+Single-producer/single-consumer ring of fixed-size slots in shared memory,
+an alternative to the loopback sockets between a sensor process and the
+game. Each slot holds one frame in the framing.py wire format, so the
+game decodes it with the same FrameDecoder; reading and writing are
+memory copies, with no syscall per sample.
+
+The game creates the ring and passes its name to the sensor process,
+which attaches to it and writes with sendall() as it would to a socket.
+
+Layout (little-endian, counters are u64):
+
+| offset | field |
+| --- | --- |
+| 0 | magic, capacity (u32), slot size (u32) |
+| 64 | write count, frames dropped because the ring was full (producer) |
+| 128 | read count (consumer) |
+| 192 | capacity slots: sequence (u64), frame length (u16), frame |
+
+The producer and consumer counters sit on separate cache lines. A slot's
+sequence is written after its frame and length, in a write of its own,
+and is the slot's index + 1 once both are complete; the consumer reads
+the sequence first and stops at the first slot whose sequence is not
+the one it expects, so it never reads a frame that is still being
+written. Each slot holds a whole frame, so a malformed one (its length
+does not match its header or its message type) is skipped on its own
+and counted in bad_frames; the frames around it still decode. The producer never waits: when the ring is full, frames are
+dropped and counted (sequence gaps show up in FrameDecoder.dropped
+too). The counts live in the ring, so a restarted sensor process
+carries on where the last one stopped.
+"""
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+from sensor_io.framing import HEADER, RECORD_TYPES
+
+MAGIC = 0x474E4952  # "RING"
+# 1 s of IMU samples at 1 kHz
+DEFAULT_CAPACITY = 1024
+# fits every frame type; with the slot header a slot is 64 bytes
+SLOT_SIZE = 54
+
+INFO = struct.Struct("<III")
+COUNTER = struct.Struct("<Q")
+SLOT_HEADER = struct.Struct("<QH")
+LENGTH = struct.Struct("<H")
+WRITE_OFFSET = 64
+DROPPED_OFFSET = 72
+READ_OFFSET = 128
+SLOTS_OFFSET = 192
+
+
+class ShmRing:
+    """One end of a shared memory ring; create() for the game, attach() for a sensor"""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        magic, self.capacity, self.slot_size = INFO.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"shared memory {shm.name!r} is not a sensor ring")
+        self.stride = SLOT_HEADER.size + self.slot_size
+        # malformed slots the reader skipped
+        self.bad_frames = 0
+
+    @classmethod
+    def create(cls, name=None, capacity=DEFAULT_CAPACITY, slot_size=SLOT_SIZE):
+        size = SLOTS_OFFSET + capacity * (SLOT_HEADER.size + slot_size)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        # fresh shared memory is zero filled: no slot is published yet
+        INFO.pack_into(shm.buf, 0, MAGIC, capacity, slot_size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        # the game owns the ring; without this the resource tracker would
+        # unlink it when this sensor process exits, and a restarted one
+        # could not attach again
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _counter(self, offset):
+        return COUNTER.unpack_from(self.buf, offset)[0]
+
+    @property
+    def dropped(self):
+        """Frames the producer could not write because the ring was full"""
+        return self._counter(DROPPED_OFFSET)
+
+    def pending(self):
+        """Frames written but not read yet"""
+        return self._counter(WRITE_OFFSET) - self._counter(READ_OFFSET)
+
+    def sendall(self, data):
+        """
+        Write every frame in data, the way a socket would be written to;
+        the frames are published together with one write count update
+        """
+        buf = self.buf
+        write = self._counter(WRITE_OFFSET)
+        free = self.capacity - (write - self._counter(READ_OFFSET))
+        offset = 0
+        lost = 0
+        while offset < len(data):
+            length = HEADER.size + HEADER.unpack_from(data, offset)[0]
+            if length > self.slot_size:
+                raise ValueError(f"frame of {length} bytes does not fit a {self.slot_size} byte slot")
+            if free > 0:
+                start = SLOTS_OFFSET + (write % self.capacity) * self.stride
+                frame_start = start + SLOT_HEADER.size
+                buf[frame_start:frame_start + length] = data[offset:offset + length]
+                LENGTH.pack_into(buf, start + COUNTER.size, length)
+                # the sequence goes in last, on its own: it publishes the slot
+                COUNTER.pack_into(buf, start, write + 1)
+                write += 1
+                free -= 1
+            else:
+                lost += 1
+            offset += length
+        COUNTER.pack_into(buf, WRITE_OFFSET, write)
+        if lost:
+            COUNTER.pack_into(buf, DROPPED_OFFSET, self.dropped + lost)
+
+    def read(self):
+        """Every published frame not read yet, oldest first, as one bytes object"""
+        buf = self.buf
+        read = first = self._counter(READ_OFFSET)
+        frames = []
+        while True:
+            start = SLOTS_OFFSET + (read % self.capacity) * self.stride
+            if self._counter(start) != read + 1:
+                break
+            # only read once the sequence says the slot is complete
+            length = LENGTH.unpack_from(buf, start + COUNTER.size)[0]
+            frame_start = start + SLOT_HEADER.size
+            if self._frame_ok(frame_start, length):
+                frames.append(buf[frame_start:frame_start + length])
+            else:
+                self.bad_frames += 1
+            read += 1
+            if read - first == self.capacity:
+                break
+        if read != first:
+            # only now may the producer reuse the slots
+            COUNTER.pack_into(buf, READ_OFFSET, read)
+        return b"".join(frames)
+
+    def _frame_ok(self, frame_start, length):
+        """Whether the slot holds exactly one frame the decoder will accept"""
+        if not HEADER.size <= length <= self.slot_size:
+            return False
+        payload, msg_type = HEADER.unpack_from(self.buf, frame_start)
+        if HEADER.size + payload != length:
+            return False
+        # unknown types are fine, the decoder skips them
+        return msg_type not in RECORD_TYPES or RECORD_TYPES[msg_type][0].size == payload
+
+    def close(self):
+        """Detach; the game's end also removes the shared memory"""
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
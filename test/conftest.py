@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Game modules import each other as top-level modules (they are run from
+# main/, ble/ or position_tracker/), and the sensor processes share code
+# through sensor_io/.
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "main"))
+sys.path.insert(0, os.path.join(ROOT, "ble"))
+sys.path.insert(0, os.path.join(ROOT, "position_tracker"))
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+pytest.importorskip("panda3d")
+
+from panda3d.core import NodePath, loadPrcFileData
+
+from asset_manager import AssetManager
+
+MODELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+PIN = os.path.join(MODELS, "bowling-pin.glb")
+
+
+@pytest.fixture(scope="module")
+def loader():
+    from direct.showbase.Loader import Loader
+
+    loadPrcFileData("", "window-type none\naudio-library-name null")
+    return Loader(None)
+
+
+def test_loads_once_and_instances(loader, tmp_path):
+    assets = AssetManager(loader, cache_dir=str(tmp_path))
+    root = NodePath("root")
+    pins = [assets.instance(PIN, root, f"pin{i}") for i in range(10)]
+
+    assert list(assets.models) == [PIN]
+    assert os.path.exists(assets.cache_path(PIN))
+    # every pin shares the same geometry node
+    shared = assets.load(PIN).node()
+    assert all(pin.getChild(0).node() == shared for pin in pins)
+    assert shared.getNumParents() == 10
+
+    # instances keep their own transform
+    pins[3].setPos(1, 2, 3)
+    assert pins[4].getPos() == (0, 0, 0)
+
+
+def test_second_run_uses_bam_cache(loader, tmp_path):
+    first = AssetManager(loader, cache_dir=str(tmp_path))
+    first.load(PIN)
+    assert first.cache_hits == set()
+
+    assets = AssetManager(loader, cache_dir=str(tmp_path))
+    model = assets.load(PIN)
+    assert assets.cache_hits == {PIN}
+    assert model.getTightBounds() == first.load(PIN).getTightBounds()
+
+
+def test_cache_is_keyed_on_full_path_and_checks_the_source(loader, tmp_path):
+    import shutil
+
+    sources = [tmp_path / "a" / "bowling-pin.glb", tmp_path / "b" / "bowling-pin.glb"]
+    for source in sources:
+        source.parent.mkdir()
+        shutil.copy(PIN, source)
+    cache = str(tmp_path / "cache")
+    first = AssetManager(loader, cache_dir=cache)
+    paths = [first.cache_path(str(source)) for source in sources]
+    assert paths[0] != paths[1]
+    for source in sources:
+        first.load(str(source))
+    assert all(os.path.exists(path) for path in paths)
+
+    # an older file copied over the source is still a change
+    stat = os.stat(sources[0])
+    with open(sources[0], "ab") as f:
+        f.write(b" ")
+    os.utime(sources[0], ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+    assets = AssetManager(loader, cache_dir=cache)
+    assets.load(str(sources[0]))
+    assets.load(str(sources[1]))
+    assert assets.cache_hits == {str(sources[1])}
+
+
+def test_missing_models_become_empty_nodes_when_allowed(loader, tmp_path):
+    missing = os.path.join(MODELS, "no-such-model.glb")
+    with pytest.raises(IOError):
+        AssetManager(loader, cache_dir=str(tmp_path)).load(missing)
+
+    assets = AssetManager(loader, cache_dir=str(tmp_path), allow_missing=True)
+    ball = assets.instance(missing, NodePath("root"), "ball")
+    assert assets.missing == {missing}
+    assert ball.getTightBounds() is None
+    assert not os.listdir(tmp_path)
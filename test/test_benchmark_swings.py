@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import benchmark_swings
+from benchmark_swings import evaluate, load_corpus, make_corpus, report, throughput
+from sensor_io.framing import pack_imu_sample
+from sensor_io.recording import RecordingWriter
+from swing_detector import SwingDetector
+
+
+def write_trace(directory, name, values, interval=0.05):
+    writer = RecordingWriter(None, str(directory / name))
+    for seq, value in enumerate(values):
+        writer.sendall(pack_imu_sample(seq, seq * interval, 0, value, 0))
+    writer.close()
+
+
+def test_counts_on_a_tiny_corpus(tmp_path, capsys):
+    write_trace(tmp_path, "hard-0.brec", [0, 30, 150, 160, 150, 0])
+    # only two samples over the lowest power level: missed
+    write_trace(tmp_path, "soft-0.brec", [0, 50, 50, 0, 0])
+    write_trace(tmp_path, "soft-1.brec", [0, 60, 60, 60, 0])
+    write_trace(tmp_path, "none-0.brec", [0, 100, 0, 0])
+    # two swings where none was made
+    write_trace(tmp_path, "none-1.brec", [0, 80, 80, 80, 0, 80, 80, 80, 0])
+
+    corpus = load_corpus(str(tmp_path))
+    assert sorted(label for label, _, _ in corpus) == ["hard", "none", "none", "soft", "soft"]
+    result = evaluate(corpus, SwingDetector)
+    assert (result["tp"], result["fp"], result["fn"]) == (2, 2, 1)
+    assert result["found"] == {"hard": 1, "soft": 1}
+    assert result["missed"] == {"soft": 1}
+    # fired on the third sample over 40 DPS: three samples after hard's
+    # 30 DPS onset, two after soft's, which starts straight at 60
+    assert sorted(n for n, _ in result["latencies"]) == [2, 3]
+    assert sorted(round(1000 * s) for _, s in result["latencies"]) == [100, 150]
+    assert sum(result["roll_times"]["hard"].values()) == 1
+    assert throughput(corpus, SwingDetector, min_seconds=0.01) > 0
+
+    report(result, 1000.0)
+    out = capsys.readouterr().out
+    assert "TP 2  FP 2  FN 1  precision 0.500  recall 0.667" in out
+    assert "soft     recall 0.500 (1 of 2)" in out
+
+
+def test_make_corpus_refuses_to_append(tmp_path):
+    make_corpus(str(tmp_path), 2)
+    assert len(os.listdir(tmp_path)) == 6
+    result = evaluate(load_corpus(str(tmp_path)), SwingDetector)
+    assert result["tp"] + result["fn"] == 4
+    with pytest.raises(ValueError):
+        make_corpus(str(tmp_path), 2)
+
+
+def test_harness_does_not_need_panda3d():
+    code = "import sys, benchmark_swings; assert 'panda3d' not in sys.modules"
+    subprocess.run(
+        [sys.executable, "-c", code], check=True, cwd=os.path.dirname(benchmark_swings.__file__),
+    )
@@ -0,0 +1,152 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("panda3d")
+
+from panda3d.core import Filename, NodePath, Point3, Vec3, getModelPath, loadPrcFileData
+
+from asset_manager import AssetManager
+from bowling_mechanics import KNOCKDOWN_TIME, PHYSICS_DT, BowlingMechanics
+
+MODELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+
+
+@pytest.fixture
+def mechanics(tmp_path):
+    from direct.showbase.Loader import Loader
+
+    loadPrcFileData("", "window-type none\naudio-library-name null")
+    # the game runs from main/ and loads "../models/..."
+    getModelPath().prependDirectory(
+        Filename.fromOsSpecific(os.path.join(MODELS, "..", "main"))
+    )
+
+    # only the parts of __init__ the pins need; the lane and ball models
+    # are not in the repo
+    mech = BowlingMechanics.__new__(BowlingMechanics)
+    mech.game = SimpleNamespace(render=NodePath("render"))
+    mech.assets = AssetManager(Loader(None), cache_dir=str(tmp_path))
+    mech.enable_print = False
+    mech.pin_spacing = 1.9
+    mech.pin_x_offset, mech.pin_y_offset, mech.pin_z_offset = 7, -0.1, 2.5
+    s = mech.pin_spacing
+    mech.row_positions = [
+        [(0, 0)],
+        [(s, 0.5 * s), (s, -0.5 * s)],
+        [(2 * s, s), (2 * s, 0), (2 * s, -s)],
+        [(3 * s, 1.5 * s), (3 * s, 0.5 * s), (3 * s, -0.5 * s), (3 * s, -1.5 * s)],
+    ]
+    mech.pins = []
+    mech.setupPins()
+    mech.ball = mech.game.render.attachNewNode("ball")
+    mech.ball_pos = mech.ball_prev_pos = mech.ball.getPos()
+    mech.ball_velocity = Vec3(0, 0, 0)
+    mech.ball_time_left = 0
+    mech.can_bowl = True
+    mech.setupCollisions()
+    mech.knocked_pins = {i: False for i in range(10)}
+    mech.pins_knocked = 0
+    return mech
+
+
+def settle(mech):
+    """Step physics until every knocked pin is down"""
+    for _ in range(int(KNOCKDOWN_TIME / PHYSICS_DT) + 1):
+        mech.physicsStep(PHYSICS_DT)
+
+
+def node_count(mech):
+    return mech.game.render.findAllMatches("**").getNumPaths()
+
+
+def test_pins_keep_their_place_under_pivots(mechanics):
+    render = mechanics.game.render
+    pin = mechanics.pins[0]
+    assert pin.getParent() == mechanics.pivots[0]
+    pos = pin.getPos(render)
+    assert pos.almostEqual(Vec3(7, -0.1, 2.5), 1e-4)
+    # pivot is at the pin's base, the same point knockDownPin used to compute
+    assert mechanics.pivots[0].getZ() == pytest.approx(pin.getTightBounds(render)[0].getZ())
+
+
+def test_repeated_hits_knock_a_pin_once(mechanics):
+    for _ in range(5):
+        mechanics.hitPin(3, Vec3(1, 0, 0))
+    assert mechanics.pins_knocked == 1
+    assert mechanics.pin_falls[3] is not None
+    settle(mechanics)
+    assert mechanics.pin_falls[3] is None
+    assert mechanics.pivots[3].getQuat().getAngle() == pytest.approx(90, abs=1e-3)
+
+
+def test_scene_graph_size_constant_over_many_rolls(mechanics):
+    before = node_count(mechanics)
+    for roll in range(20):
+        for i in range(10):
+            mechanics.hitPin(i, Vec3(1, 0, roll % 3 - 1))
+        settle(mechanics)
+        mechanics.reset_board(full_reset=True)
+        assert mechanics.pins_knocked == 0
+    assert node_count(mechanics) == before
+
+    render = mechanics.game.render
+    assert mechanics.pins[5].getPos(render).almostEqual(
+        Vec3(7 + 2 * 1.9, -0.1, 2.5 - 1.9), 1e-4
+    )
+    assert mechanics.pivots[5].getHpr().almostEqual(Vec3(0, 0, 0), 1e-4)
+
+
+def test_knockdown_is_interpolated_between_steps(mechanics):
+    mechanics.hitPin(0, Vec3(1, 0, 0))
+    mechanics.physicsStep(PHYSICS_DT)
+    step_angle = 90 * PHYSICS_DT / KNOCKDOWN_TIME
+    assert mechanics.pin_quats[0].getAngle() == pytest.approx(step_angle, abs=1e-3)
+    # the display lags one step behind the physics, blended by alpha
+    mechanics.interpolate(0.5)
+    assert mechanics.pivots[0].getQuat().getAngle() == pytest.approx(step_angle / 2, abs=1e-2)
+    mechanics.interpolate(1)
+    assert mechanics.pivots[0].getQuat().getAngle() == pytest.approx(step_angle, abs=1e-3)
+
+
+def test_only_hit_pins_are_from_colliders(mechanics):
+    def colliders():
+        return {c.getName() for c in mechanics.cTrav.getColliders()}
+
+    assert colliders() == {"ball"}
+    mechanics.hitPin(2, Vec3(1, 0, 0))
+    assert colliders() == {"ball", "pinCollider2"}
+    settle(mechanics)
+    mechanics.reset_board(full_reset=True)
+    assert colliders() == {"ball"}
+
+
+def test_contacts_do_not_outlive_a_reset(mechanics):
+    # falling pins knock into their neighbours
+    for i in (0, 1, 2):
+        mechanics.hitPin(i, Vec3(-1, 0, -1))
+    settle(mechanics)
+    assert mechanics.pins_knocked > 3
+    mechanics.reset_board(full_reset=True)
+    # no pin is a "from" collider now, so nothing traverses the pin queue
+    settle(mechanics)
+    assert mechanics.pins_knocked == 0
+    assert mechanics.pinHandler.getNumEntries() == 0
+
+
+def test_reset_mid_roll_returns_the_ball(mechanics):
+    mechanics.ball.setPos(-10, -1.2, 0)
+    mechanics.rollBall(8)
+    for _ in range(60):
+        mechanics.physicsStep(PHYSICS_DT)
+    assert mechanics.ball.getX() > -10
+    mechanics.reset_board()
+
+    start = Point3(-10, -1.2, 0)
+    mechanics.physicsStep(PHYSICS_DT)
+    mechanics.interpolate(0.5)
+    assert mechanics.ball.getPos().almostEqual(start, 1e-4)
+    # the next roll starts from the foul line, not from the last roll
+    mechanics.rollBall(2)
+    assert mechanics.ball_pos.almostEqual(start, 1e-4)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from pyimagesearch.centroidtracker import CentroidTracker
+
+
+def box(x, y, half=10):
+    return np.array([x - half, y - half, x + half, y + half])
+
+
+def test_register_and_follow():
+    ct = CentroidTracker()
+    ct.update([box(50, 50), box(200, 50)])
+    objects = ct.update([box(205, 52), box(48, 51)])
+    assert list(objects) == [0, 1]
+    assert tuple(objects[0]) == (48, 51)
+    assert tuple(objects[1]) == (205, 52)
+
+
+def test_missing_objects_deregister_without_error():
+    # the old tracker changed its dict while iterating over it here
+    ct = CentroidTracker(maxDisappeared=2)
+    ct.update([box(50, 50), box(100, 100), box(150, 150)])
+    for _ in range(2):
+        assert len(ct.update([])) == 3
+    assert ct.update([]) == {}
+    assert ct.count == 0
+
+
+def test_unmatched_object_counts_as_disappeared():
+    ct = CentroidTracker(maxDisappeared=1)
+    ct.update([box(50, 50), box(200, 200)])
+    ct.update([box(52, 50)])
+    assert ct.disappeared == {0: 0, 1: 1}
+    objects = ct.update([box(54, 50)])
+    assert list(objects) == [0]
+
+
+def test_optimal_assignment_beats_greedy():
+    # greedy matching hands the input at x=109 to object 1 first, then
+    # object 0 finds its nearest input taken and is marked missing while
+    # the input at x=0 is ignored; the optimal assignment matches both
+    ct = CentroidTracker()
+    ct.update([box(100, 50), box(110, 50)])
+    objects = ct.update([box(109, 50), box(0, 50)])
+    assert objects[0][0] == 0
+    assert objects[1][0] == 109
+    assert ct.disappeared == {0: 0, 1: 0}
+
+
+def test_max_distance_gate():
+    ct = CentroidTracker(maxDistance=30)
+    ct.update([box(50, 50)])
+    objects = ct.update([box(300, 50)])
+    # too far to be the same player: new ID, old one marked missing
+    assert list(objects) == [0, 1]
+    assert ct.disappeared == {0: 1, 1: 0}
+
+
+def test_capacity_grows():
+    ct = CentroidTracker(capacity=2)
+    rects = [box(20 * i, 20 * i) for i in range(50)]
+    ct.update(rects)
+    objects = ct.update(rects)
+    assert list(objects) == list(range(50))
+    ct.deregister(10)
+    assert 10 not in ct.objects
+    assert ct.count == 49
@@ -1,18 +1,10 @@
-
 import random
 
-l = [0] * 10
-
-def add_to_buffer(val):
-    l.pop(0)
-    l.append(val)
-
-while True:
+from swing_detector import BUFFER_SIZE, MIN_SAMPLES_THRESHOLD, PowerCurve, SwingDetector
 
-    power_level = random.randint(0, 9)
-
-    add_to_buffer(power_level)
 
+def reference_stroke(l):
+    """Original list-based longest-run search, kept to check the detector against"""
     start = 0
     count = 0
     i = 0
@@ -31,15 +23,94 @@ while True:
         else:
             i += 1
 
-        # comment this out to get biggest instead of first
-        if count > 1:
-            break
+    return count, l[start : start + count - 1]
+
+
+def reference_swings(samples):
+    """Roll times the old handle_imu_update produced, at the sample a swing started"""
+    curve = PowerCurve()
+    l = [0] * BUFFER_SIZE
+    swings = {}
+    detected = False
+    for n, gyro_y in enumerate(samples):
+        l.pop(0)
+        l.append(curve.power_level(gyro_y))
+        count, stroke = reference_stroke(l)
+        if count >= MIN_SAMPLES_THRESHOLD:
+            if not detected:
+                avg_power = sum(stroke) / len(stroke)
+                swings[n] = curve.roll_time(curve.scaled_power(avg_power))
+            detected = True
+        else:
+            detected = False
+    return swings
+
+
+def detector_swings(samples, detector=None):
+    detector = detector or SwingDetector()
+    swings = {}
+    for n, gyro_y in enumerate(samples):
+        swing = detector.push(gyro_y)
+        if swing is not None:
+            swings[n] = swing.roll_time
+    return swings
+
+
+def test_power_levels():
+    curve = PowerCurve()
+    assert curve.power_level(-200) == 0
+    assert curve.power_level(39) == 0
+    assert curve.power_level(40) == 4
+    assert curve.power_level(1000) == 16
 
-    # print(f"start: {start}")
-    # print(f"count: {count}")
 
-    stroke = l[start:start+count-1]
-    # power_level = sum(stroke) / len(stroke)
+def test_single_swing():
+    samples = [0, 0, 100, 100, 100, 100, 0, 0]
+    swings = detector_swings(samples)
+    assert list(swings) == [4]
+    assert swings == reference_swings(samples)
+
+
+def test_short_run_ignored():
+    assert detector_swings([0, 100, 100, 0, 100, 0, 100, 100]) == {}
+
+
+def test_long_run_reports_once():
+    assert len(detector_swings([0] + [150] * 50 + [0])) == 1
+
+
+def test_matches_reference_on_random_streams():
+    rng = random.Random(7)
+    for _ in range(200):
+        # bursts of motion separated by rest, like a real recording
+        samples = []
+        while len(samples) < 200:
+            samples += [rng.uniform(-50, 30) for _ in range(rng.randint(1, 6))]
+            samples += [rng.uniform(40, 200) for _ in range(rng.randint(1, 8))]
+        assert detector_swings(samples) == reference_swings(samples)
+
+
+def test_run_sum_matches_window():
+    rng = random.Random(3)
+    detector = SwingDetector(buffer_size=8, min_samples=4)
+    levels = []
+    for _ in range(2000):
+        gyro_y = rng.choice([0, rng.uniform(40, 200)])
+        detector.push(gyro_y)
+        levels.append(detector.curve.power_level(gyro_y))
+        run = []
+        for level in reversed(levels[-8:]):
+            if level == 0:
+                break
+            run.append(level)
+        assert detector.run_length == len(run)
+        assert detector.run_sum == sum(run)
+
 
-    print(f"stroke: {stroke}")
-    # print(f"power_level: {power_level}")
+def test_reset():
+    detector = SwingDetector()
+    detector.push(100)
+    detector.push(100)
+    detector.reset()
+    assert detector.push(100) is None
+    assert detector.run_length == 1
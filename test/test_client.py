@@ -0,0 +1,39 @@
+import socket
+import threading
+import time
+
+from sensor_io.client import connect_with_retry
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def test_connect_waits_for_a_late_server():
+    port = free_port()
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    def listen_later():
+        time.sleep(0.2)
+        server.bind(("localhost", port))
+        server.listen()
+
+    thread = threading.Thread(target=listen_later)
+    thread.start()
+    start = time.monotonic()
+    client = connect_with_retry(port, first_delay=0.01, max_delay=0.05)
+    elapsed = time.monotonic() - start
+    thread.join()
+    try:
+        # retried every few ms, not every second
+        assert 0.2 <= elapsed < 0.5
+        conn, _ = server.accept()
+        client.sendall(b"x")
+        assert conn.recv(1) == b"x"
+        conn.close()
+    finally:
+        client.close()
+        server.close()
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from detectors import (
+    BACKENDS,
+    Detector,
+    HaarDetector,
+    MotionDetector,
+    RoiDetector,
+    SkippingDetector,
+    innermost,
+    ssd_boxes,
+)
+from pipeline import SyntheticSource
+
+
+def test_backends_registered():
+    assert set(BACKENDS) == {"ssd", "dnn", "haar", "mog2", "onnx"}
+
+
+def test_ssd_boxes_filters_and_scales():
+    detections = np.array(
+        [[[[0, 1, 0.9, 0.1, 0.2, 0.3, 0.4], [0, 1, 0.2, 0.5, 0.5, 0.6, 0.6]]]]
+    )
+    boxes = ssd_boxes(detections, 0.5, 400, 300)
+    assert len(boxes) == 1
+    assert list(boxes[0]) == [40, 60, 120, 120]
+
+
+def test_detector_records_latency():
+    class Fixed(Detector):
+        def _detect(self, frame):
+            return [np.array([1, 2, 3, 4])]
+
+    detector = Fixed()
+    for _ in range(3):
+        detector.detect(None)
+    assert detector.frames == 3
+    assert detector.mean_latency_ms() >= 0
+    assert innermost(SkippingDetector(RoiDetector(detector))) is detector
+
+
+def test_motion_detector_finds_moving_player():
+    source = SyntheticSource(frames=60, width=400, height=300)
+    detector = MotionDetector(min_area=500)
+    boxes = []
+    for _ in range(60):
+        boxes = detector.detect(source.read())
+    assert len(boxes) == 1
+    (startX, startY, endX, endY) = boxes[0]
+    (x, y) = source.position(59)
+    # background subtraction may only pick up part of the player, but the
+    # box has to overlap them
+    assert startX < x + source.size and endX > x - source.size
+    assert startY < y + source.size and endY > y - source.size
+    assert detector.frames == 60
+
+
+@pytest.mark.skipif(
+    not hasattr(cv2, "CascadeClassifier"), reason="needs the opencv-python 4.x build"
+)
+def test_haar_detector_runs():
+    detector = HaarDetector()
+    frame = np.zeros((300, 400, 3), dtype=np.uint8)
+    assert detector.detect(frame) == []
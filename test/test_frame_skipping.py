@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from detectors import SkippingDetector
+from pipeline import SyntheticSource
+from pyimagesearch.centroidtracker import CentroidTracker
+
+
+class CountingDetector:
+    """Finds the bright block drawn by SyntheticSource and counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        ys, xs = np.nonzero(frame[:, :, 0] > 150)
+        if len(xs) == 0:
+            return []
+        return [np.array([xs.min(), ys.min(), xs.max(), ys.max()])]
+
+
+def frames(n):
+    source = SyntheticSource(frames=n, width=400, height=300)
+    return [source.read() for _ in range(n)], source
+
+
+def test_fixed_interval_tracks_between_detections():
+    inner = CountingDetector()
+    skipping = SkippingDetector(inner, interval=4)
+    tracker = CentroidTracker()
+    clip, source = frames(40)
+
+    for i, frame in enumerate(clip):
+        boxes = skipping.detect(frame)
+        assert len(boxes) == 1
+        objects = tracker.update(boxes)
+        # the same player keeps the same ID
+        assert list(objects) == [0]
+        assert abs(objects[0][0] - source.position(i)[0]) <= 4
+
+    assert inner.calls == 10
+    assert skipping.tracked == 30
+
+
+def test_adaptive_interval_follows_inference_time():
+    skipping = SkippingDetector(CountingDetector(), frame_budget=0.01, max_interval=8)
+    skipping.detect_time = 0.05
+    skipping.track_time = 0.002
+    skipping._adapt()
+    # (50 - 2) / (10 - 2) = 6 frames per detection
+    assert skipping.interval == 6
+
+    skipping.detect_time = 0.005
+    skipping._adapt()
+    assert skipping.interval == 1
+
+    skipping.detect_time = 1.0
+    skipping._adapt()
+    assert skipping.interval == 8
+
+
+def test_lost_track_falls_back_to_detection():
+    inner = CountingDetector()
+    skipping = SkippingDetector(inner, interval=10)
+    clip, _ = frames(2)
+    skipping.detect(clip[0])
+    # featureless frame: nothing to track, must detect again
+    skipping.detect(np.zeros_like(clip[1]))
+    assert inner.calls == 2
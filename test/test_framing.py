@@ -0,0 +1,97 @@
+import struct
+
+import pytest
+
+from sensor_io.framing import (
+    HEADER,
+    FrameDecoder,
+    Heartbeat,
+    ImuSample,
+    Position,
+    ProtocolError,
+    Ready,
+    pack_heartbeat,
+    pack_imu_sample,
+    pack_position,
+    pack_ready,
+)
+
+
+def make_stream(n):
+    return b"".join(pack_imu_sample(i, i * 0.01, 1.0, float(i), -1.0) for i in range(n))
+
+
+def test_roundtrip():
+    decoder = FrameDecoder()
+    records = decoder.feed(pack_imu_sample(7, 12.5, 1.5, -2.5, 3.0))
+    assert records == [ImuSample(7, 12.5, 1.5, -2.5, 3.0)]
+    assert decoder.pending() == 0
+
+
+def test_position_roundtrip():
+    decoder = FrameDecoder()
+    records = decoder.feed(pack_position(1, 2.0, 5, -42.5) + pack_imu_sample(1, 0, 0, 0, 0))
+    assert records[0] == Position(1, 2.0, 5, -42.5)
+    assert isinstance(records[1], ImuSample)
+    # sequence numbers are tracked per message type
+    assert decoder.dropped == 0
+
+
+def test_ready_roundtrip():
+    decoder = FrameDecoder()
+    records = decoder.feed(pack_ready(100.5, 2.25) + pack_imu_sample(0, 0, 0, 0, 0))
+    assert records[0] == Ready(100.5, 2.25)
+    assert isinstance(records[1], ImuSample)
+    assert decoder.dropped == 0
+
+
+def test_heartbeat_roundtrip():
+    decoder = FrameDecoder()
+    records = decoder.feed(pack_imu_sample(0, 0, 0, 0, 0) + pack_heartbeat(3.5) + pack_imu_sample(1, 0, 0, 0, 0))
+    assert records[1] == Heartbeat(3.5)
+    # heartbeats do not break the sample sequence
+    assert decoder.received == 3
+    assert decoder.dropped == 0
+
+
+def test_coalesced_reads():
+    decoder = FrameDecoder()
+    records = decoder.feed(make_stream(50))
+    assert [r.seq for r in records] == list(range(50))
+    assert decoder.dropped == 0
+
+
+def test_partial_reads():
+    stream = make_stream(20)
+    decoder = FrameDecoder()
+    records = []
+    # feed one byte at a time, then in odd-sized chunks
+    for i in range(len(stream) // 2):
+        records += decoder.feed(stream[i : i + 1])
+    rest = stream[len(stream) // 2 :]
+    for i in range(0, len(rest), 7):
+        records += decoder.feed(rest[i : i + 7])
+    assert [r.seq for r in records] == list(range(20))
+    assert [r.y for r in records] == [float(i) for i in range(20)]
+    assert decoder.pending() == 0
+
+
+def test_sequence_gap_counted():
+    decoder = FrameDecoder()
+    decoder.feed(pack_imu_sample(0, 0.0, 0, 0, 0))
+    decoder.feed(pack_imu_sample(4, 0.0, 0, 0, 0))
+    assert decoder.dropped == 3
+    assert decoder.received == 2
+
+
+def test_unknown_type_skipped():
+    unknown = HEADER.pack(3, 200) + b"abc"
+    decoder = FrameDecoder()
+    records = decoder.feed(unknown + pack_imu_sample(1, 0.0, 0, 0, 0))
+    assert [r.seq for r in records] == [1]
+
+
+def test_bad_length_raises():
+    decoder = FrameDecoder()
+    with pytest.raises(ProtocolError):
+        decoder.feed(HEADER.pack(4, 1) + struct.pack("<I", 0))
@@ -0,0 +1,146 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from game_logic import FRAMES, MAX_PLAYERS, PINS, GameLogic, ScoreSheet, score_rolls
+
+OPTIONS = SimpleNamespace(enable_print=False)
+
+
+def play(rng, frames=FRAMES, strike_rate=0.3):
+    """Random complete game: (sheet, rolls, new-rack flag after each roll)"""
+    sheet = ScoreSheet(frames)
+    rolls, new_racks = [], []
+    while not sheet.complete:
+        # knock everything down often enough to get strings of strikes/spares
+        if rng.random() < strike_rate:
+            pins = sheet.standing
+        else:
+            pins = rng.randint(0, sheet.standing)
+        rolls.append(pins)
+        new_racks.append(sheet.roll(pins))
+    return sheet, rolls, new_racks
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_scores_match_reference(seed):
+    rng = random.Random(seed)
+    for frames in (1, 2, 3, FRAMES):
+        for _ in range(50):
+            sheet = ScoreSheet(frames)
+            rolls = play(rng, frames)[1]
+            for i, pins in enumerate(rolls):
+                sheet.roll(pins)
+                # every prefix of the game, not just the final score
+                expected = score_rolls(rolls[:i + 1], frames)
+                settled = [score for score in sheet.cumulative if score >= 0]
+                assert settled == expected
+                assert sheet.total == (expected[-1] if expected else 0)
+
+
+def test_long_games_do_not_overflow():
+    # more than 127 rolls and scores over 32767
+    sheet = ScoreSheet(2000)
+    for _ in range(2002):
+        sheet.roll(PINS)
+    assert sheet.complete
+    assert sheet.total == 30 * 2000
+    assert sheet.frame_starts[-1] == 1999
+
+    rng = random.Random(0)
+    sheet, rolls, _ = play(rng, 200)
+    assert list(sheet.cumulative) == score_rolls(rolls, 200)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_game_invariants(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        sheet, rolls, new_racks = play(rng)
+        assert FRAMES + 1 <= len(rolls) <= 2 * FRAMES + 1
+        assert list(sheet.cumulative) == sorted(sheet.cumulative)
+        assert sheet.total == sheet.cumulative[-1] <= 300
+        assert sum(len(sheet.frame_rolls(i)) for i in range(FRAMES)) == len(rolls)
+        # every frame before the last starts at a full rack
+        for start in list(sheet.frame_starts)[1:]:
+            assert new_racks[start - 1]
+        # a frame's own pins never exceed the rack, bonus aside
+        for i in range(FRAMES - 1):
+            assert sum(sheet.frame_rolls(i)) <= PINS
+
+
+@pytest.mark.parametrize(
+    "rolls, total",
+    [
+        ([10] * 12, 300),
+        ([0] * 20, 0),
+        ([5] * 21, 150),
+        ([9, 0] * 10, 90),
+        ([10, 7, 3, 9, 0, 10, 0, 8, 8, 2, 0, 6, 10, 10, 10, 8, 1], 167),
+        ([0] * 18 + [10, 10, 10], 30),
+        ([0] * 18 + [3, 7, 10], 20),
+    ],
+)
+def test_known_games(rolls, total):
+    sheet = ScoreSheet()
+    for pins in rolls:
+        sheet.roll(pins)
+    assert sheet.complete
+    assert sheet.total == total
+
+
+def test_rejects_impossible_rolls():
+    sheet = ScoreSheet()
+    sheet.roll(6)
+    with pytest.raises(ValueError):
+        sheet.roll(5)
+    sheet.roll(4)
+    with pytest.raises(ValueError):
+        sheet.roll(-1)
+
+    sheet = ScoreSheet(frames=1)
+    sheet.roll(3)
+    sheet.roll(4)
+    with pytest.raises(ValueError):
+        sheet.roll(0)
+
+
+def test_record_roll_takes_pins_down_on_the_rack():
+    logic = GameLogic(OPTIONS, frames=2)
+    # player one: 3, then 8 down in total -> 3, 5
+    assert not logic.record_roll(3)
+    assert logic.record_roll(8)
+    assert logic.current_player == 1
+    assert logic.scores[0].rolls.tolist() == [3, 5]
+
+    assert logic.record_roll(10)
+    assert logic.current_player == 0
+    # last frame: a spare earns a fill ball at a new rack
+    assert not logic.record_roll(4)
+    assert logic.record_roll(10)
+    assert logic.current_player == 0
+    assert logic.record_roll(10)
+    assert logic.current_player == 1
+
+    # player two: strike in the last frame, then two fill balls
+    for pins in (10, 10, 10):
+        assert logic.record_roll(pins)
+    assert logic.is_game_complete()
+    assert logic.get_current_score(0) == 28
+    assert logic.get_current_score(1) == 60
+    assert logic.get_frame_score(1, 0) == 30
+
+
+def test_turns_rotate_through_up_to_eight_players():
+    logic = GameLogic(OPTIONS, frames=2, players=MAX_PLAYERS)
+    order = []
+    while not logic.is_game_complete():
+        order.append(logic.current_player)
+        logic.record_roll(10)
+    # a strike ends a frame, the last frame takes three
+    assert order == list(range(MAX_PLAYERS)) + [p for p in range(MAX_PLAYERS) for _ in range(3)]
+    assert [logic.get_current_score(p) for p in range(MAX_PLAYERS)] == [60] * MAX_PLAYERS
+
+    with pytest.raises(ValueError):
+        GameLogic(OPTIONS, players=MAX_PLAYERS + 1)
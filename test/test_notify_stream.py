@@ -0,0 +1,99 @@
+import asyncio
+import struct
+
+from notify_stream import ImuNotificationStream
+
+ACCEL = "accel-uuid"
+GYRO = "gyro-uuid"
+
+
+class FakeBleakClient:
+    """Stands in for BleakClient: records subscriptions and lets tests notify"""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.is_connected = True
+
+    async def start_notify(self, uuid, callback):
+        self.callbacks[uuid] = callback
+
+    async def stop_notify(self, uuid):
+        del self.callbacks[uuid]
+
+    def notify(self, uuid, values):
+        self.callbacks[uuid](uuid, bytearray(struct.pack("<fff", *values)))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_stream(**kwargs):
+    client = FakeBleakClient()
+    clock = FakeClock()
+    stream = ImuNotificationStream(client, ACCEL, GYRO, clock=clock, **kwargs)
+    asyncio.run(stream.start())
+    return client, clock, stream
+
+
+def test_subscribes_to_both_characteristics():
+    client, _, stream = make_stream()
+    assert set(client.callbacks) == {ACCEL, GYRO}
+    asyncio.run(stream.stop())
+    assert client.callbacks == {}
+
+
+def test_pairs_by_arrival_time():
+    client, clock, stream = make_stream(max_skew=0.01)
+    for i in range(5):
+        clock.now = i * 0.03
+        client.notify(ACCEL, (1, 2, 3))
+        clock.now += 0.005
+        client.notify(GYRO, (0, float(i), 0))
+
+    batch = asyncio.run(stream.next_batch())
+    assert [p.seq for p in batch] == list(range(5))
+    assert [p.gyro[1] for p in batch] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert all(p.accel == (1.0, 2.0, 3.0) for p in batch)
+
+
+def test_unpaired_gyro_is_not_lost():
+    client, clock, stream = make_stream(max_skew=0.01)
+    client.notify(GYRO, (0, 1, 0))
+    clock.now = 0.03
+    client.notify(GYRO, (0, 2, 0))
+    clock.now = 0.1
+    client.notify(ACCEL, (5, 5, 5))
+    stream.flush()
+
+    batch = asyncio.run(stream.next_batch())
+    assert [p.gyro[1] for p in batch] == [1.0, 2.0]
+    assert all(p.accel is None for p in batch)
+
+
+def test_batch_size_and_timeout():
+    client, clock, stream = make_stream()
+    for i in range(10):
+        clock.now = i
+        client.notify(GYRO, (0, float(i), 0))
+        client.notify(ACCEL, (0, 0, 0))
+
+    assert len(asyncio.run(stream.next_batch(max_batch=4))) == 4
+    assert len(asyncio.run(stream.next_batch())) == 6
+    assert asyncio.run(stream.next_batch(timeout=0.01)) == []
+
+
+def test_full_queue_drops_oldest():
+    client, clock, stream = make_stream(queue_size=3)
+    for i in range(5):
+        clock.now = i
+        client.notify(GYRO, (0, float(i), 0))
+        client.notify(ACCEL, (0, 0, 0))
+
+    batch = asyncio.run(stream.next_batch())
+    assert [p.seq for p in batch] == [2, 3, 4]
+    assert stream.dropped == 2
@@ -0,0 +1,82 @@
+import queue
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("imutils")
+
+from pipeline import DetectionPipeline, SyntheticSource, put_latest
+from pyimagesearch.centroidtracker import CentroidTracker
+
+
+class BlobDetector:
+    """Finds the bright block drawn by SyntheticSource"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def detect(self, frame):
+        time.sleep(self.delay)
+        ys, xs = np.nonzero(frame[:, :, 0] > 150)
+        if len(xs) == 0:
+            return []
+        return [np.array([xs.min(), ys.min(), xs.max(), ys.max()])]
+
+
+def test_put_latest_drops_oldest():
+    q = queue.Queue(maxsize=2)
+    assert put_latest(q, 1) == 0
+    assert put_latest(q, 2) == 0
+    assert put_latest(q, 3) == 1
+    assert [q.get_nowait(), q.get_nowait()] == [2, 3]
+
+
+def test_synthetic_frames_tracked():
+    source = SyntheticSource(frames=60, width=640, height=480)
+    published = []
+
+    def publish(objects, width):
+        published.append((width, dict(objects)))
+
+    pipeline = DetectionPipeline(
+        source, BlobDetector, CentroidTracker(), publish, queue_size=100
+    )
+    pipeline.run(duration=10)
+
+    assert pipeline.captured == 60
+    assert pipeline.published == 60
+    assert all(width == 400 for width, _ in published)
+    # one blob, one stable object ID
+    assert all(list(objects) == [0] for _, objects in published)
+    # centroid follows the blob (frames are resized from 640 to 400 wide)
+    x = published[30][1][0][0]
+    assert abs(x - source.position(30)[0] * 400 / 640) <= 3
+
+
+def test_slow_detector_drops_stale_frames():
+    source = SyntheticSource(frames=200, fps=200)
+    pipeline = DetectionPipeline(
+        source, lambda: BlobDetector(delay=0.02), CentroidTracker(), lambda o, w: None
+    )
+    pipeline.run(duration=10)
+
+    assert pipeline.captured == 200
+    assert pipeline.dropped_frames > 0
+    assert pipeline.published < 200
+    assert pipeline.stats["inference"].mean_ms() >= 20
+    assert "FPS" in pipeline.report()
+
+
+def test_multiple_workers_publish_in_order():
+    source = SyntheticSource(frames=100)
+    pipeline = DetectionPipeline(
+        source,
+        lambda: BlobDetector(delay=0.002),
+        CentroidTracker(),
+        lambda objects, width: None,
+        workers=3,
+        queue_size=100,
+    )
+    pipeline.run(duration=10)
+    assert pipeline.published + pipeline.stale_results + pipeline.dropped_results == 100
@@ -0,0 +1,132 @@
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("panda3d")
+
+from profiler import Profiler, ProfilerOverlay
+from sensor_server import ImuChannel, SensorServer
+from test_sensor_server import connect, wait_for_events
+from sensor_io.framing import pack_imu_sample
+
+
+def test_records_nothing_until_enabled():
+    profiler = Profiler()
+    task = profiler.wrap("task", lambda x: x + 1)
+    assert task(1) == 2
+    with profiler.section("section"):
+        pass
+    profiler.end_frame(1.0)
+    profiler.end_frame(2.0)
+    assert [frame.sections for frame in profiler.frames] == [{}]
+
+
+def test_frames_sum_sections_and_stay_bounded():
+    profiler = Profiler(frames=5, events=7)
+    profiler.enabled = True
+    task = profiler.wrap("task", lambda: "cont")
+    profiler.end_frame(0.0)
+    for i in range(20):
+        assert task() == "cont"
+        task()
+        with profiler.section("physics"):
+            pass
+        profiler.end_frame(0.01 * (i + 1))
+
+    assert len(profiler.frames) == 5
+    assert len(profiler.events) == 7
+    frame = profiler.frames[-1]
+    assert frame.duration == pytest.approx(0.01)
+    assert set(frame.sections) == {"task", "physics"}
+    assert frame.sections["task"] >= 0
+
+    (mean, peak), sections = profiler.summary()
+    assert mean == pytest.approx(0.01)
+    assert set(sections) == {"task", "physics"}
+    # the window is in seconds of frames, counted back from the newest
+    assert len(profiler.frames) == 5
+    (mean, _), _ = profiler.summary(window=0.015)
+    assert mean == pytest.approx(0.01)
+
+
+def test_exceptions_are_still_timed():
+    profiler = Profiler()
+    profiler.enabled = True
+
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        profiler.wrap("fail", fail)()
+    profiler.end_frame(0.0)
+    assert [event[0] for event in profiler.events] == ["fail"]
+
+
+def test_chrome_trace_and_frames_dump(tmp_path):
+    profiler = Profiler()
+    profiler.enabled = True
+    profiler.thread_names[threading.get_ident()] = "render"
+    profiler.end_frame(0.0)
+    profiler.record("updateTask", 0.001, 0.002)
+    worker = threading.Thread(target=profiler.record, args=("socket:accel_data", 0.003, 0.0005), name="io")
+    worker.start()
+    worker.join()
+    profiler.end_frame(0.016)
+
+    trace_path, frames_path = profiler.dump(str(tmp_path))
+    with open(trace_path) as f:
+        trace = json.load(f)["traceEvents"]
+    names = {event["args"]["name"] for event in trace if event["ph"] == "M"}
+    assert names == {"render", "io"}
+    spans = {event["name"]: event for event in trace if event["ph"] == "X"}
+    assert set(spans) == {"frame", "updateTask", "socket:accel_data"}
+    assert spans["updateTask"]["ts"] == pytest.approx(1000)
+    assert spans["updateTask"]["dur"] == pytest.approx(2000)
+    assert spans["frame"]["dur"] == pytest.approx(16000)
+    assert spans["socket:accel_data"]["tid"] != spans["updateTask"]["tid"]
+
+    with open(frames_path) as f:
+        frames = json.load(f)
+    assert len(frames) == 1
+    assert frames[0]["frame_ms"] == pytest.approx(16)
+    assert frames[0]["sections_ms"]["updateTask"] == pytest.approx(2)
+
+
+def test_socket_reads_are_timed_on_the_io_thread():
+    profiler = Profiler()
+    profiler.enabled = True
+    server = SensorServer(profiler=profiler)
+    port = server.listen(0, ImuChannel)
+    server.start()
+    try:
+        client = connect(port)
+        client.sendall(pack_imu_sample(0, 0.0, 1.0, 2.0, 3.0))
+        assert len(wait_for_events(server, 1)) == 1
+        client.close()
+    finally:
+        server.stop()
+    profiler.end_frame()
+    reads = [event for event in profiler.events if event[0] == "socket:accel_data"]
+    assert reads
+    assert all(event[1] == server.thread.ident for event in reads)
+
+
+def test_overlay_lists_slowest_sections_first():
+    profiler = Profiler()
+    profiler.enabled = True
+    profiler.end_frame(0.0)
+    profiler.record("score_changed", 0.0, 0.0002)
+    profiler.record("updateTask", 0.0, 0.002)
+    profiler.record("physics", 0.0, 0.03)
+    profiler.end_frame(0.04)
+
+    # only format() is needed, not the OnscreenText
+    overlay = ProfilerOverlay.__new__(ProfilerOverlay)
+    overlay.profiler = profiler
+    lines = overlay.format().splitlines()
+    assert lines[0].startswith("frame  40.0 ms")
+    assert [line.split()[0] for line in lines[1:]] == ["physics", "updateTask", "score_changed"]
+    # over the frame budget
+    assert lines[1].endswith("!")
+    assert not lines[2].endswith("!")
@@ -0,0 +1,111 @@
+import subprocess
+import sys
+
+import pytest
+
+from sensor_io.framing import ImuSample, Ready, pack_heartbeat, pack_imu_sample, pack_ready
+from sensor_io.recording import RecordingWriter, load_imu, read_recording
+from sensor_io.replay import replay
+from sensor_server import ImuChannel, SensorServer
+from conftest import ROOT
+from test_sensor_server import wait_for_events
+
+
+class Sink:
+    def __init__(self):
+        self.writes = []
+
+    def sendall(self, data):
+        self.writes.append(data)
+
+    def close(self):
+        pass
+
+
+def record(path, samples, out=None, start=0.0, rate=100):
+    writer = RecordingWriter(out, str(path))
+    writer.sendall(pack_ready(start, 1.0))
+    for n in range(samples):
+        writer.sendall(pack_imu_sample(n, start + n / rate, n, -n, 0.5))
+    writer.close()
+
+
+def test_writer_records_and_forwards(tmp_path):
+    out = Sink()
+    path = tmp_path / "sub" / "imu.brec"
+    record(path, 3, out)
+    assert len(out.writes) == 4
+    records = read_recording(path)
+    assert records[0] == Ready(0.0, 1.0)
+    assert records[1:] == [ImuSample(n, n / 100, n, -n, 0.5) for n in range(3)]
+
+
+def test_restarted_process_appends(tmp_path):
+    path = tmp_path / "imu.brec"
+    record(path, 2)
+    record(path, 2, start=5.0)
+    records = read_recording(path)
+    # one file header, both runs' frames
+    assert [type(r).__name__ for r in records] == ["Ready", "ImuSample", "ImuSample"] * 2
+    assert records[-1].timestamp == pytest.approx(5.01)
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "swing_test.txt"
+    path.write_bytes(b"hard swing: 10 TP\n")
+    with pytest.raises(ValueError):
+        read_recording(path)
+
+
+def test_load_imu_skips_other_records(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "imu.brec"
+    writer = RecordingWriter(None, str(path))
+    writer.sendall(pack_heartbeat(0.0) + pack_imu_sample(7, 0.25, 1.5, 2.5, 3.5))
+    writer.close()
+    samples = load_imu(path)
+    assert len(samples) == 1
+    assert samples["seq"][0] == 7
+    assert samples["timestamp"][0] == 0.25
+    assert list(samples[0])[2:] == [1.5, 2.5, 3.5]
+
+
+def test_replay_is_paced_by_recorded_timestamps():
+    records = [ImuSample(n, 10.0 + n / 10, 0, 0, 0) for n in range(5)]
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    out = Sink()
+    took = replay(records, out, speed=2.0, clock=lambda: now[0], sleep=sleep)
+    assert sleeps == pytest.approx([0.05] * 4)
+    assert took == pytest.approx(0.2)
+    assert len(out.writes) == 5
+
+    # at full speed everything goes out in one write
+    out = Sink()
+    replay(records, out, speed=0, clock=lambda: now[0], sleep=sleep)
+    assert len(out.writes) == 1
+    assert len(sleeps) == 4
+
+
+def test_replay_tool_streams_into_the_game(tmp_path):
+    path = tmp_path / "imu.brec"
+    record(path, 50)
+    server = SensorServer()
+    port = server.listen(0, ImuChannel)
+    server.start()
+    try:
+        subprocess.run(
+            [sys.executable, f"{ROOT}/sensor_io/replay.py", str(path), "--speed", "0", "--port", str(port)],
+            check=True, capture_output=True, timeout=10,
+        )
+        events = wait_for_events(server, 50)
+        assert [args[0] for _, args in events] == list(range(50))
+        assert server.ready["imu"][1].startup == 1.0
+        assert server.stats["imu"].dropped == 0
+    finally:
+        server.stop()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from detectors import RoiDetector
+
+
+class BlobDetector:
+    """Finds a bright block and remembers the size of each input"""
+
+    def __init__(self):
+        self.shapes = []
+
+    def detect(self, frame):
+        self.shapes.append(frame.shape[:2])
+        ys, xs = np.nonzero(frame[:, :, 0] > 150)
+        if len(xs) == 0:
+            return []
+        return [np.array([xs.min(), ys.min(), xs.max(), ys.max()])]
+
+
+def frame_with_blob(x, y, size=20, shape=(300, 400)):
+    frame = np.zeros(shape + (3,), dtype=np.uint8)
+    if x is not None:
+        frame[y - size : y + size, x - size : x + size] = 200
+    return frame
+
+
+def test_crops_around_last_box_and_maps_back():
+    inner = BlobDetector()
+    roi = RoiDetector(inner, margin=1.0, min_size=60)
+
+    first = roi.detect(frame_with_blob(100, 100))
+    boxes = roi.detect(frame_with_blob(110, 105))
+
+    assert inner.shapes[0] == (300, 400)
+    # 39 px box grown by one box size on each side
+    assert inner.shapes[1][0] < 150 and inner.shapes[1][1] < 150
+    assert list(boxes[0]) == [90, 85, 129, 124]
+    assert roi.roi_frames == 1 and roi.full_frames == 1
+    assert roi.pixels < 2 * 300 * 400
+    assert list(first[0]) == [80, 80, 119, 119]
+
+
+def test_falls_back_to_full_frame_after_misses():
+    inner = BlobDetector()
+    roi = RoiDetector(inner, max_misses=2)
+    roi.detect(frame_with_blob(100, 100))
+
+    # player moved far away: one miss in the crop, then full frame again
+    assert roi.detect(frame_with_blob(350, 250)) == []
+    boxes = roi.detect(frame_with_blob(350, 250))
+    assert list(boxes[0]) == [330, 230, 369, 269]
+    assert inner.shapes[-1] == (300, 400)
+
+
+def test_no_player_searches_full_frame():
+    inner = BlobDetector()
+    roi = RoiDetector(inner)
+    for _ in range(3):
+        assert roi.detect(frame_with_blob(None, None)) == []
+    assert inner.shapes == [(300, 400)] * 3
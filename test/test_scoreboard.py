@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("panda3d")
+
+from panda3d.core import NodePath, loadPrcFileData
+
+from game_logic import FRAMES, MAX_PLAYERS, GameLogic, SCORE_CHANGED_EVENT
+from scoreboard import BOARD_LEFT, BOARD_RIGHT, Scoreboard, ScoreboardLayout
+
+OPTIONS = SimpleNamespace(enable_print=False)
+
+
+class RecordingMessenger:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, event, args):
+        self.sent.append((event, args))
+
+
+@pytest.fixture
+def game():
+    from direct.showbase.DirectObject import DirectObject
+
+    loadPrcFileData("", "window-type none\naudio-library-name null")
+    game = DirectObject()
+    game.render = NodePath("render")
+    game.player_names = ["Ann", "Bo"]
+    yield game
+    game.ignoreAll()
+
+
+def cells(scoreboard, player):
+    return [
+        [text_node.getText() for text_node in frame]
+        for frame in scoreboard.frames[player]
+    ]
+
+
+def test_record_roll_reports_the_changed_frame():
+    messenger = RecordingMessenger()
+    logic = GameLogic(OPTIONS, messenger)
+    logic.record_roll(3)
+    logic.record_roll(7)
+    logic.record_roll(10)
+    logic.record_roll(4)
+    assert messenger.sent == [
+        (SCORE_CHANGED_EVENT, [0, 0]),
+        (SCORE_CHANGED_EVENT, [0, 0]),
+        (SCORE_CHANGED_EVENT, [1, 0]),
+        (SCORE_CHANGED_EVENT, [0, 1]),
+    ]
+
+
+def test_scoreboard_redraws_on_score_events(game):
+    from direct.showbase.MessengerGlobal import messenger
+
+    logic = GameLogic(OPTIONS, messenger, frames=3)
+    scoreboard = Scoreboard(game, logic, OPTIONS)
+    assert cells(scoreboard, 0) == [["", "", ""]] * 3
+    assert scoreboard.totals[0].getText() == "0"
+
+    logic.record_roll(3)
+    logic.record_roll(5)
+    assert cells(scoreboard, 0)[0] == ["3", "2", "5"]
+    assert scoreboard.totals[0].getText() == "5"
+    assert cells(scoreboard, 1) == [["", "", ""]] * 3
+
+    # the strike is scored once its two bonus balls are in
+    logic.record_roll(10)
+    assert cells(scoreboard, 1)[0] == ["", "X", ""]
+    assert scoreboard.totals[1].getText() == "0"
+    logic.record_roll(0)
+    logic.record_roll(9)
+    logic.record_roll(5)
+    logic.record_roll(8)
+    assert cells(scoreboard, 0)[1] == ["-", "9", "14"]
+    assert cells(scoreboard, 1)[:2] == [["", "X", "18"], ["5", "3", "26"]]
+    assert scoreboard.totals[1].getText() == "26"
+
+
+def test_scoreboard_grows_with_players_and_frames(game):
+    game.player_names = [f"Player {i + 1}" for i in range(5)]
+    logic = GameLogic(OPTIONS, frames=FRAMES, players=5)
+    scoreboard = Scoreboard(game, logic, OPTIONS)
+    assert len(scoreboard.frames) == 5
+    assert all(len(frames) == FRAMES for frames in scoreboard.frames)
+    # static parts are flattened, only the score cells stay separate
+    assert scoreboard.board.find("static").findAllMatches("**/+GeomNode").getNumPaths() == 1
+
+
+@pytest.mark.parametrize("players", range(1, MAX_PLAYERS + 1))
+@pytest.mark.parametrize("frames", [1, 3, FRAMES])
+def test_layout_fits_on_screen(players, frames):
+    layout = ScoreboardLayout.generate(players, frames)
+    boxes = list(layout.boxes())
+    assert len(boxes) == players * (frames + 2)
+    for left, right, bottom, top in boxes:
+        assert BOARD_LEFT <= left < right <= BOARD_RIGHT
+        assert -1 < bottom < top < 1
+    # text fits inside a frame box
+    assert layout.text_scale <= layout.frame_width / 3
+    assert layout.text_scale <= layout.row_height / 2
@@ -0,0 +1,192 @@
+import socket
+import time
+
+from sensor_io.framing import pack_heartbeat, pack_imu_sample, pack_position, pack_ready
+from sensor_server import MAX_PENDING_EVENTS, ImuChannel, PositionChannel, SensorServer
+
+
+def wait_for_events(server, count, timeout=2.0):
+    events = []
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        events += server.drain()
+        time.sleep(0.005)
+    return events
+
+
+def connect(port):
+    return socket.create_connection(("localhost", port))
+
+
+def test_multiplexes_imu_and_position_clients():
+    server = SensorServer()
+    imu_port = server.listen(0, ImuChannel)
+    position_port = server.listen(0, PositionChannel)
+    server.start()
+    try:
+        imu_clients = [connect(imu_port) for _ in range(3)]
+        position_client = connect(position_port)
+
+        for i, client in enumerate(imu_clients):
+            # all samples in one write, the decoder has to split them
+            client.sendall(
+                b"".join(pack_imu_sample(n, 0.0, i, n, 0) for n in range(10))
+            )
+        position_client.sendall(pack_position(0, 0.0, 0, -12.5))
+
+        events = wait_for_events(server, 31)
+        imu = [args for event, args in events if event == "accel_data"]
+        position = [args for event, args in events if event == "position_data"]
+        assert len(imu) == 30
+        for i in range(3):
+            assert [args[1] for args in imu if args[0] == i] == list(range(10))
+        assert position == [[-12.5]]
+    finally:
+        server.stop()
+
+
+def test_client_disconnect_and_reconnect():
+    server = SensorServer()
+    port = server.listen(0, ImuChannel)
+    server.start()
+    try:
+        client = connect(port)
+        client.sendall(pack_imu_sample(0, 0.0, 1, 2, 3))
+        assert wait_for_events(server, 1) == [("accel_data", [1.0, 2.0, 3.0])]
+        client.close()
+
+        client = connect(port)
+        client.sendall(pack_imu_sample(0, 0.0, 4, 5, 6))
+        assert wait_for_events(server, 1) == [("accel_data", [4.0, 5.0, 6.0])]
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_only_newest_position_is_kept():
+    server = SensorServer()
+    port = server.listen(0, PositionChannel)
+    server.start()
+    try:
+        client = connect(port)
+        client.sendall(
+            b"".join(pack_position(n, 0.0, 3, float(n)) for n in range(20))
+        )
+        client.sendall(pack_position(20, 0.0, 3, 99.0))
+        deadline = time.monotonic() + 2
+        while server.latest.get("position_data") != [99.0]:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        assert server.drain() == [("position_data", [99.0])]
+        # applied once: nothing left for the next frame
+        assert server.drain() == []
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_ready_is_recorded_not_dispatched():
+    server = SensorServer()
+    imu_port = server.listen(0, ImuChannel)
+    position_port = server.listen(0, PositionChannel)
+    server.start()
+    try:
+        before = time.monotonic()
+        imu = connect(imu_port)
+        imu.sendall(pack_ready(0.0, 1.5) + pack_imu_sample(0, 0.0, 1, 2, 3))
+        assert wait_for_events(server, 1) == [("accel_data", [1.0, 2.0, 3.0])]
+        received, ready = server.ready["imu"]
+        assert received >= before
+        assert ready.startup == 1.5
+        assert "camera" not in server.ready
+
+        camera = connect(position_port)
+        camera.sendall(pack_ready(0.0, 4.0))
+        deadline = time.monotonic() + 2
+        while "camera" not in server.ready:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        assert server.ready["camera"][1].startup == 4.0
+        assert server.drain() == []
+        imu.close()
+        camera.close()
+    finally:
+        server.stop()
+
+
+def test_stats_count_samples_heartbeats_and_losses():
+    server = SensorServer()
+    port = server.listen(0, ImuChannel)
+    server.start()
+    try:
+        stats = server.stats["imu"]
+        assert stats.last_seen is None
+        client = connect(port)
+        # sample 2 is lost on the way
+        client.sendall(pack_imu_sample(0, 0.0, 1, 2, 3) + pack_imu_sample(1, 0.0, 1, 2, 3)
+                       + pack_imu_sample(3, 0.0, 1, 2, 3) + pack_heartbeat(0.0))
+        assert len(wait_for_events(server, 3)) == 3
+        deadline = time.monotonic() + 2
+        while stats.records < 4:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        assert stats.connections == 1
+        assert stats.samples == 3
+        assert stats.dropped == 1
+        assert stats.last_seen is not None
+
+        client.close()
+        while stats.connections:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+    finally:
+        server.stop()
+
+
+def test_full_queue_counts_overflow():
+    server = SensorServer()
+    port = server.listen(0, ImuChannel)
+    server.start()
+    try:
+        client = connect(port)
+        client.sendall(b"".join(pack_imu_sample(n, 0.0, n, 0, 0) for n in range(MAX_PENDING_EVENTS + 10)))
+        deadline = time.monotonic() + 2
+        while server.stats["imu"].samples < MAX_PENDING_EVENTS + 10:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        assert server.overflow == 10
+        events = server.drain()
+        assert len(events) == MAX_PENDING_EVENTS
+        # the oldest were the ones dropped
+        assert events[0] == ("accel_data", [10.0, 0.0, 0.0])
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_idle_server_does_not_spin():
+    server = SensorServer()
+    server.listen(0, ImuChannel)
+    start = time.process_time()
+    server.start()
+    time.sleep(0.3)
+    server.stop()
+    assert time.process_time() - start < 0.1
+
+
+def test_dispatch_sends_in_order():
+    class Messenger:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, event, args):
+            self.sent.append((event, args))
+
+    server = SensorServer()
+    server.events.append(("accel_data", [1, 2, 3]))
+    server.events.append(("position_data", [4]))
+    messenger = Messenger()
+    server.dispatch(messenger)
+    assert messenger.sent == [("accel_data", [1, 2, 3]), ("position_data", [4])]
+    assert server.drain() == []
+    server.stop()
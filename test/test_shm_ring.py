@@ -0,0 +1,112 @@
+import struct
+import subprocess
+import sys
+
+import pytest
+
+from sensor_io.framing import FrameDecoder, ImuSample, pack_heartbeat, pack_imu_sample, pack_position, pack_ready
+from sensor_io.shm_ring import COUNTER, SLOT_HEADER, SLOTS_OFFSET, WRITE_OFFSET, ShmRing
+from sensor_server import ImuChannel, PositionChannel, SensorServer
+from conftest import ROOT
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRing.create(capacity=8)
+    yield ring
+    ring.close()
+
+
+def test_frames_roundtrip_through_an_attached_ring(ring):
+    producer = ShmRing.attach(ring.name)
+    producer.sendall(b"".join(pack_imu_sample(n, 0.5, n, 0, 0) for n in range(3)) + pack_heartbeat(1.0))
+    assert ring.pending() == 4
+    records = FrameDecoder().feed(ring.read())
+    assert records[:3] == [ImuSample(n, 0.5, n, 0, 0) for n in range(3)]
+    assert ring.pending() == 0
+    assert ring.read() == b""
+    producer.close()
+
+
+def test_full_ring_drops_newest_and_wraps(ring):
+    ring.sendall(b"".join(pack_imu_sample(n, 0, n, 0, 0) for n in range(10)))
+    assert ring.dropped == 2
+    decoder = FrameDecoder()
+    assert [r.seq for r in decoder.feed(ring.read())] == list(range(8))
+
+    # the slots are reused once read
+    ring.sendall(b"".join(pack_imu_sample(n, 0, n, 0, 0) for n in range(10, 15)))
+    assert [r.seq for r in decoder.feed(ring.read())] == list(range(10, 15))
+    assert decoder.dropped == 2
+
+
+def test_oversized_frame_is_rejected():
+    ring = ShmRing.create(capacity=2, slot_size=16)
+    try:
+        with pytest.raises(ValueError):
+            ring.sendall(pack_imu_sample(0, 0, 0, 0, 0))
+    finally:
+        ring.close()
+
+
+def test_bad_slot_is_skipped_on_its_own():
+    server = SensorServer()
+    ring = ShmRing.create(capacity=8)
+    server.attach_ring(ring, ImuChannel)
+    try:
+        ring.sendall(pack_imu_sample(0, 0, 1, 2, 3))
+        # publish a slot whose IMU frame is two bytes short
+        bad = pack_imu_sample(1, 0, 0, 0, 0)
+        bad = struct.pack("<HB", len(bad) - 5, bad[2]) + bad[3:-2]
+        start = SLOTS_OFFSET + ring.stride
+        ring.buf[start + SLOT_HEADER.size:start + SLOT_HEADER.size + len(bad)] = bad
+        SLOT_HEADER.pack_into(ring.buf, start, 2, len(bad))
+        COUNTER.pack_into(ring.buf, WRITE_OFFSET, 2)
+        ring.sendall(pack_imu_sample(2, 0, 4, 5, 6))
+        assert server.drain() == [("accel_data", [1.0, 2.0, 3.0]), ("accel_data", [4.0, 5.0, 6.0])]
+        assert ring.bad_frames == 1
+        assert ring.pending() == 0
+        # the decoder carried on: the skipped slot is a sequence gap
+        assert server.stats["imu"].dropped == 1
+        ring.sendall(pack_imu_sample(3, 0, 7, 8, 9))
+        assert server.drain() == [("accel_data", [7.0, 8.0, 9.0])]
+        assert server.stats["imu"].dropped == 1
+    finally:
+        ring.close()
+
+
+def test_ring_survives_a_producer_process_exit(ring):
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from sensor_io.framing import pack_imu_sample\n"
+        "from sensor_io.shm_ring import ShmRing\n"
+        "ShmRing.attach(sys.argv[2]).sendall(pack_imu_sample(int(sys.argv[3]), 0, 1, 2, 3))\n"
+    )
+    for seq in range(2):
+        subprocess.run([sys.executable, "-c", code, ROOT, ring.name, str(seq)], check=True)
+    # a restarted producer carries on after the last one's frames
+    assert [r.seq for r in FrameDecoder().feed(ring.read())] == [0, 1]
+
+
+def test_server_drains_rings_on_the_calling_thread():
+    server = SensorServer()
+    imu, camera = ShmRing.create(), ShmRing.create()
+    server.attach_ring(imu, ImuChannel)
+    server.attach_ring(camera, PositionChannel)
+    try:
+        imu.sendall(pack_ready(0.0, 2.0) + pack_imu_sample(0, 0, 1, 2, 3) + pack_imu_sample(2, 0, 4, 5, 6))
+        camera.sendall(pack_position(0, 0, 1, -3.0) + pack_position(1, 0, 1, 7.0))
+        # no I/O thread is needed
+        assert server.drain() == [
+            ("accel_data", [1.0, 2.0, 3.0]),
+            ("accel_data", [4.0, 5.0, 6.0]),
+            ("position_data", [7.0]),
+        ]
+        assert server.ready["imu"][1].startup == 2.0
+        assert server.stats["imu"].samples == 2
+        assert server.stats["imu"].dropped == 1
+        assert server.stats["camera"].last_seen is not None
+        assert server.drain() == []
+    finally:
+        imu.close()
+        camera.close()
@@ -0,0 +1,69 @@
+import os
+import random
+
+import pytest
+
+pytest.importorskip("panda3d")
+
+from simulate import Simulation, random_roll, swing_samples
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+
+
+@pytest.fixture(scope="module")
+def sim():
+    # the game loads "../models/..." relative to main/
+    cwd = os.getcwd()
+    os.chdir(MAIN)
+    # ShowBase can only be created once per process
+    sim = Simulation(players=2, frames=3)
+    yield sim
+    sim.base.destroy()
+    os.chdir(cwd)
+
+
+def test_weak_swing_does_not_roll(sim):
+    steps = sim.steps
+    assert sim.roll(0, swing_samples(20)) is None
+    assert sim.steps == steps
+    assert sim.mechanics.can_bowl
+
+
+def test_rolls_are_scored_on_a_fixed_clock(sim):
+    rng = random.Random(1)
+    logic = sim.mechanics.game_logic
+    bowled = []
+    while not logic.is_game_complete():
+        player = logic.current_player
+        start_time, start_steps = sim.clock.getFrameTime(), sim.steps
+        pins = sim.roll(*random_roll(rng))
+        if pins is None:
+            continue
+        assert 0 <= pins <= 10
+        bowled.append((player, pins))
+        # game time is steps / fps, whatever the wall clock did
+        elapsed = sim.clock.getFrameTime() - start_time
+        assert elapsed == pytest.approx((sim.steps - start_steps) / sim.fps)
+        # the board is reset 6.5 s after the ball is released
+        assert 6.5 <= elapsed < 7
+
+    for player, sheet in enumerate(logic.scores):
+        assert sheet.rolls.tolist() == [pins for p, pins in bowled if p == player]
+
+
+def test_pins_do_not_depend_on_frame_rate(sim):
+    rolls = [random_roll(random.Random(seed)) for seed in range(12)]
+    results = []
+    for fps in (15, 60, 144):
+        sim.clock.setFrameRate(fps)
+        sim.fps = fps
+        pins = []
+        for position, samples in rolls:
+            # every roll at a full rack, whatever the score sheet says
+            sim.mechanics.reset_board(full_reset=True)
+            pins.append(sim.roll(position, samples))
+        results.append(pins)
+    sim.clock.setFrameRate(60)
+    sim.fps = 60
+    assert any(results[0])
+    assert results[0] == results[1] == results[2]
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+pytest.importorskip("panda3d")
+
+from panda3d.core import NodePath, loadPrcFileData
+
+from asset_manager import AssetManager
+from static_scene import build_static_scene, count_geoms
+
+MODELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+LAYOUT = [
+    (os.path.join(MODELS, "gutter2.glb"), (2, 0, z), (1, 1, 1)) for z in (-19, -6.25, 6.25, 19)
+] + [
+    (os.path.join(MODELS, "backdrop2.glb"), (18, -1.5, z), (1, 2, 1)) for z in (-12.5, 0, 12.5)
+]
+
+
+@pytest.fixture(scope="module")
+def assets(tmp_path_factory):
+    from direct.showbase.Loader import Loader
+
+    loadPrcFileData("", "window-type none\naudio-library-name null")
+    return AssetManager(Loader(None), cache_dir=str(tmp_path_factory.mktemp("cache")))
+
+
+def test_flatten_merges_geoms_without_moving_them(assets):
+    separate = build_static_scene(assets, NodePath("render"), LAYOUT, flatten=False)
+    flattened = build_static_scene(assets, NodePath("render"), LAYOUT)
+
+    assert count_geoms(separate) == (len(LAYOUT), len(LAYOUT))
+    geom_nodes, geoms = count_geoms(flattened)
+    assert geom_nodes == 1
+    assert geoms < len(LAYOUT)
+    assert flattened.getTightBounds() == separate.getTightBounds()
+
+
+def test_flatten_leaves_shared_models_untouched(assets):
+    gutter = assets.load(LAYOUT[0][0])
+    bounds = gutter.getTightBounds()
+    build_static_scene(assets, NodePath("render"), LAYOUT)
+    assert gutter.getTightBounds() == bounds
+    assert count_geoms(gutter) == (1, 1)
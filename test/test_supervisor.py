@@ -0,0 +1,104 @@
+import sys
+import time
+
+import pytest
+
+from sensor_io.framing import pack_heartbeat
+from sensor_server import ImuChannel, SensorServer
+from supervisor import Supervisor
+from test_sensor_server import connect
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+def run_until(supervisor, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        supervisor.check()
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def server():
+    server = SensorServer()
+    server.port = server.listen(0, ImuChannel)
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_unknown_channel_is_rejected(server):
+    supervisor = Supervisor(server)
+    with pytest.raises(ValueError):
+        supervisor.add("lidar", python("pass"))
+
+
+def test_crashing_worker_restarts_with_backoff(server):
+    supervisor = Supervisor(server, restart_delay=0.1, max_restart_delay=0.2)
+    supervisor.add("imu", python("raise SystemExit(3)"))
+    supervisor.start()
+    try:
+        worker = supervisor.workers["imu"]
+        starts = [worker.started_at]
+        run_until(supervisor, lambda: worker.restarts == 3)
+        # the last restart has just happened
+        starts.append(worker.started_at)
+        assert worker.failures == 3
+        assert worker.last_failure == "exited with code 3"
+        # 0.1 + 0.2 + 0.2 (capped) at least
+        assert starts[1] - starts[0] >= 0.5
+    finally:
+        supervisor.stop()
+    assert worker.state == "stopped"
+
+
+def test_silent_worker_is_terminated_and_restarted(server):
+    supervisor = Supervisor(server, heartbeat_timeout=0.3, startup_timeout=0.3, restart_delay=0.05)
+    supervisor.add("imu", python("import time; time.sleep(60)"))
+    supervisor.start()
+    try:
+        worker = supervisor.workers["imu"]
+        first = worker.process
+        run_until(supervisor, lambda: worker.restarts == 1)
+        assert first.poll() is not None
+        assert worker.last_failure.startswith("silent for")
+        assert worker.state == "running"
+    finally:
+        supervisor.stop()
+
+
+def test_heartbeats_keep_a_worker_running(server):
+    supervisor = Supervisor(server, heartbeat_timeout=0.3, startup_timeout=0.3)
+    supervisor.add("imu", python("import time; time.sleep(60)"))
+    supervisor.start()
+    client = connect(server.port)
+    try:
+        worker = supervisor.workers["imu"]
+        end = time.monotonic() + 1.0
+        while time.monotonic() < end:
+            client.sendall(pack_heartbeat(time.monotonic()))
+            supervisor.check()
+            time.sleep(0.05)
+        assert worker.state == "running"
+        assert worker.restarts == 0
+        assert server.stats["imu"].samples == 0
+    finally:
+        client.close()
+        supervisor.stop()
+
+
+def test_report_lists_every_worker(server):
+    supervisor = Supervisor(server)
+    supervisor.add("imu", python("import time; time.sleep(60)"))
+    supervisor.start()
+    try:
+        supervisor.check()
+        lines = supervisor.report().splitlines()
+    finally:
+        supervisor.stop()
+    assert lines[0].split()[:3] == ["worker", "state", "pid"]
+    assert lines[1].split()[:2] == ["imu", "running"]
+    assert lines[-1] == "events dropped by a full queue: 0"